@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# Cold-start cost of the API process: import time of main.app and time to first request.
+#
+#   python benchmarks/startup.py                 # -X importtime breakdown of `import main`
+#   python benchmarks/startup.py --level 2       # ... by subpackage (alpaca.trading, alpaca.data, ...)
+#   python benchmarks/startup.py --serve         # plus uvicorn spawn -> first 200 from /health
+#   python benchmarks/startup.py --serve --prewarm
+#
+# Run from backend/. Every measurement is a fresh interpreter, so nothing is cached in-process.
+# --serve runs the real lifespan (asset registry, calendar, market stream), so it needs the
+# same environment as a normal `python run.py`.
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _importtime() -> list:
+    """(cumulative_us, self_us, depth, module) per import of `import main` in a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"`import main` failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative_us), int(self_us), depth, name.strip()))
+    return rows
+
+
+def _package(module: str, level: int) -> str:
+    """'alpaca.trading.client' -> 'alpaca' at level 1, 'alpaca.trading' at level 2."""
+    return ".".join(module.split(".")[:level])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _first_request(prewarm: bool, timeout: float) -> float:
+    """Seconds from spawning uvicorn until GET /health answers 200."""
+    port = _free_port()
+    env = dict(os.environ, PREWARM_SDK_IMPORTS="true" if prewarm else "false")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise SystemExit("uvicorn exited before serving; run it directly to see why")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise SystemExit(f"no response from /health within {timeout:.0f}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="API process import time and time to first request")
+    parser.add_argument("--top", type=int, default=15, help="heaviest packages to list")
+    parser.add_argument("--level", type=int, default=1, help="group modules by this many leading name parts (2: alpaca.trading)")
+    parser.add_argument("--serve", action="store_true", help="also measure spawn -> first /health response")
+    parser.add_argument("--prewarm", action="store_true", help="run the server with PREWARM_SDK_IMPORTS=true")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    rows = _importtime()
+    # a module's self time is its own cost, so summing it over every depth attributes each
+    # import to its package exactly once, wherever in the tree it was first pulled in
+    by_package = defaultdict(int)
+    for _, self_us, _, name in rows:
+        by_package[_package(name, args.level)] += self_us
+    main_us = next(c for c, _, _, name in rows if name == "main")
+
+    print(f"import main: {main_us / 1000:8.1f} ms")
+    for name, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {name:<32} {us / 1000:8.1f} ms")
+    for sdk in ("anthropic", "plaid", "alpaca"):
+        sdk_us = sum(us for name, us in by_package.items() if name.split(".")[0] == sdk)
+        loaded = any(n.split(".")[0] == sdk for *_, n in rows)
+        print(f"  {sdk} loaded at import: {f'yes ({sdk_us / 1000:.1f} ms)' if loaded else 'no'}")
+
+    if args.serve:
+        samples = [_first_request(args.prewarm, args.timeout) for _ in range(args.iterations)]
+        ms = [s * 1000 for s in samples]
+        label = "first request (prewarm)" if args.prewarm else "first request"
+        print(f"{label:<28} mean {statistics.mean(ms):8.1f} ms   min {min(ms):8.1f} ms   max {max(ms):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,27 @@
 import os
-from typing import Optional
+import importlib
+import time
+from typing import TYPE_CHECKING, Optional
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from supabase import create_client, Client
-from alpaca.trading.client import TradingClient
-from alpaca.data.historical import StockHistoricalDataClient, CryptoHistoricalDataClient
-from alpaca.data.live import StockDataStream, CryptoDataStream
 from datetime import datetime, timezone, timedelta
-import httpx
-from plaid.api import plaid_api
-from plaid.model.link_token_create_request import LinkTokenCreateRequest
-from plaid.model.link_token_create_request_user import LinkTokenCreateRequestUser
-from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
-from plaid.configuration import Configuration
-from plaid.api_client import ApiClient
-import anthropic
 import logging
+import threading
+
+from services.executor import run_db
+from services.repositories import BrokerageAccountRepository, OrderLedgerRepository, StrategyRepository
+from services.jwt_auth import LOCAL_JWT_VERIFY, token_verifier
+from services.trading_clients import trading_client_cache
+from services.token_refresh import token_refresher
+
+# Heavy SDKs are imported on first use (or by prewarm_sdk_imports), not at import time
+if TYPE_CHECKING:
+    import anthropic
+    from alpaca.data.historical import CryptoHistoricalDataClient, StockHistoricalDataClient
+    from alpaca.data.live import CryptoDataStream, StockDataStream
+    from alpaca.trading.client import TradingClient
+    from plaid.api import plaid_api
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,41 +31,93 @@ logger = logging.getLogger(__name__)
 security = HTTPBearer()
 
 # Initialize clients
+_supabase_client: Optional[Client] = None
+_supabase_lock = threading.Lock()
+
 def get_supabase_client() -> Client:
-    """Get Supabase client"""
+    """Get the process-wide Supabase client (created on first use, closed on shutdown)"""
+    global _supabase_client
+    if _supabase_client is not None:
+        return _supabase_client
+
     supabase_url = os.getenv("SUPABASE_URL")
     supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
     
     if not supabase_url or not supabase_key:
         raise HTTPException(status_code=500, detail="Supabase configuration missing")
     
-    return create_client(supabase_url, supabase_key)
+    # sync dependencies run on the threadpool, so guard against two first requests racing
+    with _supabase_lock:
+        if _supabase_client is None:
+            _supabase_client = create_client(supabase_url, supabase_key)
+    return _supabase_client
+
+def close_supabase_client() -> None:
+    """Close the shared Supabase client's keep-alive HTTP sessions"""
+    global _supabase_client
+    client, _supabase_client = _supabase_client, None
+    if client is None:
+        return
+    sessions = [
+        getattr(getattr(client, "_postgrest", None), "session", None),
+        getattr(getattr(client, "auth", None), "_http_client", None),
+    ]
+    for session in sessions:
+        if session is not None:
+            try:
+                session.close()
+            except Exception as e:
+                logger.warning(f"Error closing Supabase session: {e}")
+
+def get_strategy_repository(supabase: Client = Depends(get_supabase_client)) -> StrategyRepository:
+    """Get trading strategy repository"""
+    return StrategyRepository(supabase)
+
+def get_brokerage_account_repository(supabase: Client = Depends(get_supabase_client)) -> BrokerageAccountRepository:
+    """Get brokerage account repository"""
+    return BrokerageAccountRepository(supabase)
+
+def get_order_ledger_repository(supabase: Client = Depends(get_supabase_client)) -> OrderLedgerRepository:
+    """Get order ledger repository"""
+    return OrderLedgerRepository(supabase)
 
 async def get_alpaca_trading_client(
     current_user,
-    supabase: Client
-) -> TradingClient:
-    """Get Alpaca trading client"""
+    accounts: BrokerageAccountRepository
+) -> "TradingClient":
+    """Get Alpaca trading client (cached per user until its token expires)"""
+    from alpaca.trading.client import TradingClient
+
+    cached = trading_client_cache.get(current_user.id)
+    if cached is not None:
+        return cached
+
     try:
         # First try to get OAuth token from database
-        resp = supabase.table("brokerage_accounts").select("*").eq("user_id", current_user.id).eq("brokerage_name", "alpaca").eq("is_connected", True).execute()
+        account = await accounts.connected_alpaca_account(current_user.id)
         
-        if resp.data and len(resp.data) > 0:
-            account = resp.data[0]
+        if account:
             access_token = account.get("access_token")
             refresh_token = account.get("refresh_token")
             expires_at = account.get("expires_at")
+            expiry_time = None
             
             # Check if token is expired
             if expires_at:
                 expiry_time = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
                 if datetime.now(timezone.utc) >= expiry_time and refresh_token:
                     # Refresh the token
-                    access_token = await refresh_alpaca_token(account["id"], refresh_token, supabase)
+                    access_token = await refresh_alpaca_token(account["id"], refresh_token, accounts)
+                    # the refreshed expiry is not known here; let the cache's max age bound it
+                    expiry_time = None
             
             if access_token:
                 # Use OAuth token
-                return TradingClient(api_key=access_token, secret_key="", paper=True, oauth_token=access_token)
+                client = TradingClient(api_key=access_token, secret_key="", paper=True, oauth_token=access_token)
+                trading_client_cache.set(
+                    current_user.id, account["id"], client, expiry_time.timestamp() if expiry_time else None
+                )
+                return client
         
         # Fallback to API key method
         api_key = os.getenv("ALPACA_API_KEY")
@@ -71,62 +129,35 @@ async def get_alpaca_trading_client(
                 detail="No Alpaca connection found. Please connect your Alpaca account or configure API credentials."
             )
         
-        return TradingClient(api_key, secret_key, paper=True)
+        client = TradingClient(api_key, secret_key, paper=True)
+        trading_client_cache.set(current_user.id, None, client)
+        return client
         
     except Exception as e:
         logger.error(f"Error creating Alpaca trading client: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to create Alpaca client: {str(e)}")
 
-async def refresh_alpaca_token(account_id: str, refresh_token: str, supabase: Client) -> Optional[str]:
-    """Refresh Alpaca OAuth token"""
-    try:
-        client_id = os.getenv("ALPACA_CLIENT_ID")
-        client_secret = os.getenv("ALPACA_CLIENT_SECRET")
-        
-        if not client_id or not client_secret:
-            logger.error("Alpaca OAuth configuration missing for token refresh")
-            return None
-        
-        token_data = {
-            "grant_type": "refresh_token",
-            "refresh_token": refresh_token,
-            "client_id": client_id,
-            "client_secret": client_secret
-        }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.alpaca.markets/oauth/token",
-                data=token_data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
-            )
-        
-        if response.status_code == 200:
-            token_data = response.json()
-            new_access_token = token_data.get("access_token")
-            new_refresh_token = token_data.get("refresh_token", refresh_token)
-            expires_in = token_data.get("expires_in", 3600)
-            
-            # Update database
-            expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
-            supabase.table("brokerage_accounts").update({
-                "access_token": new_access_token,
-                "refresh_token": new_refresh_token,
-                "expires_at": expires_at.isoformat()
-            }).eq("id", account_id).execute()
-            
-            return new_access_token
-        else:
-            logger.error(f"Token refresh failed: {response.status_code} {response.text}")
-            return None
-            
-    except Exception as e:
-        logger.error(f"Error refreshing token: {e}")
-        return None
+async def refresh_alpaca_token(account_id: str, refresh_token: str, accounts: BrokerageAccountRepository) -> Optional[str]:
+    """Refresh Alpaca OAuth token (shares the per-account lock with the background refresher)"""
+    return await token_refresher.refresh(account_id, refresh_token, accounts)
     
 
-def get_alpaca_stock_data_client() -> StockHistoricalDataClient:
+def get_alpaca_service_trading_client() -> "TradingClient":
+    """Get Alpaca trading client on the platform API keys, for shared reference data (assets, calendar)"""
+    from alpaca.trading.client import TradingClient
+
+    api_key = os.getenv("ALPACA_API_KEY")
+    secret_key = os.getenv("ALPACA_SECRET_KEY")
+    
+    if not api_key or not secret_key:
+        raise HTTPException(status_code=500, detail="Alpaca API credentials missing")
+    
+    return TradingClient(api_key, secret_key, paper=True)
+
+def get_alpaca_stock_data_client() -> "StockHistoricalDataClient":
     """Get Alpaca stock data client"""
+    from alpaca.data.historical import StockHistoricalDataClient
+
     api_key = os.getenv("ALPACA_API_KEY")
     secret_key = os.getenv("ALPACA_SECRET_KEY")
     
@@ -135,8 +166,10 @@ def get_alpaca_stock_data_client() -> StockHistoricalDataClient:
     
     return StockHistoricalDataClient(api_key, secret_key)
 
-def get_alpaca_crypto_data_client() -> CryptoHistoricalDataClient:
+def get_alpaca_crypto_data_client() -> "CryptoHistoricalDataClient":
     """Get Alpaca crypto data client"""
+    from alpaca.data.historical import CryptoHistoricalDataClient
+
     api_key = os.getenv("ALPACA_API_KEY")
     secret_key = os.getenv("ALPACA_SECRET_KEY")
     
@@ -145,8 +178,37 @@ def get_alpaca_crypto_data_client() -> CryptoHistoricalDataClient:
     
     return CryptoHistoricalDataClient(api_key, secret_key)
 
-def get_plaid_client() -> plaid_api.PlaidApi:
+def get_alpaca_stock_data_stream() -> "StockDataStream":
+    """Get Alpaca stock market data stream (IEX feed)"""
+    from alpaca.data.enums import DataFeed
+    from alpaca.data.live import StockDataStream
+
+    api_key = os.getenv("ALPACA_API_KEY")
+    secret_key = os.getenv("ALPACA_SECRET_KEY")
+    
+    if not api_key or not secret_key:
+        raise HTTPException(status_code=500, detail="Alpaca API credentials missing")
+    
+    return StockDataStream(api_key, secret_key, feed=DataFeed.IEX)
+
+def get_alpaca_crypto_data_stream() -> "CryptoDataStream":
+    """Get Alpaca crypto market data stream"""
+    from alpaca.data.live import CryptoDataStream
+
+    api_key = os.getenv("ALPACA_API_KEY")
+    secret_key = os.getenv("ALPACA_SECRET_KEY")
+    
+    if not api_key or not secret_key:
+        raise HTTPException(status_code=500, detail="Alpaca API credentials missing")
+    
+    return CryptoDataStream(api_key, secret_key)
+
+def get_plaid_client() -> "plaid_api.PlaidApi":
     """Get Plaid client"""
+    from plaid.api import plaid_api
+    from plaid.api_client import ApiClient
+    from plaid.configuration import Configuration
+
     plaid_client_id = os.getenv("PLAID_CLIENT_ID")
     plaid_secret = os.getenv("PLAID_SECRET")
     plaid_env = os.getenv("PLAID_ENV", "sandbox")
@@ -164,26 +226,84 @@ def get_plaid_client() -> plaid_api.PlaidApi:
     api_client = ApiClient(configuration)
     return plaid_api.PlaidApi(api_client)
 
-def get_anthropic_client() -> anthropic.Anthropic:
-    """Get Anthropic client"""
+# One AsyncAnthropic client per process: its connection pool is reused across chat requests
+_anthropic_client: Optional["anthropic.AsyncAnthropic"] = None
+_anthropic_lock = threading.Lock()
+
+def get_anthropic_client() -> "anthropic.AsyncAnthropic":
+    """Get the shared async Anthropic client"""
+    global _anthropic_client
+    if _anthropic_client is not None:
+        return _anthropic_client
+
     api_key = os.getenv("ANTHROPIC_API_KEY")
     
     if not api_key:
         raise HTTPException(status_code=500, detail="Anthropic API key missing")
     
-    return anthropic.Anthropic(api_key=api_key)
+    import anthropic
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    supabase: Client = Depends(get_supabase_client)
-):
-    """Get current user from JWT token"""
-    try:
-        # Verify the JWT token with Supabase
-        user = supabase.auth.get_user(credentials.credentials)
+    with _anthropic_lock:
+        if _anthropic_client is None:
+            _anthropic_client = anthropic.AsyncAnthropic(
+                api_key=api_key,
+                timeout=float(os.getenv("ANTHROPIC_TIMEOUT_SECONDS", "600")),
+                max_retries=int(os.getenv("ANTHROPIC_MAX_RETRIES", "2")),
+            )
+    return _anthropic_client
+
+async def close_anthropic_client() -> None:
+    """Close the shared Anthropic client's connection pool"""
+    global _anthropic_client
+    client, _anthropic_client = _anthropic_client, None
+    if client is not None:
+        await client.close()
+
+# Modules deferred above (and by the routers), in rough order of import cost
+SDK_MODULES = (
+    "alpaca.trading.client",
+    "alpaca.data.historical",
+    "alpaca.data.live",
+    "plaid.api",
+    "plaid.model.link_token_create_request",
+    "plaid.model.item_public_token_exchange_request",
+    "anthropic",
+)
+
+def prewarm_sdk_imports() -> float:
+    """Import every deferred SDK now; returns the seconds spent. Missing SDKs are logged and skipped."""
+    start = time.perf_counter()
+    for name in SDK_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"Could not pre-warm {name}: {e}")
+    elapsed = time.perf_counter() - start
+    logger.info(f"Pre-warmed SDK imports in {elapsed * 1000:.0f} ms")
+    return elapsed
+
+async def get_user_from_token(token: str, supabase: Client):
+    """Resolve a Supabase access token to its user, for callers outside HTTPBearer (e.g. websockets)"""
+
+    async def remote_check(token: str):
+        # Verify the JWT token with Supabase Auth
+        user = await run_db(supabase.auth.get_user, token)
         if not user or not user.user:
             raise HTTPException(status_code=401, detail="Invalid token")
         return user.user
+
+    try:
+        if not LOCAL_JWT_VERIFY:
+            return await remote_check(token)
+        # Verified locally and cached until expiry; Supabase Auth is only asked when needed
+        return await token_verifier.verify(token, remote_check)
     except Exception as e:
         logger.error(f"Authentication error: {e}")
-        raise HTTPException(status_code=401, detail="Invalid token")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    supabase: Client = Depends(get_supabase_client)
+):
+    """Get current user from JWT token"""
+    return await get_user_from_token(credentials.credentials, supabase)
\ No newline at end of file
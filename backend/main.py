@@ -1,3 +1,5 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
@@ -10,16 +12,60 @@ load_dotenv()
 
 # Import routers
 from routers import chat, trades, strategies, market_data, plaid_routes, brokerage_auth
+from services.market_stream import market_stream, start_market_stream
+from services.executor import run_blocking, shutdown_executor
+from services.assets import asset_registry
+from services.market_calendar import market_calendar
+from dependencies import close_anthropic_client, close_supabase_client, get_supabase_client, prewarm_sdk_imports
+from services.token_refresh import token_refresher
+from services.trade_stream import trade_streams
+from services.repositories import BrokerageAccountRepository
+from services.http_client import close_http_client, http_pool_stats
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Import the lazily loaded SDKs (Plaid, Anthropic, alpaca clients) in the background at
+# startup. Long-lived workers want this; serverless cold starts usually do not.
+PREWARM_SDK_IMPORTS = os.getenv("PREWARM_SDK_IMPORTS", "false").lower() in ("1", "true", "yes")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Asset master for symbol routing and the trading calendar for cache TTLs, then the
+    # market data ingester feeding live prices
+    asset_registry.start()
+    market_calendar.start()
+    start_market_stream()
+    # open the shared Supabase client up front so the first request does not pay for it
+    try:
+        get_supabase_client()
+    except HTTPException as e:
+        logger.warning(f"Supabase client not created at startup: {e.detail}")
+    # refresh brokerage OAuth tokens before they expire, off the request path
+    token_refresher.start(lambda: BrokerageAccountRepository(get_supabase_client()))
+    # order and position updates pushed by Alpaca for every connected account
+    trade_streams.start(get_supabase_client)
+    if PREWARM_SDK_IMPORTS:
+        # off the event loop and not awaited, so the worker starts serving right away
+        app.state.prewarm = asyncio.create_task(run_blocking(prewarm_sdk_imports))
+    yield
+    await trade_streams.stop()
+    await token_refresher.stop()
+    await market_stream.stop()
+    await asset_registry.stop()
+    await market_calendar.stop()
+    close_supabase_client()
+    await close_anthropic_client()
+    await close_http_client()
+    shutdown_executor()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="brokernomex Trading API",
     description="Advanced trading automation platform API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -57,6 +103,16 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": "2024-01-15T10:30:00Z"}
 
+@app.get("/health/http")
+async def http_health():
+    """Outbound HTTP client counters and connection pool usage"""
+    return http_pool_stats()
+
+@app.get("/health/trade-streams")
+async def trade_streams_health():
+    """Trade updates streams open and connected, across all accounts"""
+    return trade_streams.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=6853)
\ No newline at end of file
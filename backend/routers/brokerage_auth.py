@@ -5,15 +5,19 @@ from typing import Dict, Any, Optional
 import logging
 import os
 import secrets
-import httpx
 from urllib.parse import urlencode
 from datetime import datetime, timezone, timedelta
-from supabase import Client
 from dependencies import (
     get_current_user,
-    get_supabase_client,
+    get_brokerage_account_repository,
     security
 )
+from services.http_client import get_http_client
+from services.repositories import BrokerageAccountRepository
+from services.order_ledger import order_ledgers
+from services.pnl import pnl_books
+from services.trade_stream import trade_streams
+from services.trading_clients import trading_client_cache
 
 router = APIRouter(prefix="/api/alpaca", tags=["alpaca-oauth"])
 logger = logging.getLogger(__name__)
@@ -68,7 +72,7 @@ async def alpaca_oauth_callback(
     code: str = Query(..., description="Authorization code from Alpaca"),
     state: str = Query(..., description="State parameter for CSRF protection"),
     error: Optional[str] = Query(None, description="Error from Alpaca"),
-    supabase: Client = Depends(get_supabase_client)
+    accounts: BrokerageAccountRepository = Depends(get_brokerage_account_repository)
 ):
     """Handle Alpaca OAuth callback according to Alpaca documentation"""
     try:
@@ -111,12 +115,12 @@ async def alpaca_oauth_callback(
         
         logger.info(f"Exchanging authorization code for access token for user {user_id}")
         
-        async with httpx.AsyncClient() as client:
-            token_response = await client.post(
-                "https://api.alpaca.markets/oauth/token",
-                data=token_data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
-            )
+        client = get_http_client()
+        token_response = await client.post(
+            "https://api.alpaca.markets/oauth/token",
+            data=token_data,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
         
         if token_response.status_code != 200:
             logger.error(f"Token exchange failed: {token_response.status_code} {token_response.text}")
@@ -138,11 +142,11 @@ async def alpaca_oauth_callback(
         logger.info(f"Successfully received access token for user {user_id}")
         
         # Get account information from Alpaca using the access token
-        async with httpx.AsyncClient() as client:
-            account_response = await client.get(
-                "https://api.alpaca.markets/v2/account",
-                headers={"Authorization": f"Bearer {access_token}"}
-            )
+        # same pooled connection to api.alpaca.markets as the token exchange
+        account_response = await client.get(
+            "https://api.alpaca.markets/v2/account",
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
         
         if account_response.status_code != 200:
             logger.error(f"Failed to fetch account info: {account_response.status_code} {account_response.text}")
@@ -182,16 +186,19 @@ async def alpaca_oauth_callback(
         }
         
         # Check if account already exists for this user and Alpaca account
-        existing_account = supabase.table("brokerage_accounts").select("*").eq("user_id", user_id).eq("account_number", alpaca_account_id).execute()
+        existing_account = await accounts.find_by_account_number(user_id, alpaca_account_id)
         
-        if existing_account.data:
+        if existing_account:
             # Update existing account
             logger.info(f"Updating existing Alpaca account for user {user_id}")
-            supabase.table("brokerage_accounts").update(account_data).eq("id", existing_account.data[0]["id"]).execute()
+            await accounts.update(existing_account["id"], account_data)
         else:
             # Insert new account
             logger.info(f"Creating new Alpaca account record for user {user_id}")
-            supabase.table("brokerage_accounts").insert(account_data).execute()
+            await accounts.insert(account_data)
+        trading_client_cache.invalidate(user_id=user_id)
+        pnl_books.invalidate(user_id)
+        order_ledgers.invalidate(user_id)
         
         logger.info(f"Successfully connected Alpaca account {alpaca_account_id} for user {user_id}")
         
@@ -210,12 +217,11 @@ async def alpaca_oauth_callback(
 async def get_connected_accounts(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client)
+    accounts: BrokerageAccountRepository = Depends(get_brokerage_account_repository)
 ):
     """Get user's connected Alpaca accounts"""
     try:
-        resp = supabase.table("brokerage_accounts").select("*").eq("user_id", current_user.id).eq("brokerage", "alpaca").execute()
-        return {"accounts": resp.data}
+        return {"accounts": await accounts.list_alpaca(current_user.id)}
     except Exception as e:
         logger.error(f"Error fetching connected accounts: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch accounts: {str(e)}")
@@ -225,12 +231,16 @@ async def disconnect_account(
     account_id: str,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client)
+    accounts: BrokerageAccountRepository = Depends(get_brokerage_account_repository)
 ):
     """Disconnect a brokerage account"""
     try:
         # Delete the account record
-        resp = supabase.table("brokerage_accounts").delete().eq("id", account_id).eq("user_id", current_user.id).execute()
+        await accounts.delete(current_user.id, account_id)
+        trading_client_cache.invalidate(user_id=current_user.id, account_id=account_id)
+        pnl_books.invalidate(current_user.id)
+        order_ledgers.invalidate(current_user.id)
+        await trade_streams.drop(account_id)
         
         logger.info(f"Disconnected account {account_id} for user {current_user.id}")
         return {"message": "Account disconnected successfully"}
@@ -243,7 +253,7 @@ async def refresh_access_token(
     request_data: Dict[str, Any],
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client)
+    accounts: BrokerageAccountRepository = Depends(get_brokerage_account_repository)
 ):
     """Refresh an expired Alpaca access token (if refresh tokens are supported)"""
     try:
@@ -252,12 +262,11 @@ async def refresh_access_token(
             raise HTTPException(status_code=400, detail="account_id is required")
         
         # Get account from database
-        resp = supabase.table("brokerage_accounts").select("*").eq("id", account_id).eq("user_id", current_user.id).execute()
+        account = await accounts.get(current_user.id, account_id)
         
-        if not resp.data:
+        if not account:
             raise HTTPException(status_code=404, detail="Account not found")
         
-        account = resp.data[0]
         oauth_data = account.get("oauth_data", {})
         
         # Note: Alpaca may not provide refresh tokens in all cases
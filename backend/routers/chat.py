@@ -2,7 +2,6 @@ from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import HTTPAuthorizationCredentials
 from typing import List, Dict, Any
 import logging
-import anthropic
 from dependencies import (
     get_current_user,
     get_anthropic_client,
@@ -17,9 +16,12 @@ async def chat_with_anthropic(
     request_data: Dict[str, Any],
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user = Depends(get_current_user),
-    anthropic_client: anthropic.Anthropic = Depends(get_anthropic_client)
+    anthropic_client = Depends(get_anthropic_client)
 ):
     """Chat with Anthropic Claude"""
+    # the SDK is loaded on first use; get_anthropic_client has already imported it
+    import anthropic
+
     try:
         message = request_data.get("message")
         history = request_data.get("history", [])
@@ -58,8 +60,8 @@ Key areas of expertise:
 
 Always provide practical, actionable advice while emphasizing risk management. When discussing strategies, explain both the potential benefits and risks. Be helpful but remind users to do their own research and consider their risk tolerance."""
         
-        # Make API call to Anthropic
-        response = anthropic_client.messages.create(
+        # Make API call to Anthropic; awaited, so other requests keep running during generation
+        response = await anthropic_client.messages.create(
             model=model,
             max_tokens=4000,
             temperature=0.7,
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import Response, StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta, timezone
+import asyncio
 import logging
+import os
+import time
+
+import numpy as np
 
 from alpaca.data.historical import StockHistoricalDataClient, CryptoHistoricalDataClient
 from alpaca.data.requests import (
@@ -12,21 +18,44 @@ from alpaca.data.requests import (
     CryptoBarsRequest,
     StockSnapshotRequest,
 )
-from alpaca.data.timeframe import TimeFrame
+from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
 from alpaca.data.enums import DataFeed
 from alpaca.common.exceptions import APIError as AlpacaAPIError
 
+from supabase import Client
 from dependencies import (
     get_current_user,
+    get_user_from_token,
+    get_supabase_client,
     get_alpaca_stock_data_client,
     get_alpaca_crypto_data_client,
     security,
 )
+from services.quote_cache import QuoteCache, quote_cache, snapshot_cache
+from services.market_stream import market_stream
+from services.assets import CRYPTO, CRYPTO_BASES, STOCK, STOCK_PREFIX, asset_registry
+from services.executor import run_blocking
+from services.batcher import data_batcher, upstream_limiter
+from services.circuit_breaker import CircuitOpenError, get_breaker
+from services.bar_store import Columns, bar_store, concat_columns, empty_columns
+from services.bar_encoding import BAR_FORMATS, encode_bars
+from services.bar_stream import alpaca_data_headers, stream_bars_ndjson
+from services.live_prices import encode_live_prices
+from services.jwt_auth import token_expiry
+from services.indicators import indicator_engine, indicator_key, parse_indicator, warmup_bars
+from services.resample import bucket_starts, parse_timeframe, resample_bars, timeframe_seconds
 
 router = APIRouter(prefix="/api/market-data", tags=["market-data"])
 logger = logging.getLogger(__name__)
 
 # --------- helpers ---------
+STREAM_PUSH_INTERVAL = float(os.getenv("MARKET_STREAM_PUSH_INTERVAL_MS", "250")) / 1000
+STREAM_MAX_SYMBOLS = int(os.getenv("MARKET_STREAM_MAX_CLIENT_SYMBOLS", "200"))
+STREAM_DELTA_FIELDS = ("price", "change", "change_percent")
+# /live-prices requests at least this large skip per-symbol dicts (services/live_prices.py)
+LIVE_PRICES_VECTORIZE_MIN_SYMBOLS = int(os.getenv("LIVE_PRICES_VECTORIZE_MIN_SYMBOLS", "200"))
+INDICATOR_MAX_POINTS = 1000
+
 STOCK_ETFS = {"SPY", "QQQ", "VTI", "IWM", "GLD", "SLV"}
 
 def is_stock_symbol(symbol: str) -> bool:
@@ -48,6 +77,8 @@ def normalize_crypto_symbol(symbol: str) -> Optional[str]:
         return "BTC/USD"
     if s in {"ETHUSD", "ETH/USD"}:
         return "ETH/USD"
+    if s in CRYPTO_BASES:
+        return f"{s}/USD"
     # Generic: ABCUSD -> ABC/USD
     if s.endswith("USD") and len(s) <= 7:
         base = s[:-3]
@@ -57,6 +88,33 @@ def normalize_crypto_symbol(symbol: str) -> Optional[str]:
         return s
     return None
 
+def _heuristic_resolve(symbol: str) -> Tuple[str, str]:
+    s = symbol.upper()
+    if s.startswith(STOCK_PREFIX):
+        return STOCK, s[len(STOCK_PREFIX):]
+    crypto = normalize_crypto_symbol(s)
+    if crypto and ("/" in s or s.endswith("USD") or s.endswith("USDT") or not is_stock_symbol(s)
+                   or s in CRYPTO_BASES or s in {"BITCOIN", "ETHEREUM"}):
+        return CRYPTO, crypto
+    return STOCK, s
+
+def resolve_symbol(symbol: str) -> Tuple[str, str]:
+    """Route a symbol to exactly one asset class and its canonical Alpaca symbol.
+
+    Uses the asset registry when it knows the symbol; the string heuristics above
+    are only a fallback until the registry has loaded.
+    """
+    return asset_registry.resolve(symbol) or _heuristic_resolve(symbol)
+
+def split_symbols(symbols: List[str]) -> Tuple[List[str], List[str]]:
+    """Canonical (stock, crypto) symbol lists, de-duplicated in request order."""
+    stocks: Dict[str, None] = {}
+    crypto: Dict[str, None] = {}
+    for symbol in symbols:
+        asset_class, canonical = resolve_symbol(symbol)
+        (crypto if asset_class == CRYPTO else stocks)[canonical] = None
+    return list(stocks), list(crypto)
+
 def tz_now_iso() -> str:
     return datetime.utcnow().replace(tzinfo=timezone.utc).isoformat()
 
@@ -85,105 +143,143 @@ def _is_403(e: Exception) -> bool:
     text = str(e)
     return "403" in text or "Forbidden" in text
 
+# --------- upstream fetchers ---------
+async def _fetch_stock_quotes(client: StockHistoricalDataClient, symbols: List[str]) -> Dict[str, Any]:
+    # IEX feed required for free/paper
+    req = StockLatestQuoteRequest(symbol_or_symbols=symbols, feed=DataFeed.IEX)
+    data = await run_blocking(client.get_stock_latest_quote, req)
+    return {
+        sym: {
+            "bid_price": float(q.bid_price) if getattr(q, "bid_price", None) else 0.0,
+            "ask_price": float(q.ask_price) if getattr(q, "ask_price", None) else 0.0,
+            "bid_size": int(getattr(q, "bid_size", 0) or 0),
+            "ask_size": int(getattr(q, "ask_size", 0) or 0),
+            "timestamp": q.timestamp.isoformat() if getattr(q, "timestamp", None) else tz_now_iso(),
+            "source": "alpaca:iex",
+        }
+        for sym, q in (data or {}).items()
+    }
+
+async def _fetch_crypto_quotes(client: CryptoHistoricalDataClient, symbols: List[str]) -> Dict[str, Any]:
+    req = CryptoLatestQuoteRequest(symbol_or_symbols=symbols)
+    data = await run_blocking(client.get_crypto_latest_quote, req)
+    return {
+        sym: {
+            "bid_price": float(q.bid_price) if getattr(q, "bid_price", None) else 0.0,
+            "ask_price": float(q.ask_price) if getattr(q, "ask_price", None) else 0.0,
+            "bid_size": float(getattr(q, "bid_size", 0) or 0.0),
+            "ask_size": float(getattr(q, "ask_size", 0) or 0.0),
+            "timestamp": q.timestamp.isoformat() if getattr(q, "timestamp", None) else tz_now_iso(),
+            "source": "alpaca:crypto",
+        }
+        for sym, q in (data or {}).items()
+    }
+
 # --------- core getters ---------
+def _stale(value: Dict[str, Any], age: float) -> Dict[str, Any]:
+    return {**value, "stale": True, "age_seconds": round(age, 1)}
+
+async def _cached_upstream(cache: QuoteCache, endpoint: str, symbols: List[str], fetch) -> Dict[str, Any]:
+    """Cache, then circuit breaker, then the cross-request batcher.
+
+    When upstream fails or the endpoint's breaker is open, fall back to the
+    last-known-good cached values, marked stale with their age. Symbols never
+    seen before are left out.
+    """
+    breaker = get_breaker(endpoint)
+    try:
+        if breaker.rejecting():
+            raise CircuitOpenError(endpoint, breaker.stats()["retry_after"])
+        # the breaker wraps each batched upstream call, so one failed batch counts once
+        return await cache.get_many(
+            symbols, lambda syms: data_batcher.submit(endpoint, syms, lambda batch: breaker.call(fetch, batch))
+        )
+    except CircuitOpenError:
+        pass
+    except Exception as e:
+        logger.error(f"Error fetching {endpoint}: {e}")
+    return {
+        sym: value if cache.get(sym) is not None else _stale(value, age)
+        for sym, (age, value) in cache.last_known(symbols).items()
+    }
+
 async def get_real_time_quotes(symbols: List[str], credentials: HTTPAuthorizationCredentials) -> Dict[str, Any]:
     stock_data_client: StockHistoricalDataClient = get_alpaca_stock_data_client()
     crypto_data_client: CryptoHistoricalDataClient = get_alpaca_crypto_data_client()
 
-    stock_symbols = [s for s in symbols if is_stock_symbol(s)]
-    crypto_symbols_norm = [normalize_crypto_symbol(s) for s in symbols]
-    crypto_symbols = [s for s in crypto_symbols_norm if s]
+    stock_symbols, crypto_symbols = split_symbols(symbols)
 
-    quotes: Dict[str, Any] = {}
-
-    # Stocks (IEX feed required for free/paper)
-    if stock_symbols:
-        try:
-            req = StockLatestQuoteRequest(symbol_or_symbols=stock_symbols, feed=DataFeed.IEX)
-            data = stock_data_client.get_stock_latest_quote(req)
-            for sym, q in (data or {}).items():
-                quotes[sym] = {
-                    "bid_price": float(q.bid_price) if getattr(q, "bid_price", None) else 0.0,
-                    "ask_price": float(q.ask_price) if getattr(q, "ask_price", None) else 0.0,
-                    "bid_size": int(getattr(q, "bid_size", 0) or 0),
-                    "ask_size": int(getattr(q, "ask_size", 0) or 0),
-                    "timestamp": q.timestamp.isoformat() if getattr(q, "timestamp", None) else tz_now_iso(),
-                    "source": "alpaca:iex",
-                }
-        except Exception as e:
-            logger.error(f"Error fetching stock quotes: {e}")
-            # graceful degrade: add mocks so UI stays alive
-            for sym in stock_symbols:
-                quotes[sym] = _mock_quote(sym)
+    # Stocks: served from the shared cache, only missing symbols go upstream
+    async def stock_quotes() -> Dict[str, Any]:
+        if not stock_symbols:
+            return {}
+        quotes = await _cached_upstream(
+            quote_cache, "stock_quotes", stock_symbols, lambda batch: _fetch_stock_quotes(stock_data_client, batch)
+        )
+        # graceful degrade: add mocks for symbols we have never seen so UI stays alive
+        return {sym: quotes.get(sym) or _mock_quote(sym) for sym in stock_symbols}
 
     # Crypto
-    if crypto_symbols:
-        try:
-            req = CryptoLatestQuoteRequest(symbol_or_symbols=crypto_symbols)
-            data = crypto_data_client.get_crypto_latest_quote(req)
-            for sym, q in (data or {}).items():
-                quotes[sym] = {
-                    "bid_price": float(q.bid_price) if getattr(q, "bid_price", None) else 0.0,
-                    "ask_price": float(q.ask_price) if getattr(q, "ask_price", None) else 0.0,
-                    "bid_size": float(getattr(q, "bid_size", 0) or 0.0),
-                    "ask_size": float(getattr(q, "ask_size", 0) or 0.0),
-                    "timestamp": q.timestamp.isoformat() if getattr(q, "timestamp", None) else tz_now_iso(),
-                    "source": "alpaca:crypto",
-                }
-        except Exception as e:
-            logger.error(f"Error fetching crypto quotes: {e}")
-            for sym in crypto_symbols:
-                quotes[sym] = _mock_quote(sym)
+    async def crypto_quotes() -> Dict[str, Any]:
+        if not crypto_symbols:
+            return {}
+        quotes = await _cached_upstream(
+            quote_cache, "crypto_quotes", crypto_symbols, lambda batch: _fetch_crypto_quotes(crypto_data_client, batch)
+        )
+        return {sym: quotes.get(sym) or _mock_quote(sym) for sym in crypto_symbols}
+
+    stock_result, crypto_result = await asyncio.gather(stock_quotes(), crypto_quotes())
+    quotes: Dict[str, Any] = {**stock_result, **crypto_result}
 
     # Return only the symbols user asked for (after normalization for crypto)
     out: Dict[str, Any] = {}
     for original in symbols:
-        if is_stock_symbol(original):
-            out[original.upper()] = quotes.get(original.upper(), _mock_quote(original))
-        else:
-            norm = normalize_crypto_symbol(original)
-            out[original.upper()] = quotes.get(norm or original.upper(), _mock_quote(original))
+        out[original.upper()] = quotes.get(resolve_symbol(original)[1], _mock_quote(original))
     return {"quotes": out}
 
 
+async def _fetch_stock_snapshots(client: StockHistoricalDataClient, symbols: List[str]) -> Dict[str, Any]:
+    req = StockSnapshotRequest(symbol_or_symbols=symbols, feed=DataFeed.IEX)
+    resp = await run_blocking(client.get_stock_snapshot, req)
+    snapshots: Dict[str, Any] = {}
+    for sym, snap in (resp or {}).items():
+        latest_quote = getattr(snap, "latest_quote", None)
+        latest_trade = getattr(snap, "latest_trade", None)
+        daily_bar = getattr(snap, "daily_bar", None)
+        snapshots[sym] = {
+            "latest_quote": {
+                "bid_price": float(getattr(latest_quote, "bid_price", 0) or 0),
+                "ask_price": float(getattr(latest_quote, "ask_price", 0) or 0),
+                "timestamp": latest_quote.timestamp.isoformat() if getattr(latest_quote, "timestamp", None) else None,
+            } if latest_quote else None,
+            "latest_trade": {
+                "price": float(getattr(latest_trade, "price", 0) or 0),
+                "size": int(getattr(latest_trade, "size", 0) or 0),
+                "timestamp": latest_trade.timestamp.isoformat() if getattr(latest_trade, "timestamp", None) else None,
+            } if latest_trade else None,
+            "daily_bar": {
+                "open": float(getattr(daily_bar, "open", 0) or 0),
+                "high": float(getattr(daily_bar, "high", 0) or 0),
+                "low": float(getattr(daily_bar, "low", 0) or 0),
+                "close": float(getattr(daily_bar, "close", 0) or 0),
+                "volume": int(getattr(daily_bar, "volume", 0) or 0),
+                "timestamp": daily_bar.timestamp.isoformat() if getattr(daily_bar, "timestamp", None) else None,
+            } if daily_bar else None,
+        }
+    return snapshots
+
 async def get_market_snapshot(symbols: List[str], credentials: HTTPAuthorizationCredentials) -> Dict[str, Any]:
     stock_data_client: StockHistoricalDataClient = get_alpaca_stock_data_client()
 
-    stock_syms = [s for s in symbols if is_stock_symbol(s)]
+    stock_syms, _ = split_symbols(symbols)
     if not stock_syms:
         return {"snapshots": {}}
 
-    snapshots: Dict[str, Any] = {}
-    try:
-        req = StockSnapshotRequest(symbol_or_symbols=stock_syms, feed=DataFeed.IEX)
-        resp = stock_data_client.get_stock_snapshot(req)
-        for sym, snap in (resp or {}).items():
-            latest_quote = getattr(snap, "latest_quote", None)
-            latest_trade = getattr(snap, "latest_trade", None)
-            daily_bar = getattr(snap, "daily_bar", None)
-            snapshots[sym] = {
-                "latest_quote": {
-                    "bid_price": float(getattr(latest_quote, "bid_price", 0) or 0),
-                    "ask_price": float(getattr(latest_quote, "ask_price", 0) or 0),
-                    "timestamp": latest_quote.timestamp.isoformat() if getattr(latest_quote, "timestamp", None) else None,
-                } if latest_quote else None,
-                "latest_trade": {
-                    "price": float(getattr(latest_trade, "price", 0) or 0),
-                    "size": int(getattr(latest_trade, "size", 0) or 0),
-                    "timestamp": latest_trade.timestamp.isoformat() if getattr(latest_trade, "timestamp", None) else None,
-                } if latest_trade else None,
-                "daily_bar": {
-                    "open": float(getattr(daily_bar, "open", 0) or 0),
-                    "high": float(getattr(daily_bar, "high", 0) or 0),
-                    "low": float(getattr(daily_bar, "low", 0) or 0),
-                    "close": float(getattr(daily_bar, "close", 0) or 0),
-                    "volume": int(getattr(daily_bar, "volume", 0) or 0),
-                    "timestamp": daily_bar.timestamp.isoformat() if getattr(daily_bar, "timestamp", None) else None,
-                } if daily_bar else None,
-            }
-    except Exception as e:
-        logger.error(f"Error fetching market snapshots: {e}")
-        for sym in stock_syms:
+    snapshots = await _cached_upstream(
+        snapshot_cache, "stock_snapshots", stock_syms, lambda batch: _fetch_stock_snapshots(stock_data_client, batch)
+    )
+    for sym in stock_syms:
+        if sym not in snapshots:
             snapshots[sym] = {
                 "latest_quote": _mock_quote(sym),
                 "latest_trade": {"price": 0.0, "size": 0, "timestamp": None, "source": "unavailable"},
@@ -192,29 +288,63 @@ async def get_market_snapshot(symbols: List[str], credentials: HTTPAuthorization
     return {"snapshots": snapshots}
 
 
-async def get_live_prices_data(symbols: List[str], credentials: HTTPAuthorizationCredentials) -> Dict[str, Any]:
-    try:
-        quotes_response = await get_real_time_quotes(symbols, credentials)
-    except Exception:
-        logger.exception("quotes fetch failed")
-        quotes_response = {"quotes": {}}
+async def _live_inputs(symbols: List[str], credentials: HTTPAuthorizationCredentials) -> Tuple[Dict, Dict, Dict, Dict]:
+    """Quotes and snapshots for a live-prices request as (resolved, keys, quotes, snapshots)."""
+    # Answer from the streaming last-quote table where we can; REST only for the rest
+    resolved = {s.upper(): resolve_symbol(s) for s in symbols}
+    keys = {s: canonical for s, (_, canonical) in resolved.items()}
+    market_stream.watch(
+        [k for k, (c, _) in zip(keys.values(), resolved.values()) if c == STOCK],
+        [k for k, (c, _) in zip(keys.values(), resolved.values()) if c == CRYPTO],
+    )
+    streamed_quotes: Dict[str, Any] = {}
+    streamed_snaps: Dict[str, Any] = {}
+    for sym_u, key in keys.items():
+        q = market_stream.quote(key)
+        if q:
+            streamed_quotes[key] = q
+        if resolved[sym_u][0] == STOCK:
+            daily_bar = market_stream.daily_bar(key)
+            if daily_bar:
+                streamed_snaps[key] = {"daily_bar": daily_bar}
+
+    rest_quote_symbols = [s for s, k in keys.items() if k not in streamed_quotes]
+    rest_snapshot_symbols = [k for s, k in keys.items() if resolved[s][0] == STOCK and k not in streamed_snaps]
+
+    async def rest_quotes() -> Dict[str, Any]:
+        if not rest_quote_symbols:
+            return {"quotes": {}}
+        try:
+            return await get_real_time_quotes(rest_quote_symbols, credentials)
+        except Exception:
+            logger.exception("quotes fetch failed")
+            return {"quotes": {}}
+
+    async def rest_snapshots() -> Dict[str, Any]:
+        if not rest_snapshot_symbols:
+            return {"snapshots": {}}
+        try:
+            return await get_market_snapshot(rest_snapshot_symbols, credentials)
+        except Exception:
+            logger.exception("snapshots fetch failed")
+            return {"snapshots": {}}
 
-    try:
-        snapshots_response = await get_market_snapshot(symbols, credentials)
-    except Exception:
-        logger.exception("snapshots fetch failed")
-        snapshots_response = {"snapshots": {}}
+    quotes_response, snapshots_response = await asyncio.gather(rest_quotes(), rest_snapshots())
+    quotes_response["quotes"].update(streamed_quotes)
+    snapshots_response["snapshots"].update(streamed_snaps)
+
+    return resolved, keys, quotes_response.get("quotes", {}), snapshots_response.get("snapshots", {})
 
-    combined: Dict[str, Any] = {}
-    quotes = quotes_response.get("quotes", {})
-    snaps = snapshots_response.get("snapshots", {})
 
+async def get_live_prices_data(symbols: List[str], credentials: HTTPAuthorizationCredentials) -> Dict[str, Any]:
+    resolved, keys, quotes, snaps = await _live_inputs(symbols, credentials)
+
+    combined: Dict[str, Any] = {}
     for original in symbols:
         sym_u = original.upper()
-        # match stock snapshot by stock symbol only
-        snap = snaps.get(sym_u)
-        quote_key = sym_u if is_stock_symbol(sym_u) else (normalize_crypto_symbol(sym_u) or sym_u)
-        q = quotes.get(sym_u) or quotes.get(quote_key) or _mock_quote(sym_u)
+        # only stock symbols have snapshots
+        snap = snaps.get(keys[sym_u]) if resolved[sym_u][0] == STOCK else None
+        q = quotes.get(sym_u) or quotes.get(keys[sym_u]) or _mock_quote(sym_u)
 
         bid = q.get("bid_price", 0) or 0
         ask = q.get("ask_price", 0) or 0
@@ -237,97 +367,351 @@ async def get_live_prices_data(symbols: List[str], credentials: HTTPAuthorizatio
             "open": open_px,
             "timestamp": q.get("timestamp") or ((daily_bar or {}).get("timestamp") if daily_bar else None),
         }
+        if q.get("stale"):
+            combined[sym_u]["stale"] = True
+            combined[sym_u]["age_seconds"] = q["age_seconds"]
 
     return combined
 
 
-async def get_bars_data(
+async def get_live_prices_json(symbols: List[str], credentials: HTTPAuthorizationCredentials) -> bytes:
+    """get_live_prices_data for large watchlists, combined in one vectorized pass straight to JSON."""
+    resolved, keys, quotes, snaps = await _live_inputs(symbols, credentials)
+    stock_keys = {sym_u for sym_u, (asset_class, _) in resolved.items() if asset_class == STOCK}
+    return encode_live_prices(list(keys), keys, stock_keys, quotes, snaps)
+
+
+# --------- bars ---------
+# timeframes Alpaca serves; anything else (3Min, 4Hour, ...) can only be resampled from 1Min bars.
+# Native ones are resampled too when the store already holds the minutes, and fetched otherwise.
+NATIVE_TIMEFRAMES = {"1Min", "5Min", "15Min", "1Hour", "1Day"}
+BAR_STORE_ENABLED = os.getenv("BAR_STORE_ENABLED", "true").lower() not in ("0", "false", "no")
+# bars younger than this may still be revised upstream, so they are never persisted
+BAR_STORE_SETTLE_SECONDS = int(os.getenv("BAR_STORE_SETTLE_SECONDS", "900"))
+
+def _alpaca_timeframe(timeframe: str) -> TimeFrame:
+    amount, unit = parse_timeframe(timeframe)
+    return TimeFrame(amount, TimeFrameUnit(unit))
+
+def _ts_to_dt(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+def _barset_items(data) -> Any:
+    return (getattr(data, "data", None) or data or {}).items()
+
+def _bars_to_columns(series) -> Columns:
+    series = series or []
+    return {
+        "timestamp": np.array([int(b.timestamp.timestamp()) for b in series], dtype=np.int64),
+        "open": np.array([float(b.open) for b in series], dtype=np.float64),
+        "high": np.array([float(b.high) for b in series], dtype=np.float64),
+        "low": np.array([float(b.low) for b in series], dtype=np.float64),
+        "close": np.array([float(b.close) for b in series], dtype=np.float64),
+        "volume": np.array([float(getattr(b, "volume", 0) or 0) for b in series], dtype=np.float64),
+    }
+
+def _columns_to_bars(cols: Columns, source: str, int_volume: bool) -> List[Dict[str, Any]]:
+    o, h, l, c = (cols[k].tolist() for k in ("open", "high", "low", "close"))
+    v = cols["volume"].astype(np.int64).tolist() if int_volume else cols["volume"].tolist()
+    return [
+        {
+            "timestamp": _ts_to_dt(ts).isoformat(),
+            "open": o[i],
+            "high": h[i],
+            "low": l[i],
+            "close": c[i],
+            "volume": v[i],
+            "source": source,
+        }
+        for i, ts in enumerate(cols["timestamp"].tolist())
+    ]
+
+async def _fetch_bar_columns(
+    client,
+    crypto: bool,
+    symbols: List[str],
+    timeframe: str,
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    limit: Optional[int],
+) -> Dict[str, Columns]:
+    tf = _alpaca_timeframe(timeframe)
+    # bar requests carry their own ranges, so they are rate limited but not batched
+    await upstream_limiter.acquire()
+    if crypto:
+        req = CryptoBarsRequest(symbol_or_symbols=symbols, timeframe=tf, start=start_time, end=end_time, limit=limit)
+        data = await run_blocking(client.get_crypto_bars, req)
+    else:
+        req = StockBarsRequest(
+            symbol_or_symbols=symbols,
+            timeframe=tf,
+            start=start_time,
+            end=end_time,
+            limit=limit,
+            feed=DataFeed.IEX,
+        )
+        data = await run_blocking(client.get_stock_bars, req)
+    return {sym: _bars_to_columns(series) for sym, series in _barset_items(data)}
+
+def _calendar_span(bars: int, period: int) -> int:
+    """Seconds of calendar time that hold `bars` bars of `period` seconds.
+
+    Equities trade ~6.5h on weekdays, so the span needs headroom beyond bars * period.
+    """
+    return int(bars * period * (1.6 if period >= 86400 else 6.0))
+
+def _store_bounds(timeframe: str, start: int, end_time: Optional[datetime]) -> tuple:
+    """(end, stored_end) in epoch seconds; bars in [start, stored_end) are settled enough to persist."""
+    now = int(datetime.now(timezone.utc).timestamp())
+    # upstream treats end as inclusive
+    end = int(end_time.timestamp()) + 1 if end_time else now
+    settled = now - BAR_STORE_SETTLE_SECONDS
+    settled -= settled % timeframe_seconds(timeframe)
+    return end, max(start, min(end, settled))
+
+async def _resampled_bar_columns(
+    client,
+    crypto: bool,
+    symbols: List[str],
+    timeframe: str,
+    start_time: datetime,
+    end_time: Optional[datetime],
+    limit: Optional[int],
+) -> Dict[str, Columns]:
+    """Build a coarser timeframe locally from (stored) 1Min bars."""
+    period = timeframe_seconds(timeframe)
+    # widen the start to its bucket boundary so the first bar is complete
+    aligned = int(bucket_starts(np.array([int(start_time.timestamp())]), period, crypto)[0])
+    if limit:
+        # only the minutes the first `limit` buckets can span
+        window_end = _ts_to_dt(aligned + _calendar_span(limit, period) - 1)
+        if window_end < (end_time or datetime.now(timezone.utc)):
+            end_time = window_end
+    minute = await _load_bar_columns(client, crypto, symbols, "1Min", _ts_to_dt(aligned), end_time, None)
+    result = {sym: resample_bars(cols, period, crypto) for sym, cols in minute.items()}
+    if limit:
+        result = {sym: {k: v[:limit] for k, v in cols.items()} for sym, cols in result.items()}
+    return result
+
+async def _stored_native_bar_columns(
+    client,
+    crypto: bool,
+    symbols: List[str],
+    timeframe: str,
+    start_time: datetime,
+    end_time: Optional[datetime],
+    limit: Optional[int],
+) -> Optional[Dict[str, Columns]]:
+    """A native timeframe resampled from stored 1Min bars, or None if the store lacks any of them.
+
+    Only whole, settled buckets are derived locally. The bucket still forming and
+    anything after it (today's partial session for 1Day) are Alpaca's own bars.
+    Like upstream, bars are those starting in [start_time, end_time].
+    """
+    period = timeframe_seconds(timeframe)
+    start = int(start_time.timestamp())
+    end, settled = _store_bounds("1Min", start, end_time)
+    if limit:
+        settled = min(settled, start + _calendar_span(limit, period))
+    # buckets starting before `boundary` are complete and settled; the rest come from upstream
+    boundary = int(bucket_starts(np.array([settled]), period, crypto)[0])
+    if boundary <= start:
+        return None
+
+    try:
+        for sym in symbols:
+            if await run_blocking(bar_store.missing_ranges, sym, "1Min", start, boundary):
+                return None
+    except OSError:
+        return None
+
+    minute = await _load_bar_columns(client, crypto, symbols, "1Min", start_time, _ts_to_dt(boundary - 1), None)
+    result = {}
+    for sym, cols in minute.items():
+        bars = resample_bars(cols, period, crypto)
+        # the bucket holding start_time began before it, so upstream would not return it
+        keep = bars["timestamp"] >= start
+        result[sym] = {k: v[keep] for k, v in bars.items()}
+
+    if end > boundary and not (limit and all(len(c["timestamp"]) >= limit for c in result.values())):
+        tail = await _load_bar_columns(client, crypto, symbols, timeframe, _ts_to_dt(boundary), end_time, limit)
+        result = {sym: concat_columns([cols, tail.get(sym, empty_columns())]) for sym, cols in result.items()}
+    if limit:
+        result = {sym: {k: v[:limit] for k, v in cols.items()} for sym, cols in result.items()}
+    return result
+
+async def _bar_columns(
+    client,
+    crypto: bool,
+    symbols: List[str],
+    timeframe: str,
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    limit: Optional[int],
+) -> Dict[str, Columns]:
+    """Bars for any timeframe, resampled from stored 1Min bars wherever possible.
+
+    Non-native timeframes are always resampled. Native ones are resampled when the
+    store covers the window's minutes, and otherwise come from Alpaca (through the store).
+    """
+    if BAR_STORE_ENABLED and start_time is not None and timeframe != "1Min":
+        if timeframe not in NATIVE_TIMEFRAMES:
+            return await _resampled_bar_columns(client, crypto, symbols, timeframe, start_time, end_time, limit)
+        local = await _stored_native_bar_columns(client, crypto, symbols, timeframe, start_time, end_time, limit)
+        if local is not None:
+            return local
+    return await _load_bar_columns(client, crypto, symbols, timeframe, start_time, end_time, limit)
+
+async def _load_bar_columns(
+    client,
+    crypto: bool,
+    symbols: List[str],
+    timeframe: str,
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    limit: Optional[int],
+) -> Dict[str, Columns]:
+    """Serve settled bars from the local bar store, fetching only the ranges it lacks."""
+    if not BAR_STORE_ENABLED or start_time is None:
+        return await _fetch_bar_columns(client, crypto, symbols, timeframe, start_time, end_time, limit)
+
+    start = int(start_time.timestamp())
+    end, stored_end = _store_bounds(timeframe, start, end_time)
+    if limit:
+        # never fill further than `limit` bars can reach; the limited tail call below covers any shortfall
+        stored_end = min(stored_end, start + _calendar_span(limit, timeframe_seconds(timeframe)))
+
+    try:
+        missing = {sym: await run_blocking(bar_store.missing_ranges, sym, timeframe, start, stored_end) for sym in symbols}
+    except OSError as e:
+        logger.error(f"Bar store unavailable, fetching upstream: {e}")
+        return await _fetch_bar_columns(client, crypto, symbols, timeframe, start_time, end_time, limit)
+
+    # symbols missing the same ranges share one upstream request per range
+    groups: Dict[tuple, List[str]] = {}
+    for sym, gaps in missing.items():
+        if gaps:
+            groups.setdefault(tuple(gaps), []).append(sym)
+    fills = [(syms, gap) for gaps, syms in groups.items() for gap in gaps]
+    # upstream errors propagate, so the caller's breaker sees them
+    fetched = await asyncio.gather(*(
+        _fetch_bar_columns(client, crypto, syms, timeframe, _ts_to_dt(gap[0]), _ts_to_dt(gap[1] - 1), None)
+        for syms, gap in fills
+    ))
+
+    try:
+        for (syms, gap), cols in zip(fills, fetched):
+            for sym in syms:
+                await run_blocking(bar_store.write, sym, timeframe, cols.get(sym, empty_columns()), gap)
+        result = {sym: await run_blocking(bar_store.read, sym, timeframe, start, stored_end) for sym in symbols}
+    except OSError as e:
+        logger.error(f"Bar store unavailable, fetching upstream: {e}")
+        return await _fetch_bar_columns(client, crypto, symbols, timeframe, start_time, end_time, limit)
+
+    # the unsettled tail always comes from upstream
+    if end > stored_end and not (limit and all(len(c["timestamp"]) >= limit for c in result.values())):
+        tail = await _fetch_bar_columns(client, crypto, symbols, timeframe, _ts_to_dt(stored_end), end_time, limit)
+        result = {sym: concat_columns([cols, tail.get(sym, empty_columns())]) for sym, cols in result.items()}
+
+    if limit:
+        result = {sym: {k: v[:limit] for k, v in cols.items()} for sym, cols in result.items()}
+    return result
+
+# last successful series per request shape, served stale while the bars breaker is open
+bar_series_cache = QuoteCache(ttl_seconds=0, max_entries=int(os.getenv("BAR_LKG_MAX_ENTRIES", "2000")))
+
+def _bar_lkg_key(
+    symbol: str, timeframe: str, start_time: Optional[datetime], end_time: Optional[datetime], limit: Optional[int]
+) -> str:
+    bounds = [int(t.timestamp()) if t else "" for t in (start_time, end_time)]
+    return f"{symbol}|{timeframe}|{bounds[0]}|{bounds[1]}|{limit or ''}"
+
+def _mock_columns() -> Columns:
+    cols = empty_columns()
+    cols["timestamp"] = np.array([int(datetime.now(timezone.utc).timestamp())], dtype=np.int64)
+    for name in ("open", "high", "low", "close", "volume"):
+        cols[name] = np.zeros(1, dtype=np.float64)
+    return cols
+
+async def get_bar_series(
     symbols: List[str],
     timeframe: str,
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None,
     limit: Optional[int] = None,
-    credentials: HTTPAuthorizationCredentials = None,
-) -> Dict[str, Any]:
+) -> Dict[str, Dict[str, Any]]:
+    """Bars per symbol as {"columns": Columns, "source": str, "int_volume": bool}.
+
+    Series served from the last-known-good cache during an upstream outage also
+    carry "age_seconds".
+    """
     stock_data_client: StockHistoricalDataClient = get_alpaca_stock_data_client()
     crypto_data_client: CryptoHistoricalDataClient = get_alpaca_crypto_data_client()
 
-    # timeframe mapping
-    tf = {
-        "1Min": TimeFrame.Minute,
-        "5Min": TimeFrame(5, "Min"),
-        "15Min": TimeFrame(15, "Min"),
-        "1Hour": TimeFrame.Hour,
-        "1Day": TimeFrame.Day,
-    }.get(timeframe, TimeFrame.Day)
-
-    stock_syms = [s for s in symbols if is_stock_symbol(s)]
-    crypto_syms = [normalize_crypto_symbol(s) for s in symbols]
-    crypto_syms = [s for s in crypto_syms if s]
-
-    bars: Dict[str, List[Dict[str, Any]]] = {}
+    # any Alpaca-expressible timeframe (e.g. 3Min, 4Hour); unknown shapes fall back to daily bars
+    timeframe = timeframe if parse_timeframe(timeframe) else "1Day"
 
-    # Stocks
-    if stock_syms:
-        try:
-            req = StockBarsRequest(
-                symbol_or_symbols=stock_syms,
-                timeframe=tf,
-                start=start_time,
-                end=end_time,
-                limit=limit,
-                feed=DataFeed.IEX,
-            )
-            data = stock_data_client.get_stock_bars(req)
-            for sym, series in (data or {}).items():
-                bars[sym] = [
-                    {
-                        "timestamp": b.timestamp.isoformat(),
-                        "open": float(b.open),
-                        "high": float(b.high),
-                        "low": float(b.low),
-                        "close": float(b.close),
-                        "volume": int(getattr(b, "volume", 0) or 0),
-                        "source": "alpaca:iex",
-                    }
-                    for b in series or []
-                ]
-        except Exception as e:
-            logger.error(f"Error fetching stock bars: {e}")
-            for sym in stock_syms:
-                bars[sym] = [_mock_bar()]
+    stock_syms, crypto_syms = split_symbols(symbols)
 
-    # Crypto
-    if crypto_syms:
+    async def load(client, crypto: bool, syms: List[str], source: str, int_volume: bool) -> Dict[str, Dict[str, Any]]:
+        if not syms:
+            return {}
+        endpoint = "crypto_bars" if crypto else "stock_bars"
+        lkg_keys = {sym: _bar_lkg_key(sym, timeframe, start_time, end_time, limit) for sym in syms}
         try:
-            req = CryptoBarsRequest(
-                symbol_or_symbols=crypto_syms,
-                timeframe=tf,
-                start=start_time,
-                end=end_time,
-                limit=limit,
+            cols = await get_breaker(endpoint).call(
+                _bar_columns, client, crypto, syms, timeframe, start_time, end_time, limit
             )
-            data = crypto_data_client.get_crypto_bars(req)
-            for sym, series in (data or {}).items():
-                bars[sym] = [
-                    {
-                        "timestamp": b.timestamp.isoformat(),
-                        "open": float(b.open),
-                        "high": float(b.high),
-                        "low": float(b.low),
-                        "close": float(b.close),
-                        "volume": float(getattr(b, "volume", 0) or 0.0),
-                        "source": "alpaca:crypto",
-                    }
-                    for b in series or []
-                ]
         except Exception as e:
-            logger.error(f"Error fetching crypto bars: {e}")
-            for sym in crypto_syms:
-                bars[sym] = [_mock_bar()]
+            if not isinstance(e, CircuitOpenError):
+                logger.error(f"Error fetching {endpoint}: {e}")
+            last_known = bar_series_cache.last_known(lkg_keys.values())
+            out: Dict[str, Dict[str, Any]] = {}
+            for sym, key in lkg_keys.items():
+                if key in last_known:
+                    age, series = last_known[key]
+                    out[sym] = dict(series, age_seconds=round(age, 1))
+                else:
+                    out[sym] = {"columns": _mock_columns(), "source": "unavailable", "int_volume": True}
+            return out
+        result = {sym: {"columns": c, "source": source, "int_volume": int_volume} for sym, c in cols.items()}
+        for sym, series in result.items():
+            bar_series_cache.set(lkg_keys[sym], series)
+        return result
+
+    stock_result, crypto_result = await asyncio.gather(
+        load(stock_data_client, False, stock_syms, "alpaca:iex", True),
+        load(crypto_data_client, True, crypto_syms, "alpaca:crypto", False),
+    )
+    return {**stock_result, **crypto_result}
 
+async def get_bars_data(
+    symbols: List[str],
+    timeframe: str,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    credentials: HTTPAuthorizationCredentials = None,
+) -> Dict[str, Any]:
+    series = await get_bar_series(symbols, timeframe, start_time, end_time, limit)
+    bars: Dict[str, List[Dict[str, Any]]] = {}
+    for sym, s in series.items():
+        bars[sym] = _columns_to_bars(s["columns"], s["source"], s["int_volume"])
+        if "age_seconds" in s:
+            bars[sym] = [_stale(bar, s["age_seconds"]) for bar in bars[sym]]
     return {"bars": bars}
 
+def _ndjson_bars_response(
+    symbols: List[str],
+    timeframe: str,
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+) -> StreamingResponse:
+    stock_syms, crypto_syms = split_symbols(symbols)
+    timeframe = timeframe if parse_timeframe(timeframe) else "1Day"
+    stream = stream_bars_ndjson(alpaca_data_headers(), stock_syms, crypto_syms, timeframe, start_time, end_time)
+    return StreamingResponse(stream, media_type="application/x-ndjson")
+
 # --------- routes ---------
 @router.get("/symbol/{symbol}")
 async def get_market_data(
@@ -351,10 +735,11 @@ async def quotes(
 @router.get("/bars")
 async def bars(
     symbols: str = Query(..., description="Comma-separated list of symbols"),
-    timeframe: str = Query("1Day", description="1Min, 5Min, 15Min, 1Hour, 1Day"),
+    timeframe: str = Query("1Day", description="1Min, 5Min, 15Min, 1Hour, 1Day or any <n>Min/<n>Hour"),
     start: Optional[str] = Query(None, description="Start ISO (YYYY-MM-DD or RFC3339)"),
     end: Optional[str] = Query(None, description="End ISO (YYYY-MM-DD or RFC3339)"),
     limit: Optional[int] = Query(100, description="Max bars"),
+    format: str = Query("json", description="json, columnar, msgpack, arrow or ndjson (streams the full range, ignoring limit)"),
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user=Depends(get_current_user),
 ):
@@ -374,8 +759,54 @@ async def bars(
     start_dt = parse(start)
     end_dt = parse(end)
 
+    if format == "ndjson":
+        return _ndjson_bars_response(symbol_list, timeframe, start_dt, end_dt)
+    if format != "json":
+        if format not in BAR_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported format '{format}'")
+        return encode_bars(await get_bar_series(symbol_list, timeframe, start_dt, end_dt, limit), format)
     return await get_bars_data(symbol_list, timeframe, start_dt, end_dt, limit, credentials)
 
+@router.get("/indicators")
+async def indicators(
+    symbols: str = Query(..., description="Comma-separated list of symbols"),
+    indicators: str = Query("rsi:14", description="Comma-separated specs: sma:20, ema:20, rsi:14, bbands:20:2, atr:14"),
+    timeframe: str = Query("1Day", description="1Min, 5Min, 15Min, 1Hour, 1Day or any <n>Min/<n>Hour"),
+    limit: int = Query(100, ge=1, le=INDICATOR_MAX_POINTS, description="Points per indicator"),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user=Depends(get_current_user),
+):
+    """Indicator series over locally held bars, updated incrementally per (symbol, timeframe, indicator)."""
+    symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+    try:
+        specs = [parse_indicator(spec) for spec in indicators.split(",") if spec.strip()]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not specs:
+        raise HTTPException(status_code=400, detail="No indicators requested")
+
+    timeframe = timeframe if parse_timeframe(timeframe) else "1Day"
+    period = timeframe_seconds(timeframe)
+    needed = limit + max(warmup_bars(spec) for spec in specs)
+    lookback = _calendar_span(needed, period)
+    now = datetime.now(timezone.utc)
+    series = await get_bar_series(symbol_list, timeframe, now - timedelta(seconds=lookback))
+
+    result: Dict[str, Any] = {}
+    for sym in symbol_list:
+        key = resolve_symbol(sym)[1]
+        s = series.get(key)
+        if not s or s["source"] == "unavailable":
+            result[sym] = {}
+            continue
+        cols = s["columns"]
+        # a bar is final once its period has fully elapsed
+        closed = int(np.searchsorted(cols["timestamp"], now.timestamp() - period, side="right"))
+        result[sym] = {
+            indicator_key(spec): indicator_engine.series(key, timeframe, spec, cols, closed, limit) for spec in specs
+        }
+    return {"timeframe": timeframe, "indicators": result}
+
 @router.get("/snapshot")
 async def snapshot(
     symbols: str = Query(..., description="Comma-separated list of symbols"),
@@ -392,15 +823,109 @@ async def live_prices(
     # current_user=Depends(get_current_user),  # optional for public ping
 ):
     symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+    if len(symbol_list) >= LIVE_PRICES_VECTORIZE_MIN_SYMBOLS:
+        return Response(await get_live_prices_json(symbol_list, credentials), media_type="application/json")
     return await get_live_prices_data(symbol_list, credentials)
 
+@router.websocket("/stream")
+async def stream_prices(
+    websocket: WebSocket,
+    token: str = Query(..., description="Supabase access token"),
+    supabase: Client = Depends(get_supabase_client),
+):
+    """Push live prices for a subscribed symbol set.
+
+    Clients send {"action": "subscribe" | "unsubscribe", "symbols": [...]}. Newly
+    subscribed symbols get a full "snapshot" entry; after that only "delta" entries
+    (price, change, change_percent) for symbols that moved are sent, batched into
+    at most one message per push interval. The socket is closed (1008) when the
+    access token expires; clients reconnect with a fresh one.
+    """
+    try:
+        await get_user_from_token(token, supabase)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    expires_at = token_expiry(token)
+    await websocket.accept()
+
+    subscribed: Dict[str, None] = {}
+    sent: Dict[str, Dict[str, Any]] = {}
+
+    async def receive() -> None:
+        while True:
+            try:
+                msg = await websocket.receive_json()
+            except ValueError:
+                await websocket.send_json({"type": "error", "detail": "Messages must be JSON"})
+                continue
+            action = msg.get("action") if isinstance(msg, dict) else None
+            if action not in ("subscribe", "unsubscribe"):
+                await websocket.send_json({"type": "error", "detail": "Unknown action"})
+                continue
+            symbols = msg.get("symbols") or []
+            if not isinstance(symbols, list):
+                await websocket.send_json({"type": "error", "detail": "symbols must be a list"})
+                continue
+            syms = [str(s).strip().upper() for s in symbols if str(s).strip()]
+            if action == "subscribe":
+                for sym in syms:
+                    if len(subscribed) >= STREAM_MAX_SYMBOLS:
+                        break
+                    subscribed[sym] = None
+            else:
+                for sym in syms:
+                    subscribed.pop(sym, None)
+                    sent.pop(sym, None)
+
+    async def push() -> None:
+        while True:
+            if subscribed:
+                prices = await get_live_prices_data(list(subscribed), None)
+                snapshot: Dict[str, Any] = {}
+                delta: Dict[str, Any] = {}
+                for sym, data in prices.items():
+                    if sym not in subscribed:
+                        continue
+                    prev = sent.get(sym)
+                    if prev is None:
+                        snapshot[sym] = data
+                    else:
+                        changed = {f: data[f] for f in STREAM_DELTA_FIELDS if data[f] != prev[f]}
+                        if changed:
+                            delta[sym] = changed
+                    sent[sym] = data
+                if snapshot:
+                    await websocket.send_json({"type": "snapshot", "data": snapshot, "timestamp": tz_now_iso()})
+                if delta:
+                    await websocket.send_json({"type": "delta", "data": delta, "timestamp": tz_now_iso()})
+            await asyncio.sleep(STREAM_PUSH_INTERVAL)
+
+    async def expire() -> None:
+        await asyncio.sleep(max(expires_at - time.time(), 0))
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Token expired")
+
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(push())]
+    if expires_at is not None:
+        tasks.append(asyncio.create_task(expire()))
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            exc = task.exception()
+            if exc and not isinstance(exc, WebSocketDisconnect):
+                logger.error(f"Price stream closed with error: {exc}")
+    finally:
+        for task in tasks:
+            task.cancel()
+
 @router.get("/{symbol}/historical")
 async def historical(
     symbol: str,
-    timeframe: str = Query("1Day", description="1Min, 5Min, 15Min, 1Hour, 1Day"),
+    timeframe: str = Query("1Day", description="1Min, 5Min, 15Min, 1Hour, 1Day or any <n>Min/<n>Hour"),
     start: Optional[str] = Query(None, description="Start ISO (YYYY-MM-DD or RFC3339)"),
     end: Optional[str] = Query(None, description="End ISO (YYYY-MM-DD or RFC3339)"),
     limit: Optional[int] = Query(100, description="Max bars"),
+    format: str = Query("json", description="json, columnar, msgpack, arrow or ndjson (streams the full range, ignoring limit)"),
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user=Depends(get_current_user),
 ):
@@ -417,7 +942,14 @@ async def historical(
 
     start_dt = parse(start)
     end_dt = parse(end)
+    # bars are keyed by the canonical symbol (e.g. BTC/USD for BTC)
+    sym_key = resolve_symbol(symbol)[1]
+    if format == "ndjson":
+        return _ndjson_bars_response([symbol.upper()], timeframe, start_dt, end_dt)
+    if format != "json":
+        if format not in BAR_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported format '{format}'")
+        series = await get_bar_series([symbol.upper()], timeframe, start_dt, end_dt, limit)
+        return encode_bars(series, format, symbol=sym_key)
     data = await get_bars_data([symbol.upper()], timeframe, start_dt, end_dt, limit, credentials)
-    # prefer normalized crypto key if needed
-    sym_key = symbol.upper() if is_stock_symbol(symbol) else (normalize_crypto_symbol(symbol) or symbol.upper())
     return data.get("bars", {}).get(sym_key, [])
@@ -2,13 +2,6 @@ from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import HTTPAuthorizationCredentials
 from typing import Dict, Any
 import logging
-from plaid.api import plaid_api
-from plaid.model.link_token_create_request import LinkTokenCreateRequest
-from plaid.model.link_token_create_request_user import LinkTokenCreateRequestUser
-from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
-from plaid.model.country_code import CountryCode
-from plaid.model.products import Products
-from plaid.exceptions import ApiException
 from supabase import Client
 from dependencies import (
     get_current_user,
@@ -25,9 +18,16 @@ async def create_link_token(
     request_data: Dict[str, Any],
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user = Depends(get_current_user),
-    plaid_client: plaid_api.PlaidApi = Depends(get_plaid_client)
+    plaid_client = Depends(get_plaid_client)
 ):
     """Create a Plaid Link token"""
+    # the Plaid SDK is loaded on first use; get_plaid_client has already imported it
+    from plaid.exceptions import ApiException
+    from plaid.model.country_code import CountryCode
+    from plaid.model.link_token_create_request import LinkTokenCreateRequest
+    from plaid.model.link_token_create_request_user import LinkTokenCreateRequestUser
+    from plaid.model.products import Products
+
     try:
         user_id = request_data.get("user_id")
         if not user_id:
@@ -65,10 +65,13 @@ async def exchange_public_token(
     request_data: Dict[str, Any],
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user = Depends(get_current_user),
-    plaid_client: plaid_api.PlaidApi = Depends(get_plaid_client),
+    plaid_client = Depends(get_plaid_client),
     supabase: Client = Depends(get_supabase_client)
 ):
     """Exchange a public token for an access token"""
+    from plaid.exceptions import ApiException
+    from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
+
     try:
         public_token = request_data.get("public_token")
         metadata = request_data.get("metadata", {})
@@ -5,12 +5,12 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone
 import logging
 
-from supabase import Client
 from dependencies import (
     get_current_user,
-    get_supabase_client,
+    get_strategy_repository,
     security,
 )
+from services.repositories import StrategyRepository
 from schemas import (
     TradingStrategyCreate,
     TradingStrategyUpdate,
@@ -35,7 +35,7 @@ async def create_strategy(
     strategy_data: TradingStrategyCreate,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user=Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client),
+    repo: StrategyRepository = Depends(get_strategy_repository),
 ):
     """Create a new trading strategy."""
     try:
@@ -60,14 +60,8 @@ async def create_strategy(
         strategy_dict['created_at'] = datetime.now(timezone.utc).isoformat()
         strategy_dict['updated_at'] = datetime.now(timezone.utc).isoformat()
 
-        resp = (
-            supabase.table("trading_strategies")
-            .insert(strategy_dict)
-            .select("*")
-            .single()
-            .execute()
-        )
-        return TradingStrategyResponse.model_validate(resp.data)
+        created = await repo.create(strategy_dict)
+        return TradingStrategyResponse.model_validate(created)
     except Exception as e:
         logger.error(f"Error creating strategy: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to create strategy: {str(e)}")
@@ -79,7 +73,7 @@ async def create_strategy(
 async def get_all_strategies(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user=Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client),
+    repo: StrategyRepository = Depends(get_strategy_repository),
     is_active: Optional[bool] = None,
     strategy_type: Optional[str] = None,
     risk_level: Optional[RiskLevel] = None,
@@ -88,19 +82,15 @@ async def get_all_strategies(
 ):
     """Retrieve all trading strategies for the current user, with optional filters."""
     try:
-        query = supabase.table("trading_strategies").select("*").eq("user_id", current_user.id)
-
-        if is_active is not None:
-            query = query.eq("is_active", is_active)
-        if strategy_type:
-            query = query.eq("type", strategy_type)
-        if risk_level:
-            query = query.eq("risk_level", risk_level.value)
-
-        query = query.order("updated_at", desc=True).limit(limit).offset(offset)
-        
-        resp = query.execute()
-        return [TradingStrategyResponse.model_validate(s) for s in resp.data]
+        strategies = await repo.list_for_user(
+            current_user.id,
+            is_active=is_active,
+            strategy_type=strategy_type,
+            risk_level=risk_level.value if risk_level else None,
+            limit=limit,
+            offset=offset,
+        )
+        return [TradingStrategyResponse.model_validate(s) for s in strategies]
     except Exception as e:
         logger.error(f"Error fetching strategies: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to fetch strategies: {str(e)}")
@@ -113,21 +103,14 @@ async def get_strategy_by_id(
     strategy_id: str,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user=Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client),
+    repo: StrategyRepository = Depends(get_strategy_repository),
 ):
     """Retrieve a single trading strategy by its ID."""
     try:
-        resp = (
-            supabase.table("trading_strategies")
-            .select("*")
-            .eq("id", strategy_id)
-            .eq("user_id", current_user.id)
-            .single()
-            .execute()
-        )
-        if not resp.data:
+        strategy = await repo.get(current_user.id, strategy_id)
+        if not strategy:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Strategy not found")
-        return TradingStrategyResponse.model_validate(resp.data)
+        return TradingStrategyResponse.model_validate(strategy)
     except HTTPException:
         raise # Re-raise HTTPExceptions
     except Exception as e:
@@ -143,7 +126,7 @@ async def update_strategy(
     strategy_data: TradingStrategyUpdate,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user=Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client),
+    repo: StrategyRepository = Depends(get_strategy_repository),
 ):
     """Update an existing trading strategy."""
     try:
@@ -165,18 +148,10 @@ async def update_strategy(
 
         update_dict['updated_at'] = datetime.now(timezone.utc).isoformat()
 
-        resp = (
-            supabase.table("trading_strategies")
-            .update(update_dict)
-            .eq("id", strategy_id)
-            .eq("user_id", current_user.id)
-            .select("*")
-            .single()
-            .execute()
-        )
-        if not resp.data:
+        updated = await repo.update(current_user.id, strategy_id, update_dict)
+        if not updated:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Strategy not found or not authorized")
-        return TradingStrategyResponse.model_validate(resp.data)
+        return TradingStrategyResponse.model_validate(updated)
     except HTTPException:
         raise # Re-raise HTTPExceptions
     except Exception as e:
@@ -191,20 +166,14 @@ async def delete_strategy(
     strategy_id: str,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user=Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client),
+    repo: StrategyRepository = Depends(get_strategy_repository),
 ):
     """Delete a trading strategy."""
     try:
-        resp = (
-            supabase.table("trading_strategies")
-            .delete()
-            .eq("id", strategy_id)
-            .eq("user_id", current_user.id)
-            .execute()
-        )
+        deleted = await repo.delete(current_user.id, strategy_id)
         # Supabase delete returns data=None if no rows matched, or data=[] if rows were deleted.
         # Check if any rows were actually deleted.
-        if resp.data is None or len(resp.data) == 0:
+        if deleted is None or len(deleted) == 0:
              # This check might be tricky with Supabase-py. A more robust check might involve
              # a select before delete, or checking the count of affected rows if the client supports it.
              # For now, assuming if no error, it's fine, or if data is empty, it wasn't found.
@@ -1,41 +1,106 @@
 # routers/trades.py
 from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import Response
 from fastapi.security import HTTPAuthorizationCredentials
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone
+import csv
+import io
 import logging
 
-from alpaca.trading.client import TradingClient
-from alpaca.trading.requests import GetOrdersRequest, MarketOrderRequest, LimitOrderRequest
+from alpaca.trading.requests import MarketOrderRequest, LimitOrderRequest
 from alpaca.trading.enums import (
     OrderSide,
-    QueryOrderStatus,
     TimeInForce,
-    OrderStatus,
 )
 from alpaca.common.exceptions import APIError as AlpacaAPIError
 
-from supabase import Client
 from dependencies import (
     get_current_user,
-    get_supabase_client,
+    get_brokerage_account_repository,
+    get_order_ledger_repository,
+    get_strategy_repository,
     get_alpaca_trading_client,
     security,
 )
+from services.order_ledger import OrderLedger, order_ledgers
+from services.pnl import COST_BASIS_METHODS, PnLBook, pnl_books
+from services.repositories import BrokerageAccountRepository, OrderLedgerRepository, StrategyRepository
+from services.trade_stream import trade_streams
+from services.trading_clients import trading_client_cache
 
 router = APIRouter(prefix="/api", tags=["trading"])
 logger = logging.getLogger(__name__)
 
 
+def _parse_date_range(start_date: Optional[str], end_date: Optional[str]):
+    """YYYY-MM-DD bounds -> (start of day, end of day) as UTC epoch seconds."""
+    start_ts = end_ts = None
+    if start_date:
+        start_ts = datetime.fromisoformat(start_date).replace(tzinfo=timezone.utc).timestamp()
+    if end_date:
+        end_ts = (
+            datetime.fromisoformat(end_date)
+            .replace(tzinfo=timezone.utc, hour=23, minute=59, second=59, microsecond=999999)
+            .timestamp()
+        )
+    return start_ts, end_ts
+
+
+async def _synced_ledger(current_user, accounts: BrokerageAccountRepository, ledger_repo: OrderLedgerRepository) -> OrderLedger:
+    trading_client = await get_alpaca_trading_client(current_user, accounts)
+    ledger = order_ledgers.get(current_user.id, trading_client_cache.account_id(current_user.id))
+    await ledger.sync(trading_client, ledger_repo)
+    return ledger
+
+
+def _pnl_book(user_id: str, cost_basis: str, ledger: OrderLedger) -> PnLBook:
+    book = pnl_books.get(user_id, cost_basis)
+    book.follow(ledger, ledger.fills)
+    return book
+
+
+def _trade_from_row(row: Dict[str, Any], book: PnLBook) -> Dict[str, Any]:
+    status = row["status"]
+    return {
+        "id": row["order_id"],
+        "strategy_id": "manual",
+        "symbol": row["symbol"],
+        "type": row["side"],
+        "quantity": row["qty"] or 0.0,
+        "price": row["filled_avg_price"] or row["limit_price"] or 0.0,
+        "timestamp": row["created_at"] or row["submitted_at"],
+        "profit_loss": book.realized(row["order_id"]),
+        "status": (
+            "executed"
+            if status == "filled"
+            else "pending"
+            if status in {"new", "partially_filled", "accepted"}
+            else "failed"
+        ),
+    }
+
+
+def _cost_basis(value: str) -> str:
+    value = value.lower()
+    if value not in COST_BASIS_METHODS:
+        raise HTTPException(status_code=400, detail=f"cost_basis must be one of {', '.join(COST_BASIS_METHODS)}")
+    return value
+
+
 @router.get("/portfolio")
 async def get_portfolio(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user=Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client),
+    accounts: BrokerageAccountRepository = Depends(get_brokerage_account_repository),
 ):
     """Get portfolio information"""
     try:
-        trading_client = await get_alpaca_trading_client(current_user, supabase)
+        trading_client = await get_alpaca_trading_client(current_user, accounts)
+        # answered from the trade updates stream when one is live for this account
+        stream = trade_streams.live(trading_client_cache.account_id(current_user.id))
+        if stream is not None:
+            return stream.portfolio()
         account = trading_client.get_account()
         positions = trading_client.get_all_positions()
 
@@ -83,17 +148,11 @@ async def get_portfolio(
 async def get_strategies(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user=Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client),
+    repo: StrategyRepository = Depends(get_strategy_repository),
 ):
     """Get user's trading strategies"""
     try:
-        resp = (
-            supabase.table("trading_strategies")
-            .select("*")
-            .eq("user_id", current_user.id)
-            .execute()
-        )
-        return {"strategies": resp.data}
+        return {"strategies": await repo.list_for_user(current_user.id)}
     except Exception as e:
         logger.error("Error fetching strategies", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to fetch strategies: {str(e)}")
@@ -104,84 +163,29 @@ async def get_trades(
     limit: Optional[int] = Query(50, description="Maximum number of trades to return"),
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    cost_basis: str = Query("fifo", description="Lot matching for realized P&L: fifo, lifo or average"),
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user=Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client),
+    accounts: BrokerageAccountRepository = Depends(get_brokerage_account_repository),
+    ledger_repo: OrderLedgerRepository = Depends(get_order_ledger_repository),
 ):
-    """Get user's trade history"""
+    """Get user's trade history with realized P&L from lot-matched fills"""
+    cost_basis = _cost_basis(cost_basis)
     try:
-        trading_client = await get_alpaca_trading_client(current_user, supabase)
-        # Convert YYYY-MM-DD to UTC-aware datetimes (RFC3339)
-        start_dt = None
-        end_dt = None
-
-        if start_date:
-            # start of day UTC
-            start_dt = datetime.fromisoformat(start_date).replace(tzinfo=timezone.utc)
-        if end_date:
-            # end of day UTC (23:59:59.999999)
-            end_dt = (
-                datetime.fromisoformat(end_date)
-                .replace(tzinfo=timezone.utc, hour=23, minute=59, second=59, microsecond=999999)
-            )
-
-        req_kwargs: Dict[str, Any] = {"status": QueryOrderStatus.ALL, "limit": limit}
-        if start_dt:
-            req_kwargs["after"] = start_dt
-        if end_dt:
-            req_kwargs["until"] = end_dt
-
-        orders_request = GetOrdersRequest(**req_kwargs)
-        orders = trading_client.get_orders(orders_request)
-
-        trades: List[Dict[str, Any]] = []
-        total_profit_loss = 0.0
-        executed_trades = 0
-        winning_trades = 0
-
-        for order in orders or []:
-            # toy P&L: +2% of notional on SELL fills
-            profit_loss = 0.0
-            if getattr(order, "filled_qty", None) and getattr(order, "filled_avg_price", None):
-                if order.side == OrderSide.SELL:
-                    profit_loss = float(order.filled_qty) * float(order.filled_avg_price) * 0.02
-
-            if order.status == OrderStatus.FILLED:
-                executed_trades += 1
-                total_profit_loss += profit_loss
-                if profit_loss > 0:
-                    winning_trades += 1
-
-            trades.append(
-                {
-                    "id": str(order.id),
-                    "strategy_id": "manual",
-                    "symbol": order.symbol,
-                    "type": (order.side.value.lower() if hasattr(order.side, "value") else str(order.side).lower()),
-                    "quantity": float(getattr(order, "qty", 0) or 0),
-                    "price": float(getattr(order, "filled_avg_price", 0) or getattr(order, "limit_price", 0) or 0),
-                    "timestamp": (
-                        order.created_at.isoformat()
-                        if getattr(order, "created_at", None)
-                        else datetime.utcnow().replace(tzinfo=timezone.utc).isoformat()
-                    ),
-                    "profit_loss": profit_loss,
-                    "status": (
-                        "executed"
-                        if order.status == OrderStatus.FILLED
-                        else "pending"
-                        if order.status in {OrderStatus.NEW, OrderStatus.PARTIALLY_FILLED, OrderStatus.ACCEPTED}
-                        else "failed"
-                    ),
-                }
-            )
+        # the ledger holds the account's full order history; syncing only fetches what changed
+        ledger = await _synced_ledger(current_user, accounts, ledger_repo)
+        book = _pnl_book(current_user.id, cost_basis, ledger)
+        start_ts, end_ts = _parse_date_range(start_date, end_date)
 
-        win_rate = (winning_trades / executed_trades) if executed_trades > 0 else 0.0
+        trades = [_trade_from_row(row, book) for row in ledger.history(start_ts, end_ts, limit)]
+        realized = book.stats(start_ts, end_ts)
         stats = {
             "total_trades": len(trades),
-            "total_profit_loss": total_profit_loss,
-            "win_rate": win_rate,
-            "avg_trade_duration": 1.0,  # placeholder
+            "total_profit_loss": realized["realized_pnl"],
+            "win_rate": realized["win_rate"],
+            "avg_trade_duration": realized["avg_holding_days"],  # days
+            "cost_basis": cost_basis,
+            **realized,
         }
 
         return {"trades": trades, "stats": stats}
@@ -199,16 +203,59 @@ async def get_trades(
         raise HTTPException(status_code=500, detail=f"Failed to fetch trades: {str(e)}")
 
 
+@router.get("/trades/export")
+async def export_trades(
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    cost_basis: str = Query("fifo", description="Lot matching for realized P&L: fifo, lifo or average"),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user=Depends(get_current_user),
+    accounts: BrokerageAccountRepository = Depends(get_brokerage_account_repository),
+    ledger_repo: OrderLedgerRepository = Depends(get_order_ledger_repository),
+):
+    """Export the full order history with realized P&L as CSV"""
+    cost_basis = _cost_basis(cost_basis)
+    try:
+        ledger = await _synced_ledger(current_user, accounts, ledger_repo)
+        book = _pnl_book(current_user.id, cost_basis, ledger)
+        start_ts, end_ts = _parse_date_range(start_date, end_date)
+
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow([
+            "order_id", "symbol", "side", "order_type", "status", "qty", "filled_qty",
+            "filled_avg_price", "submitted_at", "filled_at", "realized_pnl",
+        ])
+        for row in ledger.history(start_ts, end_ts):
+            writer.writerow([
+                row["order_id"], row["symbol"], row["side"], row["order_type"], row["status"], row["qty"],
+                row["filled_qty"], row["filled_avg_price"], row["submitted_at"], row["filled_at"],
+                book.realized(row["order_id"]),
+            ])
+        return Response(
+            content=out.getvalue(),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="trades.csv"'},
+        )
+
+    except AlpacaAPIError as e:
+        logger.error("Alpaca API error exporting trades", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to export trades: {str(e)}")
+    except Exception as e:
+        logger.error("Error exporting trades", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to export trades: {str(e)}")
+
+
 @router.post("/execute-trade")
 async def execute_trade(
     trade_data: Dict[str, Any],
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user=Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client),
+    accounts: BrokerageAccountRepository = Depends(get_brokerage_account_repository),
 ):
     """Execute a trade"""
     try:
-        trading_client = await get_alpaca_trading_client(current_user, supabase)
+        trading_client = await get_alpaca_trading_client(current_user, accounts)
         symbol = trade_data.get("symbol")
         side = trade_data.get("side")  # "buy" | "sell"
         quantity = trade_data.get("quantity")
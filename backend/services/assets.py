@@ -0,0 +1,79 @@
+# backend/services/assets.py
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from dependencies import get_alpaca_service_trading_client
+from services.snapshot import PersistedSnapshot
+
+STOCK = "stock"
+CRYPTO = "crypto"
+
+
+# Bare bases that always mean the coin. BTC, ETH and SOL are also listed equity
+# tickers (Grayscale mini trusts, ReneSola), but the dashboard and strategy UIs send
+# them bare for crypto; the equity is requested as e.g. "STOCK:ETH".
+CRYPTO_BASES = frozenset({"BTC", "ETH", "SOL", "ADA", "DOT", "MATIC"})
+STOCK_PREFIX = "STOCK:"
+
+
+def _build_lookup(equities: List[str], crypto_pairs: List[str]) -> Dict[str, Tuple[str, str]]:
+    """Map every accepted spelling of a symbol to (asset class, canonical Alpaca symbol).
+
+    Exact equity tickers win over other bare crypto bases (e.g. LINK), except for
+    CRYPTO_BASES, which stay with the coin whether or not the registry has loaded.
+    "STOCK:<ticker>" always resolves to the equity.
+    """
+    lookup: Dict[str, Tuple[str, str]] = {}
+    for pair in crypto_pairs:
+        lookup[pair.replace("/", "")] = (CRYPTO, pair)
+    for pair in crypto_pairs:
+        base, _, quote = pair.partition("/")
+        if quote == "USD":
+            lookup.setdefault(base, (CRYPTO, pair))
+            lookup.setdefault(f"{base}USDT", (CRYPTO, pair))
+    for pair in crypto_pairs:
+        lookup[pair] = (CRYPTO, pair)
+    for symbol in equities:
+        lookup[f"{STOCK_PREFIX}{symbol}"] = (STOCK, symbol)
+        if symbol not in CRYPTO_BASES:
+            lookup[symbol] = (STOCK, symbol)
+    return lookup
+
+
+class AssetRegistry(PersistedSnapshot):
+    """Alpaca asset master for O(1) symbol routing, persisted locally for fast startup."""
+
+    name = "asset registry"
+
+    def __init__(self, path: str, refresh_seconds: float):
+        super().__init__(path, refresh_seconds)
+        self._lookup: Dict[str, Tuple[str, str]] = {}
+
+    def resolve(self, symbol: str) -> Optional[Tuple[str, str]]:
+        return self._lookup.get(symbol.upper())
+
+    def _fetch(self) -> Dict:
+        from alpaca.trading.requests import GetAssetsRequest
+        from alpaca.trading.enums import AssetClass, AssetStatus
+
+        client = get_alpaca_service_trading_client()
+        equities = client.get_all_assets(GetAssetsRequest(status=AssetStatus.ACTIVE, asset_class=AssetClass.US_EQUITY))
+        crypto = client.get_all_assets(GetAssetsRequest(status=AssetStatus.ACTIVE, asset_class=AssetClass.CRYPTO))
+        return {
+            "fetched_at": time.time(),
+            "equities": sorted(a.symbol.upper() for a in equities),
+            "crypto": sorted(a.symbol.upper() for a in crypto if "/" in a.symbol),
+        }
+
+    def _apply(self, data: Dict) -> None:
+        self._lookup = _build_lookup(data.get("equities", []), data.get("crypto", []))
+
+    def _summary(self, data: Dict) -> str:
+        return f"{len(data.get('equities', []))} equities, {len(data.get('crypto', []))} crypto pairs"
+
+
+asset_registry = AssetRegistry(
+    os.getenv("ASSET_REGISTRY_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "assets.json")),
+    refresh_seconds=float(os.getenv("ASSET_REGISTRY_REFRESH_SECONDS", str(6 * 3600))),
+)
@@ -0,0 +1,133 @@
+# backend/services/bar_encoding.py
+import json
+from typing import Any, Dict, Optional
+
+import numpy as np
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+
+from services.bar_store import BAR_COLUMNS
+
+# series: {symbol: {"columns": Columns, "source": str, "int_volume": bool}}, plus
+# "age_seconds" when served from the last-known-good cache
+BAR_FORMATS = ("json", "columnar", "msgpack", "arrow")
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def _volume(series: Dict[str, Any]) -> np.ndarray:
+    vol = np.asarray(series["columns"]["volume"])
+    return vol.astype(np.int64) if series["int_volume"] else vol
+
+
+def _mark_stale(payload: Dict[str, Any], series: Dict[str, Any]) -> None:
+    if "age_seconds" in series:
+        payload["stale"] = True
+        payload["age_seconds"] = series["age_seconds"]
+
+
+def columnar_payload(series: Dict[str, Any]) -> Dict[str, Any]:
+    """One list per field; timestamps are epoch seconds (UTC)."""
+    cols = series["columns"]
+    payload = {name: np.asarray(cols[name]).tolist() for name in BAR_COLUMNS if name != "volume"}
+    payload["volume"] = _volume(series).tolist()
+    payload["source"] = series["source"]
+    _mark_stale(payload, series)
+    return payload
+
+
+def msgpack_payload(series: Dict[str, Any]) -> Dict[str, Any]:
+    """Columns as raw little-endian buffers, decodable as typed arrays without parsing."""
+    cols = dict(series["columns"], volume=_volume(series))
+    payload: Dict[str, Any] = {"dtypes": {}}
+    for name in BAR_COLUMNS:
+        arr = np.asarray(cols[name])
+        arr = np.ascontiguousarray(arr.astype(arr.dtype.newbyteorder("<"), copy=False))
+        payload[name] = arr.tobytes()
+        payload["dtypes"][name] = arr.dtype.str
+    payload["source"] = series["source"]
+    _mark_stale(payload, series)
+    return payload
+
+
+def _arrow_table(bars: Dict[str, Dict[str, Any]]):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise HTTPException(status_code=501, detail="format=arrow is not available: pyarrow is not installed on the server")
+
+    symbols, sources = [], []
+    parts: Dict[str, list] = {name: [] for name in BAR_COLUMNS}
+    for sym, series in bars.items():
+        n = len(series["columns"]["timestamp"])
+        symbols.append(np.full(n, sym, dtype=object))
+        sources.append(np.full(n, series["source"], dtype=object))
+        for name in BAR_COLUMNS:
+            parts[name].append(np.asarray(series["columns"][name]))
+        parts["volume"][-1] = _volume(series)
+
+    def cat(chunks, dtype):
+        return np.concatenate(chunks).astype(dtype, copy=False) if chunks else np.empty(0, dtype=dtype)
+
+    int_volume = all(series["int_volume"] for series in bars.values())
+    # the per-series stale markers of the other formats, as schema metadata:
+    # b"stale" is b"true" or b"false", b"age_seconds" a JSON {symbol: age} of the stale series
+    ages = {sym: series["age_seconds"] for sym, series in bars.items() if "age_seconds" in series}
+    metadata = {"stale": "true" if ages else "false", "age_seconds": json.dumps(ages)}
+    return pa.table({
+        "symbol": pa.array(cat(symbols, object), type=pa.string()).dictionary_encode(),
+        "timestamp": pa.array(cat(parts["timestamp"], np.int64), type=pa.timestamp("s", tz="UTC")),
+        "open": pa.array(cat(parts["open"], np.float64)),
+        "high": pa.array(cat(parts["high"], np.float64)),
+        "low": pa.array(cat(parts["low"], np.float64)),
+        "close": pa.array(cat(parts["close"], np.float64)),
+        # int64 only when every series has whole-share volumes (stocks); mixed tables stay float64
+        "volume": pa.array(cat(parts["volume"], np.int64 if int_volume else np.float64)),
+        "source": pa.array(cat(sources, object), type=pa.string()).dictionary_encode(),
+    }, metadata=metadata)
+
+
+def _arrow_bytes(table) -> bytes:
+    import pyarrow as pa
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _msgpack_bytes(payload: Any) -> bytes:
+    try:
+        import msgpack
+    except ImportError:
+        raise HTTPException(status_code=501, detail="format=msgpack is not available: msgpack is not installed on the server")
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def encode_bars(bars: Dict[str, Dict[str, Any]], fmt: str, symbol: Optional[str] = None) -> Response:
+    """Encode bar series in a non-default format.
+
+    With symbol set (single-symbol endpoints) the payload is that symbol's columns
+    rather than a {"bars": {symbol: ...}} mapping.
+    """
+    if symbol:
+        bars = {symbol: bars[symbol]} if symbol in bars else {}
+
+    if fmt == "arrow":
+        return Response(_arrow_bytes(_arrow_table(bars)), media_type=ARROW_MEDIA_TYPE)
+
+    if fmt == "columnar":
+        build = columnar_payload
+    elif fmt == "msgpack":
+        build = msgpack_payload
+    else:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}'; use one of {', '.join(BAR_FORMATS)}")
+
+    if symbol:
+        payload: Any = build(bars[symbol]) if bars else {}
+    else:
+        payload = {"bars": {sym: build(series) for sym, series in bars.items()}}
+
+    if fmt == "msgpack":
+        return Response(_msgpack_bytes(payload), media_type=MSGPACK_MEDIA_TYPE)
+    return JSONResponse(payload)
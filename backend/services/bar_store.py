@@ -0,0 +1,147 @@
+# backend/services/bar_store.py
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+BAR_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+Columns = Dict[str, np.ndarray]
+Range = Tuple[int, int]
+
+
+def empty_columns() -> Columns:
+    cols = {name: np.empty(0, dtype=np.float64) for name in BAR_COLUMNS}
+    cols["timestamp"] = np.empty(0, dtype=np.int64)
+    return cols
+
+
+def concat_columns(parts: List[Columns]) -> Columns:
+    """Concatenate column sets, sort by timestamp and drop duplicate timestamps (later parts win)."""
+    parts = [p for p in parts if len(p["timestamp"])]
+    if not parts:
+        return empty_columns()
+    merged = {name: np.concatenate([p[name] for p in parts]) for name in BAR_COLUMNS}
+    # stable sort on reversed input keeps the last occurrence first for np.unique
+    ts = merged["timestamp"][::-1]
+    order = np.argsort(ts, kind="stable")
+    _, first = np.unique(ts[order], return_index=True)
+    idx = order[first]
+    return {name: merged[name][::-1][idx] for name in BAR_COLUMNS}
+
+
+def slice_columns(cols: Columns, start: Optional[int], end: Optional[int]) -> Columns:
+    """Return rows with start <= timestamp < end."""
+    ts = cols["timestamp"]
+    lo = int(np.searchsorted(ts, start, side="left")) if start is not None else 0
+    hi = int(np.searchsorted(ts, end, side="left")) if end is not None else len(ts)
+    return {name: cols[name][lo:hi] for name in BAR_COLUMNS}
+
+
+def merge_ranges(ranges: List[Range]) -> List[Range]:
+    merged: List[Range] = []
+    for start, end in sorted(r for r in ranges if r[1] > r[0]):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_ranges(start: int, end: int, covered: List[Range]) -> List[Range]:
+    """Parts of [start, end) not covered by the (merged, sorted) covered ranges."""
+    gaps: List[Range] = []
+    cursor = start
+    for c_start, c_end in covered:
+        if c_end <= cursor:
+            continue
+        if c_start >= end:
+            break
+        if c_start > cursor:
+            gaps.append((cursor, c_start))
+        cursor = max(cursor, c_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class BarStore:
+    """On-disk OHLCV bar store, one column file per field, partitioned by timeframe and symbol.
+
+    Each partition keeps a meta.json with the time ranges it already holds and the
+    version directory of its current column files. Writes build a new version
+    directory and swap meta.json atomically, so readers can keep memory-mapping
+    the previous version while a write is in progress.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _dir(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, timeframe, symbol.replace("/", "-"))
+
+    def _lock(self, symbol: str, timeframe: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, timeframe), threading.Lock())
+
+    def _meta(self, symbol: str, timeframe: str) -> Dict:
+        try:
+            with open(os.path.join(self._dir(symbol, timeframe), "meta.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"version": None, "ranges": []}
+
+    def covered_ranges(self, symbol: str, timeframe: str) -> List[Range]:
+        return [tuple(r) for r in self._meta(symbol, timeframe)["ranges"]]
+
+    def missing_ranges(self, symbol: str, timeframe: str, start: int, end: int) -> List[Range]:
+        """Sub-ranges of [start, end) (epoch seconds) that still have to be fetched upstream."""
+        if end <= start:
+            return []
+        return subtract_ranges(start, end, self.covered_ranges(symbol, timeframe))
+
+    def _load(self, symbol: str, timeframe: str, meta: Dict) -> Columns:
+        if not meta.get("version"):
+            return empty_columns()
+        base = os.path.join(self._dir(symbol, timeframe), meta["version"])
+        return {name: np.load(os.path.join(base, f"{name}.npy"), mmap_mode="r") for name in BAR_COLUMNS}
+
+    def read(self, symbol: str, timeframe: str, start: Optional[int] = None, end: Optional[int] = None) -> Columns:
+        """Memory-mapped view of the stored bars with start <= timestamp < end."""
+        return slice_columns(self._load(symbol, timeframe, self._meta(symbol, timeframe)), start, end)
+
+    def write(self, symbol: str, timeframe: str, cols: Columns, covered: Range) -> None:
+        """Merge bars into the partition and record [start, end) of covered as held."""
+        with self._lock(symbol, timeframe):
+            part_dir = self._dir(symbol, timeframe)
+            meta = self._meta(symbol, timeframe)
+            merged = concat_columns([self._load(symbol, timeframe, meta), cols])
+
+            version = f"v{time.time_ns()}"
+            version_dir = os.path.join(part_dir, version)
+            os.makedirs(version_dir, exist_ok=True)
+            for name in BAR_COLUMNS:
+                np.save(os.path.join(version_dir, f"{name}.npy"), np.ascontiguousarray(merged[name]))
+
+            new_meta = {
+                "version": version,
+                "ranges": merge_ranges([tuple(r) for r in meta["ranges"]] + [tuple(covered)]),
+                "rows": int(len(merged["timestamp"])),
+            }
+            tmp = os.path.join(part_dir, f"meta.json.{version}")
+            with open(tmp, "w") as f:
+                json.dump(new_meta, f)
+            os.replace(tmp, os.path.join(part_dir, "meta.json"))
+
+            # keep the previous version for readers that loaded the old meta
+            for entry in os.listdir(part_dir):
+                if entry.startswith("v") and entry not in (version, meta.get("version")):
+                    shutil.rmtree(os.path.join(part_dir, entry), ignore_errors=True)
+
+
+bar_store = BarStore(os.getenv("BAR_STORE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "bars")))
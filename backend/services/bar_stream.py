@@ -0,0 +1,106 @@
+# backend/services/bar_stream.py
+import json
+import logging
+import os
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+from fastapi import HTTPException
+
+from services.batcher import upstream_limiter
+from services.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+ALPACA_DATA_URL = "https://data.alpaca.markets"
+STOCK_BARS_PATH = "/v2/stocks/bars"
+CRYPTO_BARS_PATH = "/v1beta3/crypto/us/bars"
+PAGE_SIZE = 10000
+
+
+def alpaca_data_headers() -> Dict[str, str]:
+    api_key = os.getenv("ALPACA_API_KEY")
+    secret_key = os.getenv("ALPACA_SECRET_KEY")
+
+    if not api_key or not secret_key:
+        raise HTTPException(status_code=500, detail="Alpaca API credentials missing")
+
+    return {"APCA-API-KEY-ID": api_key, "APCA-API-SECRET-KEY": secret_key}
+
+
+def _bar_line(symbol: str, bar: Dict, source: str, int_volume: bool) -> str:
+    volume = bar.get("v", 0) or 0
+    return json.dumps({
+        "symbol": symbol,
+        "timestamp": datetime.fromisoformat(bar["t"].replace("Z", "+00:00")).isoformat(),
+        "open": float(bar["o"]),
+        "high": float(bar["h"]),
+        "low": float(bar["l"]),
+        "close": float(bar["c"]),
+        "volume": int(volume) if int_volume else float(volume),
+        "source": source,
+    })
+
+
+async def _pages(
+    client: httpx.AsyncClient,
+    path: str,
+    params: Dict[str, str],
+    headers: Dict[str, str],
+) -> AsyncIterator[Dict]:
+    """Yield raw pages of a bars query, following next_page_token until exhausted."""
+    page_token: Optional[str] = None
+    while True:
+        query = dict(params, page_token=page_token) if page_token else params
+        await upstream_limiter.acquire()
+        resp = await client.get(f"{ALPACA_DATA_URL}{path}", params=query, headers=headers)
+        resp.raise_for_status()
+        page = resp.json()
+        yield page
+        page_token = page.get("next_page_token")
+        if not page_token:
+            return
+
+
+async def stream_bars_ndjson(
+    headers: Dict[str, str],
+    stock_symbols: List[str],
+    crypto_symbols: List[str],
+    timeframe: str,
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+) -> AsyncIterator[bytes]:
+    """Stream every bar in the range as NDJSON, one chunk per upstream page.
+
+    Only one page is held in memory at a time, so the first bytes go out as soon
+    as the first page arrives and memory stays flat for multi-year ranges.
+    Resolve headers with alpaca_data_headers() before the response starts.
+    """
+    base: Dict[str, str] = {"timeframe": timeframe, "limit": str(PAGE_SIZE)}
+    if start_time:
+        base["start"] = start_time.isoformat()
+    if end_time:
+        base["end"] = end_time.isoformat()
+
+    queries = []
+    if stock_symbols:
+        queries.append((STOCK_BARS_PATH, dict(base, symbols=",".join(stock_symbols), feed="iex"), "alpaca:iex", True))
+    if crypto_symbols:
+        queries.append((CRYPTO_BARS_PATH, dict(base, symbols=",".join(crypto_symbols)), "alpaca:crypto", False))
+
+    client = get_http_client()
+    for path, params, source, int_volume in queries:
+        try:
+            async for page in _pages(client, path, params, headers):
+                lines = [
+                    _bar_line(sym, bar, source, int_volume)
+                    for sym, bars in (page.get("bars") or {}).items()
+                    for bar in bars or []
+                ]
+                if lines:
+                    yield ("\n".join(lines) + "\n").encode()
+        except httpx.HTTPError as e:
+            # headers are already sent; report the failure in-band and stop this query
+            logger.error(f"Error streaming bars from {path}: {e}")
+            yield (json.dumps({"error": f"Failed to fetch bars: {e}", "source": source}) + "\n").encode()
@@ -0,0 +1,108 @@
+# backend/services/batcher.py
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+BatchFetch = Callable[[List[str]], Awaitable[Dict[str, Any]]]
+
+
+class TokenBucket:
+    """Async token bucket; acquire() waits until a token is available.
+
+    Waiters are served in arrival order. The budget is per process, so give each
+    worker its share of the account's upstream quota.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, rate_per_minute / 10.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+
+class _Batch:
+    def __init__(self, fetch: BatchFetch):
+        self.fetch = fetch
+        self.symbols: Dict[str, None] = {}
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class MicroBatcher:
+    """Coalesces symbol requests for the same upstream endpoint across concurrent callers.
+
+    The first caller for an endpoint opens a batch; every caller within the window
+    adds its symbols to it. When the window closes the batch is sent as one
+    multi-symbol upstream call per max_batch symbols, each gated by the limiter,
+    and every caller gets back its own symbols.
+    """
+
+    def __init__(self, window_seconds: float, limiter: TokenBucket, max_batch: int = 200):
+        self.window_seconds = window_seconds
+        self.limiter = limiter
+        self.max_batch = max_batch
+        self._open: Dict[str, _Batch] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.requests = 0
+        self.upstream_calls = 0
+
+    async def submit(self, endpoint: str, symbols: Iterable[str], fetch: BatchFetch) -> Dict[str, Any]:
+        symbols = list(symbols)
+        self.requests += 1
+        batch = self._open.get(endpoint)
+        if batch is None:
+            batch = _Batch(fetch)
+            self._open[endpoint] = batch
+            asyncio.get_running_loop().call_later(self.window_seconds, self._close, endpoint, batch)
+        batch.symbols.update(dict.fromkeys(symbols))
+        result = await asyncio.shield(batch.future)
+        return {s: result[s] for s in symbols if s in result}
+
+    def _close(self, endpoint: str, batch: _Batch) -> None:
+        if self._open.get(endpoint) is batch:
+            del self._open[endpoint]
+        task = asyncio.ensure_future(self._flush(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch: _Batch) -> None:
+        symbols = list(batch.symbols)
+        result: Dict[str, Any] = {}
+        try:
+            for i in range(0, len(symbols), self.max_batch):
+                await self.limiter.acquire()
+                self.upstream_calls += 1
+                result.update(await batch.fetch(symbols[i:i + self.max_batch]))
+        except asyncio.CancelledError:
+            batch.future.cancel()
+            raise
+        except Exception as e:
+            batch.future.set_exception(e)
+            batch.future.exception()  # mark retrieved in case every caller was cancelled
+        else:
+            batch.future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "upstream_calls": self.upstream_calls, "open_batches": len(self._open)}
+
+
+upstream_limiter = TokenBucket(float(os.getenv("ALPACA_RATE_LIMIT_PER_MINUTE", "200")))
+data_batcher = MicroBatcher(
+    window_seconds=float(os.getenv("MARKET_DATA_BATCH_WINDOW_MS", "10")) / 1000,
+    limiter=upstream_limiter,
+    max_batch=int(os.getenv("MARKET_DATA_MAX_BATCH_SYMBOLS", "200")),
+)
@@ -0,0 +1,129 @@
+# backend/services/circuit_breaker.py
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while a breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Per-endpoint circuit breaker.
+
+    Opens after failure_threshold consecutive failures. Once the backoff elapses a
+    single half-open probe is let through: success closes the breaker, failure
+    re-opens it with the backoff doubled (capped at max_backoff). Everyone else
+    fails fast with CircuitOpenError while the breaker is open or probing.
+
+    Failures of calls that started before the breaker last opened are ignored:
+    they belong to the outage that already tripped it, and must not stretch the
+    backoff.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, base_backoff: float = 2.0, max_backoff: float = 60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_until = 0.0
+        self.rejected = 0
+        # bumped on every trip; a call's failure only counts against the generation it started in
+        self._generation = 0
+
+    def _allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() >= self.opened_until:
+            self.state = HALF_OPEN
+            return True
+        return False
+
+    def rejecting(self) -> bool:
+        """True while calls would be refused, without claiming the half-open probe."""
+        if self.state == OPEN:
+            return time.monotonic() < self.opened_until
+        return self.state == HALF_OPEN
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+
+    def record_failure(self, generation: Optional[int] = None) -> None:
+        if self.state == OPEN or (generation is not None and generation != self._generation):
+            return
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** self.trips)
+            logger.warning(f"Circuit '{self.name}' opened for {backoff:.1f}s after {self.failures} failures")
+            self.trips += 1
+            self.failures = 0
+            self._generation += 1
+            self.state = OPEN
+            self.opened_until = time.monotonic() + backoff
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        if not self._allow():
+            self.rejected += 1
+            raise CircuitOpenError(self.name, max(0.0, self.opened_until - time.monotonic()))
+        generation = self._generation
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception:
+            self.record_failure(generation)
+            raise
+        except BaseException:
+            # a cancelled probe tells us nothing; let the next caller probe again
+            if self.state == HALF_OPEN:
+                self.state = OPEN
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_after": max(0.0, self.opened_until - time.monotonic()) if self.state == OPEN else 0.0,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the process-wide breaker for an upstream endpoint, creating it on first use."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            name,
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+            base_backoff=float(os.getenv("CIRCUIT_BASE_BACKOFF_SECONDS", "2")),
+            max_backoff=float(os.getenv("CIRCUIT_MAX_BACKOFF_SECONDS", "60")),
+        )
+        _breakers[name] = breaker
+    return breaker
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: b.stats() for name, b in _breakers.items()}
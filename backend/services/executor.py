@@ -0,0 +1,39 @@
+# backend/services/executor.py
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+# alpaca-py's REST clients are synchronous; run them here so the event loop never
+# waits on upstream I/O. The pool size caps concurrent upstream calls per worker.
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("UPSTREAM_MAX_WORKERS", "16")),
+    thread_name_prefix="upstream",
+)
+
+# supabase-py's sync client gets its own pool, so slow upstream calls never queue
+# database round trips behind them (and vice versa).
+_db_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DB_MAX_WORKERS", "16")),
+    thread_name_prefix="db",
+)
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking call on the bounded upstream executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking database call on the bounded database executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, functools.partial(fn, *args, **kwargs))
+
+
+def shutdown_executor() -> None:
+    _executor.shutdown(wait=False, cancel_futures=True)
+    _db_executor.shutdown(wait=False, cancel_futures=True)
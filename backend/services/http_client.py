@@ -0,0 +1,83 @@
+# backend/services/http_client.py
+import logging
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_TIMEOUT = httpx.Timeout(
+    connect=float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5")),
+    read=float(os.getenv("HTTP_READ_TIMEOUT_SECONDS", "30")),
+    write=10.0,
+    pool=5.0,
+)
+HTTP_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    keepalive_expiry=30.0,
+)
+# transport retries only cover failed connection attempts, so they are safe for POSTs too
+HTTP_CONNECT_RETRIES = int(os.getenv("HTTP_CONNECT_RETRIES", "2"))
+
+_client: Optional[httpx.AsyncClient] = None
+_metrics: Counter = Counter()
+_latency_total = 0.0
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("h2 is not installed; outbound HTTP falls back to HTTP/1.1 (install httpx[http2])")
+        return False
+    return True
+
+
+async def _on_request(request: httpx.Request) -> None:
+    request.extensions["started_at"] = time.perf_counter()
+    _metrics["requests"] += 1
+
+
+async def _on_response(response: httpx.Response) -> None:
+    global _latency_total
+    started_at = response.request.extensions.get("started_at")
+    if started_at is not None:
+        _latency_total += time.perf_counter() - started_at
+    _metrics[f"status_{response.status_code // 100}xx"] += 1
+    _metrics[response.http_version] += 1
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The app-wide outbound HTTP client: pooled keep-alive connections, HTTP/2 where the server offers it."""
+    global _client
+    if _client is None or _client.is_closed:
+        http2 = _http2_available()
+        _client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            transport=httpx.AsyncHTTPTransport(http2=http2, limits=HTTP_LIMITS, retries=HTTP_CONNECT_RETRIES),
+            event_hooks={"request": [_on_request], "response": [_on_response]},
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+def http_pool_stats() -> Dict[str, Any]:
+    """Request counters plus a snapshot of the connection pool."""
+    stats: Dict[str, Any] = dict(_metrics)
+    completed = sum(v for k, v in _metrics.items() if k.startswith("status_"))
+    stats["mean_latency_ms"] = round(_latency_total / completed * 1000, 2) if completed else None
+    pool = getattr(getattr(_client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    stats["connections"] = len(connections)
+    stats["idle_connections"] = sum(1 for c in connections if c.is_idle())
+    return stats
@@ -0,0 +1,341 @@
+# backend/services/indicators.py
+import math
+import os
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.bar_store import Columns
+
+# name -> default params; specs look like "rsi", "rsi:14" or "bbands:20:2"
+INDICATOR_DEFAULTS: Dict[str, Tuple[float, ...]] = {
+    "sma": (20,),
+    "ema": (20,),
+    "rsi": (14,),
+    "bbands": (20, 2),
+    "atr": (14,),
+}
+INDICATOR_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "sma": ("value",),
+    "ema": ("value",),
+    "rsi": ("value",),
+    "bbands": ("middle", "upper", "lower"),
+    "atr": ("value",),
+}
+_EWM_BLOCK = 256
+
+Spec = Tuple[str, Tuple[float, ...]]
+Bar = Tuple[float, float, float]  # high, low, close
+
+
+def parse_indicator(spec: str) -> Spec:
+    """'bbands:20:2' -> ('bbands', (20, 2.0)). Raises ValueError for unknown names or bad params."""
+    name, *raw = spec.strip().lower().split(":")
+    if name not in INDICATOR_DEFAULTS:
+        raise ValueError(f"Unknown indicator '{name}'; use one of {', '.join(INDICATOR_DEFAULTS)}")
+    defaults = INDICATOR_DEFAULTS[name]
+    if len(raw) > len(defaults):
+        raise ValueError(f"Too many parameters for '{name}'")
+    params = tuple(float(p) for p in raw) + defaults[len(raw):]
+    if not 2 <= params[0] <= 1000 or params[0] != int(params[0]):
+        raise ValueError(f"Invalid period for '{name}'")
+    return name, (int(params[0]),) + params[1:]
+
+
+def indicator_key(spec: Spec) -> str:
+    name, params = spec
+    return ":".join([name] + [f"{p:g}" for p in params])
+
+
+def warmup_bars(spec: Spec) -> int:
+    """Bars needed before the first value; EMA gets extra history to converge."""
+    name, params = spec
+    period = int(params[0])
+    if name == "ema":
+        return 3 * period
+    return period + 1 if name in ("rsi", "atr") else period
+
+
+# --------- vectorized full-window computation ---------
+def _ewm(x: np.ndarray, alpha: float, seed: float) -> np.ndarray:
+    """y[t] = alpha * x[t] + (1 - alpha) * y[t-1] with y[-1] = seed.
+
+    Computed in fixed-size blocks as a lower-triangular matrix product, which
+    keeps the decay powers bounded and the work in numpy.
+    """
+    out = np.empty(len(x), dtype=np.float64)
+    decay = 1.0 - alpha
+    steps = np.arange(_EWM_BLOCK)
+    lag = steps[:, None] - steps[None, :]
+    weights = np.where(lag >= 0, alpha * decay ** np.maximum(lag, 0), 0.0)
+    carry = decay ** (steps + 1)
+    prev = seed
+    for i in range(0, len(x), _EWM_BLOCK):
+        block = x[i:i + _EWM_BLOCK]
+        n = len(block)
+        out[i:i + n] = weights[:n, :n] @ block + carry[:n] * prev
+        prev = out[i + n - 1]
+    return out
+
+
+def _sma(close: np.ndarray, period: int) -> np.ndarray:
+    out = np.full(len(close), np.nan)
+    if len(close) >= period:
+        out[period - 1:] = np.lib.stride_tricks.sliding_window_view(close, period).mean(axis=1)
+    return out
+
+
+def _ema(close: np.ndarray, period: int) -> np.ndarray:
+    out = np.full(len(close), np.nan)
+    if len(close) >= period:
+        seed = close[:period].mean()
+        out[period - 1] = seed
+        out[period:] = _ewm(close[period:], 2.0 / (period + 1), seed)
+    return out
+
+
+def _rsi(close: np.ndarray, period: int) -> Tuple[np.ndarray, float, float]:
+    out = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return out, math.nan, math.nan
+    delta = np.diff(close)
+    gains, losses = np.maximum(delta, 0.0), np.maximum(-delta, 0.0)
+    avg_gain = np.empty(len(delta))
+    avg_loss = np.empty(len(delta))
+    avg_gain[period - 1] = gains[:period].mean()
+    avg_loss[period - 1] = losses[:period].mean()
+    avg_gain[period:] = _ewm(gains[period:], 1.0 / period, avg_gain[period - 1])
+    avg_loss[period:] = _ewm(losses[period:], 1.0 / period, avg_loss[period - 1])
+    ag, al = avg_gain[period - 1:], avg_loss[period - 1:]
+    rs = np.divide(ag, al, out=np.full(len(ag), np.inf), where=al != 0)
+    out[period:] = 100.0 - 100.0 / (1.0 + rs)
+    return out, float(avg_gain[-1]), float(avg_loss[-1])
+
+
+def _bbands(close: np.ndarray, period: int, width: float) -> Dict[str, np.ndarray]:
+    middle = np.full(len(close), np.nan)
+    std = np.full(len(close), np.nan)
+    if len(close) >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(close, period)
+        middle[period - 1:] = windows.mean(axis=1)
+        std[period - 1:] = windows.std(axis=1)
+    return {"middle": middle, "upper": middle + width * std, "lower": middle - width * std}
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    prev_close = np.concatenate([close[:1], close[:-1]])
+    tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    if len(tr):
+        tr[0] = high[0] - low[0]
+    return tr
+
+
+def _atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
+    out = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return out
+    tr = _true_range(high, low, close)
+    seed = tr[1:period + 1].mean()
+    out[period] = seed
+    out[period + 1:] = _ewm(tr[period + 1:], 1.0 / period, seed)
+    return out
+
+
+# --------- O(1) rolling state ---------
+class _SMAState:
+    def __init__(self, period: int, closes: np.ndarray):
+        self.window = deque((float(c) for c in closes[-period:]), maxlen=period)
+        self.total = math.fsum(self.window)
+
+    def update(self, bar: Bar, commit: bool = True) -> Dict[str, float]:
+        close = bar[2]
+        total = self.total + close - self.window[0]
+        if commit:
+            self.window.append(close)
+            self.total = total
+        return {"value": total / self.window.maxlen}
+
+
+class _EMAState:
+    def __init__(self, period: int, last: float):
+        self.alpha = 2.0 / (period + 1)
+        self.value = last
+
+    def update(self, bar: Bar, commit: bool = True) -> Dict[str, float]:
+        value = self.alpha * bar[2] + (1 - self.alpha) * self.value
+        if commit:
+            self.value = value
+        return {"value": value}
+
+
+class _RSIState:
+    def __init__(self, period: int, last_close: float, avg_gain: float, avg_loss: float):
+        self.period = period
+        self.last_close = last_close
+        self.avg_gain = avg_gain
+        self.avg_loss = avg_loss
+
+    def update(self, bar: Bar, commit: bool = True) -> Dict[str, float]:
+        delta = bar[2] - self.last_close
+        avg_gain = (self.avg_gain * (self.period - 1) + max(delta, 0.0)) / self.period
+        avg_loss = (self.avg_loss * (self.period - 1) + max(-delta, 0.0)) / self.period
+        if commit:
+            self.last_close, self.avg_gain, self.avg_loss = bar[2], avg_gain, avg_loss
+        return {"value": 100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)}
+
+
+class _BBandsState:
+    """Sliding-window mean and variance (Welford add/remove), so each bar is O(1)."""
+
+    def __init__(self, period: int, width: float, closes: np.ndarray):
+        self.width = width
+        self.window = deque((float(c) for c in closes[-period:]), maxlen=period)
+        self.mean = float(np.mean(self.window))
+        self.m2 = float(np.sum((np.asarray(self.window) - self.mean) ** 2))
+
+    def update(self, bar: Bar, commit: bool = True) -> Dict[str, float]:
+        new, old, n = bar[2], self.window[0], self.window.maxlen
+        mean = self.mean + (new - old) / n
+        m2 = max(self.m2 + (new - old) * (new - mean + old - self.mean), 0.0)
+        if commit:
+            self.window.append(new)
+            self.mean, self.m2 = mean, m2
+        std = math.sqrt(m2 / n)
+        return {"middle": mean, "upper": mean + self.width * std, "lower": mean - self.width * std}
+
+
+class _ATRState:
+    def __init__(self, period: int, last_close: float, atr: float):
+        self.period = period
+        self.last_close = last_close
+        self.atr = atr
+
+    def update(self, bar: Bar, commit: bool = True) -> Dict[str, float]:
+        high, low, close = bar
+        tr = max(high - low, abs(high - self.last_close), abs(low - self.last_close))
+        atr = (self.atr * (self.period - 1) + tr) / self.period
+        if commit:
+            self.last_close, self.atr = close, atr
+        return {"value": atr}
+
+
+def compute(spec: Spec, cols: Columns) -> Tuple[Dict[str, np.ndarray], Any]:
+    """Full vectorized pass over cols; returns (field arrays, rolling state or None if not warmed up)."""
+    name, params = spec
+    period = int(params[0])
+    close = np.asarray(cols["close"], dtype=np.float64)
+    warm = len(close) >= warmup_bars(spec)
+    if name == "sma":
+        values = {"value": _sma(close, period)}
+        return values, _SMAState(period, close) if warm else None
+    if name == "ema":
+        values = {"value": _ema(close, period)}
+        return values, _EMAState(period, float(values["value"][-1])) if warm else None
+    if name == "rsi":
+        value, avg_gain, avg_loss = _rsi(close, period)
+        return {"value": value}, _RSIState(period, float(close[-1]), avg_gain, avg_loss) if warm else None
+    if name == "bbands":
+        values = _bbands(close, period, params[1])
+        return values, _BBandsState(period, params[1], close) if warm else None
+    high = np.asarray(cols["high"], dtype=np.float64)
+    low = np.asarray(cols["low"], dtype=np.float64)
+    values = {"value": _atr(high, low, close, period)}
+    return values, _ATRState(period, float(close[-1]), float(values["value"][-1])) if warm else None
+
+
+class _Series:
+    def __init__(self, state: Any, timestamps: np.ndarray, values: Dict[str, np.ndarray], history: int):
+        self.state = state
+        self.timestamps: deque = deque(timestamps[-history:].tolist(), maxlen=history)
+        self.values: Dict[str, deque] = {f: deque(v[-history:].tolist(), maxlen=history) for f, v in values.items()}
+
+    @property
+    def last_ts(self) -> int:
+        return self.timestamps[-1]
+
+
+class IndicatorEngine:
+    """Process-wide indicator series keyed by (symbol, timeframe, indicator spec).
+
+    The first request for a key computes the whole window with numpy and keeps
+    the rolling state; later requests only feed bars newer than the last closed
+    bar through that state, one O(1) update each, so every strategy and user
+    watching the same series shares one computation. The still-forming bar is
+    previewed from the state without being committed.
+    """
+
+    def __init__(self, max_series: int = 5000, history: int = 2000):
+        self.max_series = max_series
+        self.history = history
+        self._series: Dict[Tuple[str, str, str], _Series] = {}
+        self.full_computes = 0
+        self.incremental_updates = 0
+
+    def series(
+        self, symbol: str, timeframe: str, spec: Spec, cols: Columns, closed: int, limit: int
+    ) -> Dict[str, List[Optional[float]]]:
+        """Last limit points of the indicator; cols must be sorted, the first `closed` bars final."""
+        key = (symbol, timeframe, indicator_key(spec))
+        ts = np.asarray(cols["timestamp"], dtype=np.int64)
+        bars = np.column_stack([np.asarray(cols[c], dtype=np.float64) for c in ("high", "low", "close")])
+        entry = self._series.get(key)
+
+        resume = None
+        if entry is not None and limit <= len(entry.timestamps):
+            idx = int(np.searchsorted(ts[:closed], entry.last_ts))
+            if idx < closed and ts[idx] == entry.last_ts:
+                resume = idx + 1
+
+        if resume is None:
+            self.full_computes += 1
+            closed_cols = {name: np.asarray(arr)[:closed] for name, arr in cols.items()}
+            values, state = compute(spec, closed_cols)
+            if state is None:
+                self._series.pop(key, None)
+                # not enough history to keep state; the forming bars come from one more full pass
+                values = compute(spec, cols)[0]
+                return self._tail(ts.tolist(), {f: v.tolist() for f, v in values.items()}, limit)
+            entry = _Series(state, ts[:closed], values, self.history)
+        else:
+            for i in range(resume, closed):
+                self.incremental_updates += 1
+                point = entry.state.update(tuple(bars[i]))
+                entry.timestamps.append(int(ts[i]))
+                for field, value in point.items():
+                    entry.values[field].append(value)
+
+        # re-insert so dict order tracks use and eviction drops the least recently used
+        self._series.pop(key, None)
+        self._series[key] = entry
+        while len(self._series) > self.max_series:
+            self._series.pop(next(iter(self._series)))
+
+        out_ts = list(entry.timestamps)
+        out_values = {f: list(v) for f, v in entry.values.items()}
+        for i in range(closed, len(ts)):
+            point = entry.state.update(tuple(bars[i]), commit=False)
+            out_ts.append(int(ts[i]))
+            for field, value in point.items():
+                out_values[field].append(value)
+        return self._tail(out_ts, out_values, limit)
+
+    @staticmethod
+    def _tail(timestamps: List[int], values: Dict[str, List[float]], limit: int) -> Dict[str, List[Optional[float]]]:
+        out: Dict[str, List[Optional[float]]] = {"timestamp": timestamps[-limit:]}
+        for field, vals in values.items():
+            out[field] = [None if v is None or math.isnan(v) else v for v in vals[-limit:]]
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "series": len(self._series),
+            "full_computes": self.full_computes,
+            "incremental_updates": self.incremental_updates,
+        }
+
+
+indicator_engine = IndicatorEngine(
+    max_series=int(os.getenv("INDICATOR_MAX_SERIES", "5000")),
+    history=int(os.getenv("INDICATOR_HISTORY_POINTS", "2000")),
+)
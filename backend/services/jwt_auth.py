@@ -0,0 +1,182 @@
+# backend/services/jwt_auth.py
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+from jose import jwt
+from jose.exceptions import JWTError
+
+from services.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+# an unknown kid forces a JWKS refetch at most this often, so forged kids cannot hammer Auth
+JWKS_MIN_REFRESH_SECONDS = 30.0
+
+
+class AuthenticatedUser:
+    """The parts of a Supabase user the API needs, decoded from the access token's claims."""
+
+    __slots__ = ("id", "email", "role", "app_metadata", "user_metadata", "exp")
+
+    def __init__(self, claims: Dict[str, Any]):
+        self.id: str = claims["sub"]
+        self.email: Optional[str] = claims.get("email")
+        self.role: Optional[str] = claims.get("role")
+        self.app_metadata: Dict[str, Any] = claims.get("app_metadata") or {}
+        self.user_metadata: Dict[str, Any] = claims.get("user_metadata") or {}
+        self.exp: int = int(claims["exp"])
+
+
+class TokenVerifier:
+    """Verifies Supabase access tokens locally and caches decoded users until they expire.
+
+    HS256 tokens are checked against SUPABASE_JWT_SECRET; RS256/ES256 tokens
+    against the project's JWKS, which is cached and refetched on key rotation.
+    Verified tokens live in a bounded LRU, so repeat requests cost a dict lookup.
+    With revocation_check_seconds set, a cached token is re-checked remotely at
+    most that often, to catch sign-outs before the token expires.
+    """
+
+    def __init__(
+        self,
+        secret: Optional[str],
+        jwks_url: Optional[str],
+        audience: str = "authenticated",
+        max_entries: int = 10000,
+        jwks_ttl_seconds: float = 600.0,
+        revocation_check_seconds: float = 0.0,
+        leeway_seconds: int = 30,
+    ):
+        self.secret = secret
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.max_entries = max_entries
+        self.jwks_ttl_seconds = jwks_ttl_seconds
+        self.revocation_check_seconds = revocation_check_seconds
+        self.leeway_seconds = leeway_seconds
+        # token -> (user, last remote check)
+        self._users: "OrderedDict[str, Tuple[AuthenticatedUser, float]]" = OrderedDict()
+        self._jwks: Dict[str, Dict[str, Any]] = {}
+        self._jwks_fetched_at = 0.0
+        self._jwks_lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    async def _signing_key(self, header: Dict[str, Any]) -> Optional[Any]:
+        alg = header.get("alg")
+        if alg == "HS256":
+            return self.secret
+        if alg not in ASYMMETRIC_ALGORITHMS or not self.jwks_url:
+            return None
+        kid = header.get("kid")
+        if kid not in self._jwks or time.monotonic() - self._jwks_fetched_at > self.jwks_ttl_seconds:
+            async with self._jwks_lock:
+                age = time.monotonic() - self._jwks_fetched_at
+                stale = age > self.jwks_ttl_seconds
+                if stale or (kid not in self._jwks and age > JWKS_MIN_REFRESH_SECONDS):
+                    await self._refresh_jwks()
+        return self._jwks.get(kid)
+
+    async def _refresh_jwks(self) -> None:
+        try:
+            resp = await get_http_client().get(self.jwks_url, timeout=5.0)
+            resp.raise_for_status()
+            keys = resp.json().get("keys", [])
+        except (httpx.HTTPError, ValueError) as e:
+            # keep serving the keys we have; a missing kid then falls back to remote verification
+            logger.error(f"Could not fetch JWKS from {self.jwks_url}: {e}")
+            self._jwks_fetched_at = time.monotonic()
+            return
+        self._jwks = {k["kid"]: k for k in keys if k.get("kid")}
+        self._jwks_fetched_at = time.monotonic()
+
+    async def verify(self, token: str, remote_check: Callable[[str], Awaitable[Any]]) -> AuthenticatedUser:
+        """Return the token's user, raising JWTError if it is invalid or expired.
+
+        remote_check(token) is an async callable asking Supabase Auth; it is used
+        when the token cannot be verified locally and for periodic revocation checks.
+        """
+        now = time.time()
+        entry = self._users.get(token)
+        if entry is not None:
+            user, checked_at = entry
+            if user.exp + self.leeway_seconds <= now:
+                del self._users[token]
+            elif self.revocation_check_seconds and now - checked_at >= self.revocation_check_seconds:
+                try:
+                    await remote_check(token)
+                except Exception:
+                    self.forget(token)
+                    raise
+                self._store(token, user, now)
+                return user
+            else:
+                self.hits += 1
+                self._users.move_to_end(token)
+                return user
+
+        self.misses += 1
+        header = jwt.get_unverified_header(token)
+        key = await self._signing_key(header)
+        if key is None:
+            # no local key material for this token; Supabase Auth decides, claims come from the token
+            await remote_check(token)
+            claims = jwt.get_unverified_claims(token)
+        else:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=[header["alg"]],
+                audience=self.audience,
+                options={"leeway": self.leeway_seconds},
+            )
+        if not claims.get("sub") or not claims.get("exp"):
+            raise JWTError("Token is missing sub or exp")
+        user = AuthenticatedUser(claims)
+        self._store(token, user, now)
+        return user
+
+    def _store(self, token: str, user: AuthenticatedUser, checked_at: float) -> None:
+        self._users[token] = (user, checked_at)
+        self._users.move_to_end(token)
+        while len(self._users) > self.max_entries:
+            self._users.popitem(last=False)
+
+    def forget(self, token: str) -> None:
+        self._users.pop(token, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._users), "hits": self.hits, "misses": self.misses, "jwks_keys": len(self._jwks)}
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """The exp claim (epoch seconds) of a token that has already been verified, or None."""
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        return None
+    return float(exp) if exp else None
+
+
+def _jwks_url() -> Optional[str]:
+    url = os.getenv("SUPABASE_JWKS_URL")
+    if url:
+        return url
+    supabase_url = os.getenv("SUPABASE_URL")
+    return f"{supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json" if supabase_url else None
+
+
+LOCAL_JWT_VERIFY = os.getenv("SUPABASE_JWT_LOCAL_VERIFY", "true").lower() not in ("0", "false", "no")
+token_verifier = TokenVerifier(
+    secret=os.getenv("SUPABASE_JWT_SECRET"),
+    jwks_url=_jwks_url(),
+    audience=os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated"),
+    max_entries=int(os.getenv("AUTH_TOKEN_CACHE_MAX_ENTRIES", "10000")),
+    revocation_check_seconds=float(os.getenv("AUTH_REVOCATION_CHECK_SECONDS", "0")),
+)
@@ -0,0 +1,75 @@
+# backend/services/live_prices.py
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Set
+
+import numpy as np
+
+_encode = json.JSONEncoder().encode
+_ROW = (
+    '%s:{"price":%r,"bid_price":%r,"ask_price":%r,"change":%r,"change_percent":%r,'
+    '"volume":%d,"high":%r,"low":%r,"open":%r,"timestamp":%s%s}'
+)
+
+
+def _column(rows: List[Dict[str, Any]], field: str, dtype=np.float64) -> np.ndarray:
+    return np.fromiter(((row.get(field) or 0) if row else 0 for row in rows), dtype=dtype, count=len(rows))
+
+
+def encode_live_prices(
+    symbols: List[str],
+    keys: Dict[str, str],
+    stock_symbols: Set[str],
+    quotes: Dict[str, Any],
+    snapshots: Dict[str, Any],
+) -> bytes:
+    """Combine quotes and daily bars into the live-prices JSON object in one pass.
+
+    Produces the same fields as get_live_prices_data, but quotes and daily bars
+    are pulled into aligned arrays, mid/change/change_percent are computed with
+    numpy, and each symbol is written straight into the JSON text rather than
+    through a per-symbol dict. symbols are upper-cased request symbols; keys maps
+    them to canonical symbols.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    rows = [quotes.get(sym) or quotes.get(keys[sym]) for sym in symbols]
+    bars = [
+        (snapshots.get(keys[sym]) or {}).get("daily_bar") if sym in stock_symbols else None
+        for sym in symbols
+    ]
+
+    bid = _column(rows, "bid_price")
+    ask = _column(rows, "ask_price")
+    open_px = _column(bars, "open")
+    mid = np.where((bid != 0) & (ask != 0), (bid + ask) / 2, np.where(bid != 0, bid, ask))
+    change = np.where((mid != 0) & (open_px != 0), mid - open_px, 0.0)
+    change_pct = np.divide(change * 100, open_px, out=np.zeros_like(change), where=open_px != 0)
+
+    now = datetime.utcnow().replace(tzinfo=timezone.utc).isoformat()
+    timestamps = [
+        (row.get("timestamp") if row else now) or (bar or {}).get("timestamp")
+        for row, bar in zip(rows, bars)
+    ]
+    stale = [
+        ',"stale":true,"age_seconds":%r' % row["age_seconds"] if row and row.get("stale") else ""
+        for row in rows
+    ]
+
+    body = ",".join(
+        _ROW % fields
+        for fields in zip(
+            map(_encode, symbols),
+            mid.tolist(),
+            bid.tolist(),
+            ask.tolist(),
+            change.tolist(),
+            change_pct.tolist(),
+            _column(bars, "volume", np.int64).tolist(),
+            _column(bars, "high").tolist(),
+            _column(bars, "low").tolist(),
+            open_px.tolist(),
+            map(_encode, timestamps),
+            stale,
+        )
+    )
+    return ("{" + body + "}").encode()
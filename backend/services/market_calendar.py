@@ -0,0 +1,126 @@
+# backend/services/market_calendar.py
+import bisect
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from dependencies import get_alpaca_service_trading_client
+from services.resample import EQUITY_TZ
+from services.snapshot import PersistedSnapshot
+
+OPEN = "open"
+PRE_MARKET = "pre"
+POST_MARKET = "post"
+CLOSED = "closed"
+
+# extended-hours trading window around each regular session, US/Eastern wall clock
+PRE_MARKET_START = (4, 0)
+POST_MARKET_END = (20, 0)
+EXTENDED_HOURS_TTL_SECONDS = float(os.getenv("EXTENDED_HOURS_CACHE_TTL_SECONDS", "30"))
+
+# (pre-market start, open, close, post-market end) in epoch seconds
+Session = Tuple[int, int, int, int]
+
+
+def _et_timestamp(day: date, hour: int, minute: int) -> int:
+    return int(datetime(day.year, day.month, day.day, hour, minute, tzinfo=EQUITY_TZ).timestamp())
+
+
+def _session(day: date, open_hm: Tuple[int, int], close_hm: Tuple[int, int]) -> Session:
+    return (
+        _et_timestamp(day, *PRE_MARKET_START),
+        _et_timestamp(day, *open_hm),
+        _et_timestamp(day, *close_hm),
+        _et_timestamp(day, *POST_MARKET_END),
+    )
+
+
+class MarketCalendar(PersistedSnapshot):
+    """Alpaca trading calendar (sessions, holidays, early closes), cached locally and refreshed daily.
+
+    Used to pick cache TTLs per session phase: regular hours keep the normal
+    TTL, extended hours a longer one, and outside any session equity values are
+    frozen until the next pre-market opens.
+    """
+
+    name = "market calendar"
+
+    def __init__(self, path: str, refresh_seconds: float, days_ahead: int = 60):
+        super().__init__(path, refresh_seconds)
+        self.days_ahead = days_ahead
+        self._sessions: List[Session] = []
+        self._starts: List[int] = []
+
+    def _set_sessions(self, raw: List[Dict]) -> None:
+        sessions = sorted(
+            _session(
+                date.fromisoformat(s["date"]),
+                tuple(int(p) for p in s["open"].split(":")),
+                tuple(int(p) for p in s["close"].split(":")),
+            )
+            for s in raw
+        )
+        self._sessions = sessions
+        self._starts = [s[0] for s in sessions]
+
+    def phase(self, now: Optional[float] = None) -> Tuple[str, Optional[Session]]:
+        """(phase, next or current session). Returns (OPEN, None) when the calendar does not cover now."""
+        now = time.time() if now is None else now
+        if not self._sessions or now >= self._sessions[-1][3]:
+            return OPEN, None
+        i = bisect.bisect_right(self._starts, now) - 1
+        if i >= 0:
+            pre, open_ts, close_ts, post = self._sessions[i]
+            if now < open_ts:
+                return PRE_MARKET, self._sessions[i]
+            if now < close_ts:
+                return OPEN, self._sessions[i]
+            if now < post:
+                return POST_MARKET, self._sessions[i]
+        elif now < self._starts[0] - 7 * 86400:
+            # older than anything we fetched; do not guess
+            return OPEN, None
+        return CLOSED, self._sessions[i + 1]
+
+    def is_open(self, now: Optional[float] = None) -> bool:
+        return self.phase(now)[0] == OPEN
+
+    def equity_ttl(self, base_ttl: float, now: Optional[float] = None) -> float:
+        """Cache TTL for an equity value stored now."""
+        now = time.time() if now is None else now
+        phase, session = self.phase(now)
+        if phase == OPEN:
+            return base_ttl
+        if phase in (PRE_MARKET, POST_MARKET):
+            return max(base_ttl, EXTENDED_HOURS_TTL_SECONDS)
+        # nothing trades until the next pre-market, so the last values are final
+        return max(base_ttl, session[0] - now)
+
+    def _fetch(self) -> Dict:
+        from alpaca.trading.requests import GetCalendarRequest
+
+        today = datetime.now(EQUITY_TZ).date()
+        client = get_alpaca_service_trading_client()
+        calendar = client.get_calendar(
+            GetCalendarRequest(start=today - timedelta(days=7), end=today + timedelta(days=self.days_ahead))
+        )
+        return {
+            "fetched_at": time.time(),
+            "sessions": [
+                {"date": c.date.isoformat(), "open": c.open.strftime("%H:%M"), "close": c.close.strftime("%H:%M")}
+                for c in calendar
+            ],
+        }
+
+    def _apply(self, data: Dict) -> None:
+        self._set_sessions(data.get("sessions", []))
+
+    def _summary(self, data: Dict) -> str:
+        return f"{len(data.get('sessions', []))} sessions"
+
+
+market_calendar = MarketCalendar(
+    os.getenv("MARKET_CALENDAR_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "calendar.json")),
+    refresh_seconds=float(os.getenv("MARKET_CALENDAR_REFRESH_SECONDS", str(24 * 3600))),
+)
@@ -0,0 +1,232 @@
+# backend/services/market_stream.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from dependencies import get_alpaca_stock_data_stream, get_alpaca_crypto_data_stream
+
+logger = logging.getLogger(__name__)
+
+
+def _iso(ts: Optional[datetime]) -> str:
+    return ts.isoformat() if ts else datetime.now(timezone.utc).isoformat()
+
+
+class _StreamFeed:
+    """One Alpaca data stream (stock or crypto) running on its own thread."""
+
+    def __init__(self, name: str, factory, max_symbols: int, ingester: "MarketStreamIngester"):
+        self.name = name
+        self.factory = factory
+        self.max_symbols = max_symbols
+        self.ingester = ingester
+        self.stream = None
+        self.thread: Optional[threading.Thread] = None
+        # subscribed symbols -> when a request last watched them, least recently watched first
+        self.symbols: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    @property
+    def connected(self) -> bool:
+        # alpaca-py reconnects inside the same thread; _running is False while it does
+        return self.alive and bool(getattr(self.stream, "_running", True))
+
+    def update(self, subscribe: List[str], unsubscribe: List[str]) -> None:
+        """Change the subscription; blocks until the stream thread acknowledges, so call off-loop."""
+        with self._lock:
+            if self.stream is None:
+                self.stream = self.factory()
+            if unsubscribe and self.alive:
+                self.stream.unsubscribe_quotes(*unsubscribe)
+                self.stream.unsubscribe_trades(*unsubscribe)
+                self.stream.unsubscribe_daily_bars(*unsubscribe)
+            if subscribe:
+                self.stream.subscribe_quotes(self.ingester._on_quote, *subscribe)
+                self.stream.subscribe_trades(self.ingester._on_trade, *subscribe)
+                self.stream.subscribe_daily_bars(self.ingester._on_daily_bar, *subscribe)
+            # the stream does not connect until it has something to subscribe to
+            if self.thread is None and subscribe:
+                self.thread = threading.Thread(target=self._run, name=f"alpaca-{self.name}-stream", daemon=True)
+                self.thread.start()
+
+    def _run(self) -> None:
+        try:
+            self.stream.run()
+        except Exception:
+            logger.exception(f"Alpaca {self.name} stream stopped")
+
+    def stop(self) -> None:
+        if self.stream is not None and self.alive:
+            try:
+                self.stream.stop()
+            except Exception as e:
+                logger.warning(f"Error stopping Alpaca {self.name} stream: {e}")
+            self.thread.join(timeout=5)
+
+
+class MarketStreamIngester:
+    """Keeps the last quote, trade and daily bar per symbol from Alpaca's data streams.
+
+    The tables are plain dicts of (received_at, value) written from the stream
+    threads by whole-value assignment, so readers on the event loop never take a
+    lock. Values older than max_age_seconds (or any value while the feed is
+    reconnecting) are not served, so callers fall back to REST. The subscription
+    follows what requests watch: when a feed is full, symbols nobody has watched
+    for idle_seconds are unsubscribed, least recently watched first.
+    """
+
+    # Alpaca sends daily bar updates once a minute while the market is open
+    DAILY_BAR_MAX_AGE = 120.0
+
+    def __init__(self, max_symbols: int = 30, max_age_seconds: float = 15.0, idle_seconds: float = 120.0):
+        self.enabled = False
+        self.max_age_seconds = max_age_seconds
+        self.idle_seconds = idle_seconds
+        self.last_quotes: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self.last_trades: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self.daily_bars: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._stock = _StreamFeed("stock", get_alpaca_stock_data_stream, max_symbols, self)
+        self._crypto = _StreamFeed("crypto", get_alpaca_crypto_data_stream, max_symbols, self)
+        self._pending: Set[asyncio.Future] = set()
+
+    def start(self, stock_symbols: Iterable[str] = (), crypto_symbols: Iterable[str] = ()) -> None:
+        if os.getenv("MARKET_STREAM_ENABLED", "true").lower() in ("0", "false", "no"):
+            logger.info("Market data stream disabled by MARKET_STREAM_ENABLED")
+            return
+        if not os.getenv("ALPACA_API_KEY") or not os.getenv("ALPACA_SECRET_KEY"):
+            logger.warning("Alpaca API credentials missing; market data stream not started")
+            return
+        self.enabled = True
+        self.watch(stock_symbols, crypto_symbols)
+
+    async def stop(self) -> None:
+        self.enabled = False
+        for fut in list(self._pending):
+            fut.cancel()
+        await asyncio.gather(
+            asyncio.to_thread(self._stock.stop),
+            asyncio.to_thread(self._crypto.stop),
+        )
+
+    def _feed(self, symbol: str) -> _StreamFeed:
+        return self._crypto if "/" in symbol else self._stock
+
+    def is_subscribed(self, symbol: str) -> bool:
+        feed = self._feed(symbol)
+        return symbol in feed.symbols and feed.connected
+
+    def watch(self, stock_symbols: Iterable[str] = (), crypto_symbols: Iterable[str] = ()) -> None:
+        """Mark symbols as watched and subscribe new ones without waiting for the subscription."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        for feed, symbols in ((self._stock, stock_symbols), (self._crypto, crypto_symbols)):
+            new = []
+            for s in dict.fromkeys(symbols):
+                if s in feed.symbols:
+                    feed.symbols[s] = now
+                    feed.symbols.move_to_end(s)
+                else:
+                    new.append(s)
+            # make room by dropping symbols nobody has watched for a while
+            evict = []
+            for s, watched_at in feed.symbols.items():
+                if len(feed.symbols) - len(evict) + len(new) <= feed.max_symbols or now - watched_at < self.idle_seconds:
+                    break
+                evict.append(s)
+            new = new[:max(feed.max_symbols - len(feed.symbols) + len(evict), 0)]
+            if not new and not evict:
+                continue
+            for s in evict:
+                del feed.symbols[s]
+            for s in new:
+                feed.symbols[s] = now
+            self._schedule(feed, new, evict)
+
+    def _schedule(self, feed: _StreamFeed, subscribe: List[str], unsubscribe: List[str]) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            feed.update(subscribe, unsubscribe)
+            return
+        fut = loop.run_in_executor(None, feed.update, subscribe, unsubscribe)
+        self._pending.add(fut)
+
+        def _done(f: asyncio.Future) -> None:
+            self._pending.discard(f)
+            if not f.cancelled() and f.exception():
+                logger.error(f"Error updating {feed.name} subscription (+{subscribe} -{unsubscribe}): {f.exception()}")
+                for s in subscribe:
+                    feed.symbols.pop(s, None)
+
+        fut.add_done_callback(_done)
+
+    # --- table readers ---
+    def _fresh(self, table: Dict[str, Tuple[float, Dict[str, Any]]], symbol: str, max_age: float) -> Optional[Dict[str, Any]]:
+        entry = table.get(symbol)
+        if entry is None or time.monotonic() - entry[0] > max_age or not self.is_subscribed(symbol):
+            return None
+        return entry[1]
+
+    def quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return self._fresh(self.last_quotes, symbol, self.max_age_seconds)
+
+    def trade(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return self._fresh(self.last_trades, symbol, self.max_age_seconds)
+
+    def daily_bar(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return self._fresh(self.daily_bars, symbol, max(self.max_age_seconds, self.DAILY_BAR_MAX_AGE))
+
+    # --- stream handlers (run on the stream threads) ---
+    async def _on_quote(self, q) -> None:
+        crypto = "/" in q.symbol
+        self.last_quotes[q.symbol] = time.monotonic(), {
+            "bid_price": float(q.bid_price or 0),
+            "ask_price": float(q.ask_price or 0),
+            "bid_size": float(q.bid_size or 0) if crypto else int(q.bid_size or 0),
+            "ask_size": float(q.ask_size or 0) if crypto else int(q.ask_size or 0),
+            "timestamp": _iso(q.timestamp),
+            "source": "alpaca:crypto-stream" if crypto else "alpaca:iex-stream",
+        }
+
+    async def _on_trade(self, t) -> None:
+        self.last_trades[t.symbol] = time.monotonic(), {
+            "price": float(t.price or 0),
+            "size": float(t.size or 0),
+            "timestamp": _iso(t.timestamp),
+        }
+
+    async def _on_daily_bar(self, b) -> None:
+        self.daily_bars[b.symbol] = time.monotonic(), {
+            "open": float(b.open or 0),
+            "high": float(b.high or 0),
+            "low": float(b.low or 0),
+            "close": float(b.close or 0),
+            "volume": float(b.volume or 0) if "/" in b.symbol else int(b.volume or 0),
+            "timestamp": _iso(b.timestamp),
+        }
+
+
+market_stream = MarketStreamIngester(
+    max_symbols=int(os.getenv("MARKET_STREAM_MAX_SYMBOLS", "30")),
+    max_age_seconds=float(os.getenv("MARKET_STREAM_MAX_AGE_SECONDS", "15")),
+    idle_seconds=float(os.getenv("MARKET_STREAM_IDLE_SECONDS", "120")),
+)
+
+
+def _env_symbols(name: str) -> List[str]:
+    return [s.strip().upper() for s in os.getenv(name, "").split(",") if s.strip()]
+
+
+def start_market_stream() -> None:
+    """Start the ingester with the symbols configured for the deployment."""
+    market_stream.start(_env_symbols("MARKET_STREAM_STOCKS"), _env_symbols("MARKET_STREAM_CRYPTO"))
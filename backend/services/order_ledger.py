@@ -0,0 +1,275 @@
+# backend/services/order_ledger.py
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from services.executor import run_blocking
+from services.pnl import Fill
+from services.repositories import OrderLedgerRepository
+
+logger = logging.getLogger(__name__)
+
+# orders in these states will not change any further
+TERMINAL_STATUSES = {"filled", "canceled", "expired", "replaced", "rejected"}
+
+ORDER_FIELDS = (
+    "order_id", "client_order_id", "symbol", "side", "order_type", "time_in_force", "status",
+    "qty", "notional", "filled_qty", "filled_avg_price", "limit_price", "stop_price",
+    "created_at", "submitted_at", "updated_at", "filled_at", "canceled_at", "expired_at",
+)
+_NUMERIC_FIELDS = ("qty", "notional", "filled_qty", "filled_avg_price", "limit_price", "stop_price")
+_TIME_FIELDS = ("created_at", "submitted_at", "updated_at", "filled_at", "canceled_at", "expired_at")
+
+_PAGE_SIZE = 500
+# filled quantities below this are float residue, not a new execution
+_FILL_EPS = 1e-9
+# Alpaca's `after` is exclusive: step back a microsecond so orders sharing a timestamp are not lost
+_CURSOR_OVERLAP = timedelta(microseconds=1)
+
+
+def _iso(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def _epoch(value: Optional[str]) -> float:
+    return datetime.fromisoformat(value).timestamp() if value else 0.0
+
+
+def _num(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _enum(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return str(getattr(value, "value", value)).lower()
+
+
+def order_row(order: Any) -> Dict[str, Any]:
+    """Ledger row for an alpaca-py Order, or the raw order dict of a trade-updates event."""
+    if isinstance(order, dict):
+        get = order.get
+    else:
+        def get(field):
+            return getattr(order, field, None)
+    row: Dict[str, Any] = {
+        "order_id": str(get("id")),
+        "client_order_id": get("client_order_id"),
+        "symbol": get("symbol"),
+        "side": _enum(get("side")),
+        "order_type": _enum(get("order_type") or get("type")),
+        "time_in_force": _enum(get("time_in_force")),
+        "status": _enum(get("status")),
+    }
+    for field in _NUMERIC_FIELDS:
+        row[field] = _num(get(field))
+    for field in _TIME_FIELDS:
+        row[field] = _iso(get(field))
+    return row
+
+
+def normalize_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Stored row -> the same shape order_row produces, so equal orders compare equal."""
+    out = {field: row.get(field) for field in ORDER_FIELDS}
+    for field in _NUMERIC_FIELDS:
+        out[field] = _num(out[field])
+    for field in _TIME_FIELDS:
+        out[field] = _iso(out[field])
+    return out
+
+
+def row_fill(row: Dict[str, Any], prior: Tuple[float, float] = (0.0, 0.0)) -> Optional[Fill]:
+    """What an order executed beyond `prior` (filled qty, avg price) as one fill, or None.
+
+    Working orders count too: a partially filled order contributes what has
+    filled so far, and each later read adds only the newly filled quantity, at
+    the price implied by the change in the average fill price.
+    """
+    qty = row.get("filled_qty") or 0.0
+    avg = row.get("filled_avg_price") or 0.0
+    prior_qty, prior_avg = prior
+    delta = qty - prior_qty
+    if delta <= _FILL_EPS or avg <= 0:
+        return None
+    price = (avg * qty - prior_avg * prior_qty) / delta
+    filled_at = row.get("filled_at") or row.get("updated_at") or row.get("submitted_at")
+    return Fill(
+        id=f"{row['order_id']}:{qty!r}",
+        symbol=row["symbol"],
+        ts=_epoch(filled_at),
+        qty=delta if row["side"] == "buy" else -delta,
+        price=price if price > 0 else avg,
+        order_id=row["order_id"],
+    )
+
+
+class OrderLedger:
+    """Every order of one account, mirrored from Alpaca and persisted to Supabase.
+
+    The first use loads the persisted rows. Each sync then pages orders
+    submitted after the newest one already known (the `after` cursor) and
+    re-reads the few orders still working, so a sync costs a handful of
+    upstream calls no matter how long the history is. Executions, including
+    partial fills of working orders, are appended to `fills`, an append-only
+    log consumers can follow by offset.
+    """
+
+    def __init__(self, user_id: str, account_id: Optional[str], min_sync_interval: float = 5.0):
+        self.user_id = user_id
+        self.account_id = account_id
+        self.min_sync_interval = min_sync_interval
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.fills: List[Fill] = []
+        self.lock = asyncio.Lock()
+        self.loaded = False
+        self.synced_at = 0.0
+        # set while a trade-updates stream feeds this ledger; polling Alpaca is then unnecessary
+        self.live = False
+        self._submitted: Dict[str, float] = {}
+        # order_id -> (filled qty, avg price) already appended to fills
+        self._filled: Dict[str, Tuple[float, float]] = {}
+        self._newest_submitted = 0.0
+        self._by_time: Optional[List[str]] = None
+
+    def apply(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge normalized order rows; returns the rows that changed."""
+        changed = []
+        for row in rows:
+            order_id = row["order_id"]
+            old = self.orders.get(order_id)
+            if old == row:
+                continue
+            if old is not None and old["status"] in TERMINAL_STATUSES and row["status"] not in TERMINAL_STATUSES:
+                # a late, stale read of an order that already finished
+                continue
+            self.orders[order_id] = row
+            changed.append(row)
+            submitted = _epoch(row["submitted_at"] or row["created_at"])
+            if self._submitted.get(order_id) != submitted:
+                self._submitted[order_id] = submitted
+                self._newest_submitted = max(self._newest_submitted, submitted)
+                self._by_time = None
+            fill = row_fill(row, self._filled.get(order_id, (0.0, 0.0)))
+            if fill:
+                self.fills.append(fill)
+                self._filled[order_id] = (row["filled_qty"], row["filled_avg_price"])
+        return changed
+
+    async def persist(self, rows: List[Dict[str, Any]], repo: OrderLedgerRepository) -> None:
+        if rows:
+            synced_at = datetime.now(timezone.utc).isoformat()
+            await repo.upsert([
+                dict(row, user_id=self.user_id, account_id=self.account_id, synced_at=synced_at) for row in rows
+            ])
+
+    async def load(self, repo: OrderLedgerRepository) -> None:
+        rows = await repo.list_for_account(self.user_id, self.account_id)
+        self.apply(normalize_row(row) for row in rows)
+        self.loaded = True
+
+    async def ensure_loaded(self, repo: OrderLedgerRepository) -> None:
+        async with self.lock:
+            if not self.loaded:
+                await self.load(repo)
+
+    async def sync(self, trading_client: Any, repo: OrderLedgerRepository, force: bool = False) -> int:
+        """Bring the ledger up to date with Alpaca; returns how many orders changed."""
+        from alpaca.common.enums import Sort
+        from alpaca.trading.enums import QueryOrderStatus
+        from alpaca.trading.requests import GetOrdersRequest
+
+        async with self.lock:
+            if not self.loaded:
+                await self.load(repo)
+            if not force and (self.live or time.monotonic() - self.synced_at < self.min_sync_interval):
+                return 0
+
+            changed: List[Dict[str, Any]] = []
+            seen = set()
+            after = (
+                datetime.fromtimestamp(self._newest_submitted, timezone.utc) - _CURSOR_OVERLAP
+                if self._newest_submitted else None
+            )
+            while True:
+                page = await run_blocking(
+                    trading_client.get_orders,
+                    GetOrdersRequest(status=QueryOrderStatus.ALL, after=after, direction=Sort.ASC, limit=_PAGE_SIZE),
+                ) or []
+                rows = [order_row(o) for o in page]
+                seen.update(row["order_id"] for row in rows)
+                changed.extend(self.apply(rows))
+                if len(page) < _PAGE_SIZE:
+                    break
+                last = rows[-1]
+                next_after = datetime.fromisoformat(last["submitted_at"] or last["created_at"]) - _CURSOR_OVERLAP
+                if after is not None and next_after <= after:
+                    break
+                after = next_after
+
+            # orders submitted before the cursor that were still working last time
+            working = [oid for oid, row in self.orders.items() if row["status"] not in TERMINAL_STATUSES and oid not in seen]
+            results = await asyncio.gather(
+                *(run_blocking(trading_client.get_order_by_id, oid) for oid in working), return_exceptions=True
+            )
+            for oid, result in zip(working, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Could not refresh working order {oid}: {result}")
+                else:
+                    changed.extend(self.apply([order_row(result)]))
+
+            await self.persist(changed, repo)
+            self.synced_at = time.monotonic()
+            return len(changed)
+
+    def history(self, start: Optional[float] = None, end: Optional[float] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Orders submitted in [start, end] (epoch seconds), newest first."""
+        if self._by_time is None:
+            self._by_time = sorted(self._submitted, key=self._submitted.__getitem__, reverse=True)
+        out = []
+        for order_id in self._by_time:
+            submitted = self._submitted[order_id]
+            if end is not None and submitted > end:
+                continue
+            if start is not None and submitted < start:
+                break
+            out.append(self.orders[order_id])
+            if limit is not None and len(out) >= limit:
+                break
+        return out
+
+
+class OrderLedgers:
+    """Bounded per-(user, account) cache of order ledgers, least recently used evicted first."""
+
+    def __init__(self, max_entries: int = 1000, min_sync_interval: float = 5.0):
+        self.max_entries = max_entries
+        self.min_sync_interval = min_sync_interval
+        self._ledgers: "OrderedDict[Tuple[str, Optional[str]], OrderLedger]" = OrderedDict()
+
+    def get(self, user_id: str, account_id: Optional[str]) -> OrderLedger:
+        key = (user_id, account_id)
+        ledger = self._ledgers.get(key)
+        if ledger is None:
+            ledger = self._ledgers[key] = OrderLedger(user_id, account_id, self.min_sync_interval)
+            while len(self._ledgers) > self.max_entries:
+                self._ledgers.popitem(last=False)
+        self._ledgers.move_to_end(key)
+        return ledger
+
+    def invalidate(self, user_id: str) -> None:
+        for key in [k for k in self._ledgers if k[0] == user_id]:
+            del self._ledgers[key]
+
+
+order_ledgers = OrderLedgers(
+    max_entries=int(os.getenv("ORDER_LEDGER_CACHE_MAX_ENTRIES", "1000")),
+    min_sync_interval=float(os.getenv("ORDER_LEDGER_SYNC_INTERVAL_SECONDS", "5")),
+)
@@ -0,0 +1,353 @@
+# backend/services/pnl.py
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+COST_BASIS_METHODS = ("fifo", "lifo", "average")
+SECONDS_PER_DAY = 86400.0
+# quantities below this are rounding residue from fractional fills, not open lots
+_QTY_EPS = 1e-9
+
+
+class Fill(NamedTuple):
+    id: str
+    symbol: str
+    ts: float  # epoch seconds
+    qty: float  # signed: buys positive, sells negative
+    price: float
+    order_id: str = ""  # the order this fill executed, when an order fills in parts; defaults to id
+
+
+class Lots(NamedTuple):
+    """Open lots of one symbol in opening order; qty is signed (short lots are negative)."""
+
+    ts: np.ndarray
+    qty: np.ndarray
+    price: np.ndarray
+
+
+class Matched(NamedTuple):
+    """Per-fill result of matching: realized P&L, quantity closed and quantity * seconds held."""
+
+    pnl: np.ndarray
+    closed: np.ndarray
+    held: np.ndarray
+    lots: Lots
+
+
+def _empty_lots() -> Lots:
+    return Lots(np.empty(0), np.empty(0), np.empty(0))
+
+
+def _split(qty: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Split each signed fill into the amount closing the prior position and the amount opening one.
+
+    A fill that flips the position (long 5, sell 8) closes 5 and opens 3 short.
+    """
+    position = np.cumsum(qty)
+    prior = position - qty
+    prior[np.abs(prior) < _QTY_EPS] = 0.0
+    reducing = np.sign(qty) * np.sign(prior) < 0
+    close_amt = np.where(reducing, np.minimum(np.abs(qty), np.abs(prior)), 0.0)
+    return close_amt, np.abs(qty) - close_amt
+
+
+def _match_fifo(ts: np.ndarray, qty: np.ndarray, price: np.ndarray) -> Matched:
+    """FIFO matching as an intersection of cumulative quantities.
+
+    |position| is always opened - closed, and a position returns to zero before
+    it flips, so under FIFO the k-th closed unit is the k-th opened unit across
+    the whole history. Merging the cumulative opened and closed quantities gives
+    every (opening fill, closing fill, quantity) match without walking lots.
+    """
+    n = len(qty)
+    close_amt, open_amt = _split(qty)
+    opened = np.cumsum(open_amt)
+    closed = np.cumsum(close_amt)
+    total_closed = closed[-1] if n else 0.0
+
+    cuts = np.unique(np.concatenate((opened, closed)))
+    cuts = cuts[(cuts > 0) & (cuts <= total_closed + _QTY_EPS)]
+    starts = np.concatenate(([0.0], cuts[:-1]))
+    size = cuts - starts
+    keep = size > _QTY_EPS * max(1.0, total_closed)
+    starts, size = starts[keep], size[keep]
+    mid = starts + size / 2
+    oi = np.minimum(np.searchsorted(opened, mid, side="right"), n - 1)
+    ci = np.minimum(np.searchsorted(closed, mid, side="right"), n - 1)
+
+    direction = np.sign(qty[oi])
+    pnl = np.bincount(ci, weights=size * (price[ci] - price[oi]) * direction, minlength=n)
+    closed_qty = np.bincount(ci, weights=size, minlength=n)
+    held = np.bincount(ci, weights=size * (ts[ci] - ts[oi]), minlength=n)
+
+    # whatever was opened beyond the total closed is still open
+    remaining = opened - np.maximum(opened - open_amt, total_closed)
+    still_open = remaining > _QTY_EPS
+    lots = Lots(ts[still_open], (np.sign(qty) * remaining)[still_open], price[still_open])
+    return Matched(pnl, closed_qty, held, lots)
+
+
+def _match_walk(ts: np.ndarray, qty: np.ndarray, price: np.ndarray, method: str) -> Matched:
+    """LIFO and average cost walk the fills once; the open position is a short list of lots.
+
+    Average cost keeps a single lot carrying the quantity-weighted price and open time.
+    """
+    n = len(qty)
+    close_amt, open_amt = _split(qty)
+    pnl = np.zeros(n)
+    held = np.zeros(n)
+    lots: List[List[float]] = []  # [ts, abs qty, price], oldest first
+    direction = 0.0
+    for i in range(n):
+        c = close_amt[i]
+        while c > _QTY_EPS and lots:
+            lot = lots[-1] if method == "lifo" else lots[0]
+            take = min(c, lot[1])
+            pnl[i] += take * (price[i] - lot[2]) * direction
+            held[i] += take * (ts[i] - lot[0])
+            lot[1] -= take
+            c -= take
+            if lot[1] <= _QTY_EPS:
+                lots.pop(-1 if method == "lifo" else 0)
+        if open_amt[i] > _QTY_EPS:
+            direction = np.sign(qty[i])
+            if method == "average" and lots:
+                lot = lots[0]
+                total = lot[1] + open_amt[i]
+                lot[0] = (lot[0] * lot[1] + ts[i] * open_amt[i]) / total
+                lot[2] = (lot[2] * lot[1] + price[i] * open_amt[i]) / total
+                lot[1] = total
+            else:
+                lots.append([ts[i], open_amt[i], price[i]])
+    arr = np.array(lots, dtype=float).reshape(-1, 3)
+    return Matched(pnl, close_amt, held, Lots(arr[:, 0], arr[:, 1] * direction, arr[:, 2]))
+
+
+def match_fills(ts: np.ndarray, qty: np.ndarray, price: np.ndarray, method: str = "fifo", lots: Optional[Lots] = None) -> Matched:
+    """Match time-ordered fills of one symbol into lots, starting from the given open lots.
+
+    Returned arrays are per input fill; the carried-in lots are not part of them.
+    """
+    if lots is not None and len(lots.qty):
+        carried = len(lots.qty)
+        ts = np.concatenate((lots.ts, ts))
+        qty = np.concatenate((lots.qty, qty))
+        price = np.concatenate((lots.price, price))
+    else:
+        carried = 0
+    if not len(qty):
+        return Matched(np.empty(0), np.empty(0), np.empty(0), _empty_lots())
+    m = _match_fifo(ts, qty, price) if method == "fifo" else _match_walk(ts, qty, price, method)
+    return Matched(m.pnl[carried:], m.closed[carried:], m.held[carried:], m.lots)
+
+
+class _SymbolBook:
+    """All fills of one symbol, their per-fill results and the lots still open."""
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.orders: List[str] = []
+        self.ts = np.empty(0)
+        self.qty = np.empty(0)
+        self.price = np.empty(0)
+        self.pnl = np.empty(0)
+        self.closed = np.empty(0)
+        self.held = np.empty(0)
+        self.lots = _empty_lots()
+
+    def add(self, fills: List[Fill], method: str) -> None:
+        ts = np.array([f.ts for f in fills], dtype=float)
+        qty = np.array([f.qty for f in fills], dtype=float)
+        price = np.array([f.price for f in fills], dtype=float)
+        order = np.argsort(ts, kind="stable")
+        ts, qty, price = ts[order], qty[order], price[order]
+        ids = [fills[i].id for i in order]
+        orders = [fills[i].order_id or fills[i].id for i in order]
+
+        if len(self.ts) and ts[0] < self.ts[-1]:
+            # a fill older than ones already matched: rematch the symbol from scratch
+            all_ts = np.concatenate((self.ts, ts))
+            order = np.argsort(all_ts, kind="stable")
+            all_ids = self.ids + ids
+            all_orders = self.orders + orders
+            self.ids = [all_ids[i] for i in order]
+            self.orders = [all_orders[i] for i in order]
+            self.ts = all_ts[order]
+            self.qty = np.concatenate((self.qty, qty))[order]
+            self.price = np.concatenate((self.price, price))[order]
+            m = match_fills(self.ts, self.qty, self.price, method)
+            self.pnl, self.closed, self.held, self.lots = m
+            return
+
+        # only the new fills and the open lots they can touch are matched
+        m = match_fills(ts, qty, price, method, self.lots)
+        self.ids.extend(ids)
+        self.orders.extend(orders)
+        self.ts = np.concatenate((self.ts, ts))
+        self.qty = np.concatenate((self.qty, qty))
+        self.price = np.concatenate((self.price, price))
+        self.pnl = np.concatenate((self.pnl, m.pnl))
+        self.closed = np.concatenate((self.closed, m.closed))
+        self.held = np.concatenate((self.held, m.held))
+        self.lots = m.lots
+
+
+class PnLBook:
+    """Realized P&L of one account under one cost-basis method, updated incrementally.
+
+    Fills are grouped per symbol; adding fills only rematches the symbols they
+    belong to, starting from those symbols' open lots. Every fill has a result,
+    with zero P&L for fills that only open a position.
+    """
+
+    def __init__(self, method: str = "fifo"):
+        if method not in COST_BASIS_METHODS:
+            raise ValueError(f"Unknown cost basis '{method}'; use one of {', '.join(COST_BASIS_METHODS)}")
+        self.method = method
+        self._symbols: Dict[str, _SymbolBook] = {}
+        self._seen: set = set()
+        self._by_order: Optional[Dict[str, float]] = None
+        # the fill log this book follows (OrderLedger.fills) and how much of it is applied
+        self.fill_source: Optional[Any] = None
+        self.fills_applied = 0
+
+    def __contains__(self, fill_id: str) -> bool:
+        return fill_id in self._seen
+
+    def add(self, fills: Iterable[Fill]) -> int:
+        """Apply fills not seen before; returns how many were new."""
+        grouped: Dict[str, List[Fill]] = {}
+        for f in fills:
+            if f.id in self._seen or abs(f.qty) <= _QTY_EPS:
+                continue
+            self._seen.add(f.id)
+            grouped.setdefault(f.symbol, []).append(f)
+        for symbol, symbol_fills in grouped.items():
+            self._symbols.setdefault(symbol, _SymbolBook()).add(symbol_fills, self.method)
+        if grouped:
+            self._by_order = None
+        return sum(len(v) for v in grouped.values())
+
+    def follow(self, source: Any, fills: List[Fill]) -> int:
+        """Apply the part of an append-only fill log not applied yet; returns how many fills were new.
+
+        Switching to another log (a reloaded ledger, another account) rebuilds the
+        book from that log, since its fills need not split orders the same way.
+        """
+        if self.fill_source is not source:
+            self._symbols, self._seen, self._by_order = {}, set(), None
+            self.fill_source, self.fills_applied = source, 0
+        added = self.add(fills[self.fills_applied:])
+        self.fills_applied = len(fills)
+        return added
+
+    def realized(self, order_id: str) -> float:
+        """Realized P&L booked by all fills of one order (0.0 for opening or unknown orders)."""
+        if self._by_order is None:
+            self._by_order = {}
+            for book in self._symbols.values():
+                for oid, pnl in zip(book.orders, book.pnl.tolist()):
+                    if pnl:
+                        self._by_order[oid] = self._by_order.get(oid, 0.0) + pnl
+        return self._by_order.get(order_id, 0.0)
+
+    def trades(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Dict[str, Any]]:
+        """One record per closing fill, oldest first."""
+        out: List[Dict[str, Any]] = []
+        for symbol, book in self._symbols.items():
+            mask = self._window(book, start, end)
+            for i in np.flatnonzero(mask):
+                out.append({
+                    "id": book.ids[i],
+                    "order_id": book.orders[i],
+                    "symbol": symbol,
+                    "side": "long" if book.qty[i] < 0 else "short",
+                    "quantity": float(book.closed[i]),
+                    "price": float(book.price[i]),
+                    "closed_at": float(book.ts[i]),
+                    "profit_loss": float(book.pnl[i]),
+                    "holding_days": float(book.held[i] / book.closed[i] / SECONDS_PER_DAY),
+                })
+        out.sort(key=lambda t: t["closed_at"])
+        return out
+
+    @staticmethod
+    def _window(book: _SymbolBook, start: Optional[float], end: Optional[float]) -> np.ndarray:
+        mask = book.closed > _QTY_EPS
+        if start is not None:
+            mask &= book.ts >= start
+        if end is not None:
+            mask &= book.ts <= end
+        return mask
+
+    def stats(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, Any]:
+        """Aggregate realized stats over closing fills in [start, end] (epoch seconds)."""
+        pnl_parts, held_parts, closed_parts = [], [], []
+        for book in self._symbols.values():
+            mask = self._window(book, start, end)
+            pnl_parts.append(book.pnl[mask])
+            held_parts.append(book.held[mask])
+            closed_parts.append(book.closed[mask])
+        pnl = np.concatenate(pnl_parts) if pnl_parts else np.empty(0)
+        held = np.concatenate(held_parts) if held_parts else np.empty(0)
+        closed = np.concatenate(closed_parts) if closed_parts else np.empty(0)
+
+        wins = pnl[pnl > 0]
+        losses = pnl[pnl < 0]
+        gross_profit = float(wins.sum())
+        gross_loss = float(losses.sum())
+        count = len(pnl)
+        return {
+            "closed_trades": count,
+            "realized_pnl": float(pnl.sum()),
+            "winning_trades": len(wins),
+            "losing_trades": len(losses),
+            "win_rate": len(wins) / count if count else 0.0,
+            "gross_profit": gross_profit,
+            "gross_loss": gross_loss,
+            "profit_factor": gross_profit / -gross_loss if gross_loss else None,
+            "average_win": float(wins.mean()) if len(wins) else 0.0,
+            "average_loss": float(losses.mean()) if len(losses) else 0.0,
+            "largest_win": float(wins.max()) if len(wins) else 0.0,
+            "largest_loss": float(losses.min()) if len(losses) else 0.0,
+            # average over every closed unit, so each closing fill counts by the quantity it closed
+            "avg_holding_days": float(held.sum() / closed.sum() / SECONDS_PER_DAY) if count else 0.0,
+        }
+
+    def open_positions(self) -> Dict[str, Dict[str, float]]:
+        """Open quantity (signed) and cost-basis price per symbol."""
+        out: Dict[str, Dict[str, float]] = {}
+        for symbol, book in self._symbols.items():
+            qty = float(book.lots.qty.sum())
+            if abs(qty) > _QTY_EPS:
+                cost = float((np.abs(book.lots.qty) * book.lots.price).sum())
+                out[symbol] = {"quantity": qty, "cost_basis": cost / abs(qty)}
+        return out
+
+
+class PnLBooks:
+    """Bounded per-(user, method) cache of P&L books, least recently used evicted first."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._books: "OrderedDict[Tuple[str, str], PnLBook]" = OrderedDict()
+
+    def get(self, user_id: str, method: str = "fifo") -> PnLBook:
+        key = (user_id, method)
+        book = self._books.get(key)
+        if book is None:
+            book = self._books[key] = PnLBook(method)
+            while len(self._books) > self.max_entries:
+                self._books.popitem(last=False)
+        self._books.move_to_end(key)
+        return book
+
+    def invalidate(self, user_id: str) -> None:
+        for key in [k for k in self._books if k[0] == user_id]:
+            del self._books[key]
+
+
+pnl_books = PnLBooks(max_entries=int(os.getenv("PNL_BOOK_CACHE_MAX_ENTRIES", "1000")))
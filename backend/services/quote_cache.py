@@ -0,0 +1,154 @@
+# backend/services/quote_cache.py
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from services.market_calendar import market_calendar
+
+Fetcher = Callable[[List[str]], Awaitable[Dict[str, Any]]]
+
+
+class QuoteCache:
+    """Process-wide TTL cache for upstream quotes, keyed by normalized symbol.
+
+    Concurrent misses for the same symbol share one upstream call (single-flight),
+    and a multi-symbol lookup only sends the symbols that are not cached or
+    already in flight to the fetcher.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 5.0,
+        max_entries: int = 10000,
+        ttl_for: Optional[Callable[[str], float]] = None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # optional per-key TTL policy, evaluated when a value is stored
+        self.ttl_for = ttl_for
+        self._entries: Dict[str, Tuple[float, Any, float]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.upstream_calls = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key if it is still fresh."""
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < entry[2]:
+            return entry[1]
+        return None
+
+    def last_known(self, keys: Iterable[str]) -> Dict[str, Tuple[float, Any]]:
+        """Last stored value per key regardless of TTL, as (age_seconds, value).
+
+        Expired entries stay around until evicted, so this is the last-known-good
+        fallback while upstream is unavailable.
+        """
+        now = time.monotonic()
+        out: Dict[str, Tuple[float, Any]] = {}
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry:
+                out[key] = (now - entry[0], entry[1])
+        return out
+
+    def set(self, key: str, value: Any) -> None:
+        # re-insert so dict order tracks store time and eviction drops the oldest
+        self._entries.pop(key, None)
+        ttl = self.ttl_for(key) if self.ttl_for else self.ttl_seconds
+        self._entries[key] = (time.monotonic(), value, ttl)
+        while len(self._entries) > self.max_entries:
+            self._entries.pop(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "upstream_calls": self.upstream_calls,
+        }
+
+    async def get_many(self, keys: Iterable[str], fetcher: Fetcher) -> Dict[str, Any]:
+        """Resolve keys from cache, joining in-flight fetches and fetching the rest once.
+
+        Keys the fetcher does not return are left out of the result and are not cached.
+        Fetcher exceptions propagate to every caller waiting on that fetch.
+        """
+        result: Dict[str, Any] = {}
+        waiting: Dict[asyncio.Future, List[str]] = {}
+        missing: List[str] = []
+
+        for key in dict.fromkeys(keys):
+            value = self.get(key)
+            if value is not None:
+                self.hits += 1
+                result[key] = value
+                continue
+            self.misses += 1
+            fut = self._inflight.get(key)
+            if fut is not None:
+                waiting.setdefault(fut, []).append(key)
+            else:
+                missing.append(key)
+
+        if missing:
+            result.update(await self._fetch(missing, fetcher))
+
+        for fut, fut_keys in waiting.items():
+            try:
+                fetched = await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                if not fut.cancelled():
+                    raise
+                # the leading request was cancelled; fetch these keys ourselves
+                fetched = await self.get_many(fut_keys, fetcher)
+            for key in fut_keys:
+                if key in fetched:
+                    result[key] = fetched[key]
+
+        return result
+
+    async def _fetch(self, keys: List[str], fetcher: Fetcher) -> Dict[str, Any]:
+        fut = asyncio.get_running_loop().create_future()
+        for key in keys:
+            self._inflight[key] = fut
+        try:
+            self.upstream_calls += 1
+            fetched = await fetcher(keys)
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # mark retrieved so an unwatched future does not log
+            raise
+        else:
+            for key, value in fetched.items():
+                self.set(key, value)
+            fut.set_result(fetched)
+            return {key: fetched[key] for key in keys if key in fetched}
+        finally:
+            for key in keys:
+                if self._inflight.get(key) is fut:
+                    del self._inflight[key]
+
+
+def session_ttl(base_ttl: float) -> Callable[[str], float]:
+    """TTL policy following the equity session; crypto pairs ("BTC/USD") trade 24/7 and keep base_ttl."""
+
+    def ttl_for(key: str) -> float:
+        return base_ttl if "/" in key else market_calendar.equity_ttl(base_ttl)
+
+    return ttl_for
+
+
+QUOTE_CACHE_TTL_SECONDS = float(os.getenv("QUOTE_CACHE_TTL_SECONDS", "5"))
+SNAPSHOT_CACHE_TTL_SECONDS = float(os.getenv("SNAPSHOT_CACHE_TTL_SECONDS", "5"))
+quote_cache = QuoteCache(QUOTE_CACHE_TTL_SECONDS, ttl_for=session_ttl(QUOTE_CACHE_TTL_SECONDS))
+snapshot_cache = QuoteCache(SNAPSHOT_CACHE_TTL_SECONDS, ttl_for=session_ttl(SNAPSHOT_CACHE_TTL_SECONDS))
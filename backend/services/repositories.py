@@ -0,0 +1,211 @@
+# backend/services/repositories.py
+from typing import Any, Dict, List, Optional
+
+from supabase import Client
+
+from services.executor import run_db
+
+# supabase-py's client is synchronous: every .execute() below runs on the bounded
+# database pool, so a handler awaiting the database leaves the event loop free.
+
+
+class StrategyRepository:
+    """trading_strategies rows, always scoped to the owning user."""
+
+    def __init__(self, client: Client):
+        self.client = client
+
+    async def create(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        def query():
+            return self.client.table("trading_strategies").insert(data).select("*").single().execute()
+
+        return (await run_db(query)).data
+
+    async def list_for_user(
+        self,
+        user_id: str,
+        is_active: Optional[bool] = None,
+        strategy_type: Optional[str] = None,
+        risk_level: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        def query():
+            q = self.client.table("trading_strategies").select("*").eq("user_id", user_id)
+            if is_active is not None:
+                q = q.eq("is_active", is_active)
+            if strategy_type:
+                q = q.eq("type", strategy_type)
+            if risk_level:
+                q = q.eq("risk_level", risk_level)
+            if limit is not None:
+                q = q.order("updated_at", desc=True).limit(limit).offset(offset)
+            return q.execute()
+
+        return (await run_db(query)).data or []
+
+    async def get(self, user_id: str, strategy_id: str) -> Optional[Dict[str, Any]]:
+        def query():
+            return (
+                self.client.table("trading_strategies")
+                .select("*")
+                .eq("id", strategy_id)
+                .eq("user_id", user_id)
+                .single()
+                .execute()
+            )
+
+        return (await run_db(query)).data
+
+    async def update(self, user_id: str, strategy_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        def query():
+            return (
+                self.client.table("trading_strategies")
+                .update(data)
+                .eq("id", strategy_id)
+                .eq("user_id", user_id)
+                .select("*")
+                .single()
+                .execute()
+            )
+
+        return (await run_db(query)).data
+
+    async def delete(self, user_id: str, strategy_id: str) -> Optional[List[Dict[str, Any]]]:
+        def query():
+            return (
+                self.client.table("trading_strategies")
+                .delete()
+                .eq("id", strategy_id)
+                .eq("user_id", user_id)
+                .execute()
+            )
+
+        return (await run_db(query)).data
+
+
+class BrokerageAccountRepository:
+    """brokerage_accounts rows: connected brokerages and their OAuth tokens."""
+
+    def __init__(self, client: Client):
+        self.client = client
+
+    async def connected_alpaca_account(self, user_id: str) -> Optional[Dict[str, Any]]:
+        def query():
+            return (
+                self.client.table("brokerage_accounts")
+                .select("*")
+                .eq("user_id", user_id)
+                .eq("brokerage_name", "alpaca")
+                .eq("is_connected", True)
+                .execute()
+            )
+
+        rows = (await run_db(query)).data
+        return rows[0] if rows else None
+
+    async def list_alpaca(self, user_id: str) -> List[Dict[str, Any]]:
+        def query():
+            return (
+                self.client.table("brokerage_accounts")
+                .select("*")
+                .eq("user_id", user_id)
+                .eq("brokerage", "alpaca")
+                .execute()
+            )
+
+        return (await run_db(query)).data or []
+
+    async def get(self, user_id: str, account_id: str) -> Optional[Dict[str, Any]]:
+        def query():
+            return self.client.table("brokerage_accounts").select("*").eq("id", account_id).eq("user_id", user_id).execute()
+
+        rows = (await run_db(query)).data
+        return rows[0] if rows else None
+
+    async def find_by_account_number(self, user_id: str, account_number: str) -> Optional[Dict[str, Any]]:
+        def query():
+            return (
+                self.client.table("brokerage_accounts")
+                .select("*")
+                .eq("user_id", user_id)
+                .eq("account_number", account_number)
+                .execute()
+            )
+
+        rows = (await run_db(query)).data
+        return rows[0] if rows else None
+
+    async def insert(self, data: Dict[str, Any]) -> None:
+        await run_db(lambda: self.client.table("brokerage_accounts").insert(data).execute())
+
+    async def update(self, account_id: str, data: Dict[str, Any]) -> None:
+        await run_db(lambda: self.client.table("brokerage_accounts").update(data).eq("id", account_id).execute())
+
+    async def delete(self, user_id: str, account_id: str) -> None:
+        def query():
+            return self.client.table("brokerage_accounts").delete().eq("id", account_id).eq("user_id", user_id).execute()
+
+        await run_db(query)
+
+    async def connected_alpaca_accounts(self, limit: int) -> List[Dict[str, Any]]:
+        """Every connected Alpaca account with an OAuth token, across users."""
+
+        def query():
+            return (
+                self.client.table("brokerage_accounts")
+                .select("id, user_id, access_token")
+                .eq("brokerage_name", "alpaca")
+                .eq("is_connected", True)
+                .not_.is_("access_token", "null")
+                .limit(limit)
+                .execute()
+            )
+
+        return (await run_db(query)).data or []
+
+    async def due_for_refresh(self, expires_before: str) -> List[Dict[str, Any]]:
+        """Connected Alpaca accounts with a refresh token whose access token expires before the ISO time."""
+
+        def query():
+            return (
+                self.client.table("brokerage_accounts")
+                .select("id, refresh_token, expires_at")
+                .eq("brokerage_name", "alpaca")
+                .eq("is_connected", True)
+                .not_.is_("refresh_token", "null")
+                .lt("expires_at", expires_before)
+                .execute()
+            )
+
+        return (await run_db(query)).data or []
+
+
+class OrderLedgerRepository:
+    """order_ledger rows: one per brokerage order, upserted as the order changes."""
+
+    # PostgREST caps a response at 1000 rows by default
+    PAGE_SIZE = 1000
+
+    def __init__(self, client: Client):
+        self.client = client
+
+    async def list_for_account(self, user_id: str, account_id: Optional[str]) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        while True:
+            start = len(rows)
+
+            def query():
+                q = self.client.table("order_ledger").select("*").eq("user_id", user_id)
+                q = q.eq("account_id", account_id) if account_id else q.is_("account_id", "null")
+                return q.order("submitted_at").range(start, start + self.PAGE_SIZE - 1).execute()
+
+            page = (await run_db(query)).data or []
+            rows.extend(page)
+            if len(page) < self.PAGE_SIZE:
+                return rows
+
+    async def upsert(self, rows: List[Dict[str, Any]]) -> None:
+        for start in range(0, len(rows), self.PAGE_SIZE):
+            chunk = rows[start:start + self.PAGE_SIZE]
+            await run_db(lambda: self.client.table("order_ledger").upsert(chunk, on_conflict="user_id,order_id").execute())
@@ -0,0 +1,79 @@
+# backend/services/resample.py
+import re
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from services.bar_store import Columns, empty_columns
+
+EQUITY_TZ = ZoneInfo("America/New_York")
+TIMEFRAME_UNITS = {"Min": 60, "Hour": 3600, "Day": 86400}
+_TIMEFRAME_RE = re.compile(r"^(\d+)(Min|Hour|Day)$")
+
+
+def parse_timeframe(timeframe: str) -> Optional[Tuple[int, str]]:
+    """'15Min' -> (15, 'Min'). Returns None for shapes Alpaca cannot serve (e.g. 90Min, 2Day)."""
+    m = _TIMEFRAME_RE.match(timeframe or "")
+    if not m:
+        return None
+    amount, unit = int(m.group(1)), m.group(2)
+    limits = {"Min": 59, "Hour": 23, "Day": 1}
+    if not 1 <= amount <= limits[unit]:
+        return None
+    return amount, unit
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    amount, unit = parse_timeframe(timeframe)
+    return amount * TIMEFRAME_UNITS[unit]
+
+
+def _utc_offsets(ts: np.ndarray) -> np.ndarray:
+    """Eastern-time UTC offset in seconds for each timestamp, resolved once per distinct hour."""
+    hours, inverse = np.unique(ts // 3600, return_inverse=True)
+    offsets = np.array(
+        [
+            EQUITY_TZ.utcoffset(datetime.fromtimestamp(int(h) * 3600, tz=timezone.utc)).total_seconds()
+            for h in hours
+        ],
+        dtype=np.int64,
+    )
+    return offsets[inverse]
+
+
+def bucket_starts(ts: np.ndarray, period: int, crypto: bool) -> np.ndarray:
+    """Start of the bucket each timestamp falls in, as epoch seconds.
+
+    Crypto trades 24/7, so buckets are aligned to UTC. Equity buckets are aligned
+    to the exchange's local (America/New_York) clock, so daily bars follow the
+    trading date across DST changes. Intraday buckets are clock-aligned like
+    Alpaca's own bars: minute periods that divide 30 start at the 09:30 open,
+    while hour periods start on the hour (a 4Hour session is bucketed at 08:00,
+    12:00 and 16:00 ET).
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    if crypto or len(ts) == 0:
+        return ts - ts % period
+    offsets = _utc_offsets(ts)
+    local = ts + offsets
+    return local - local % period - offsets
+
+
+def resample_bars(cols: Columns, period: int, crypto: bool) -> Columns:
+    """Aggregate time-sorted bars into period-second OHLCV bars in one vectorized pass."""
+    ts = np.asarray(cols["timestamp"])
+    if len(ts) == 0:
+        return empty_columns()
+    buckets = bucket_starts(ts, period, crypto)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(ts)]))
+    return {
+        "timestamp": buckets[starts],
+        "open": np.asarray(cols["open"])[starts],
+        "high": np.maximum.reduceat(np.asarray(cols["high"]), starts),
+        "low": np.minimum.reduceat(np.asarray(cols["low"]), starts),
+        "close": np.asarray(cols["close"])[ends - 1],
+        "volume": np.add.reduceat(np.asarray(cols["volume"]), starts),
+    }
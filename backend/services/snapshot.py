@@ -0,0 +1,95 @@
+# backend/services/snapshot.py
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from services.executor import run_blocking
+
+logger = logging.getLogger(__name__)
+
+
+class PersistedSnapshot:
+    """Reference data fetched from Alpaca, kept in a local JSON file and refreshed periodically.
+
+    Startup loads the file, so lookups work before (or without) the first
+    fetch. A background task refetches once the data is refresh_seconds old.
+    Subclasses set `name` and implement _fetch (blocking; returns the JSON
+    document, including "fetched_at"), _apply and _summary.
+    """
+
+    name = "snapshot"
+
+    def __init__(self, path: str, refresh_seconds: float):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self.loaded_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _fetch(self) -> Dict:
+        raise NotImplementedError
+
+    def _apply(self, data: Dict) -> None:
+        """Replace the in-memory state with a fetched or persisted document."""
+        raise NotImplementedError
+
+    def _summary(self, data: Dict) -> str:
+        raise NotImplementedError
+
+    def load_local(self) -> bool:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+        self._apply(data)
+        self.loaded_at = data.get("fetched_at")
+        logger.info(f"Loaded {self.name} from {self.path}: {self._summary(data)}")
+        return True
+
+    def _persist(self, data: Dict) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    async def refresh(self) -> None:
+        data = await run_blocking(self._fetch)
+        self._apply(data)
+        self.loaded_at = data["fetched_at"]
+        try:
+            await run_blocking(self._persist, data)
+        except OSError as e:
+            logger.warning(f"Could not persist {self.name}: {e}")
+        logger.info(f"Refreshed {self.name}: {self._summary(data)}")
+
+    async def _run(self) -> None:
+        while True:
+            age = time.time() - (self.loaded_at or 0)
+            if age >= self.refresh_seconds:
+                try:
+                    await self.refresh()
+                    age = 0
+                except Exception as e:
+                    logger.error(f"{self.name.capitalize()} refresh failed: {e}")
+                    age = self.refresh_seconds - 300  # retry in five minutes
+            await asyncio.sleep(max(self.refresh_seconds - age, 60))
+
+    def start(self) -> None:
+        """Load the persisted snapshot and schedule background refreshes."""
+        self.load_local()
+        if not os.getenv("ALPACA_API_KEY") or not os.getenv("ALPACA_SECRET_KEY"):
+            logger.warning(f"Alpaca API credentials missing; {self.name} refresh disabled")
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,181 @@
+# backend/services/token_refresh.py
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from services.http_client import get_http_client
+from services.repositories import BrokerageAccountRepository
+from services.trading_clients import trading_client_cache
+
+logger = logging.getLogger(__name__)
+
+ALPACA_OAUTH_TOKEN_URL = "https://api.alpaca.markets/oauth/token"
+
+
+class RefreshTokenRevoked(Exception):
+    """The refresh token was rejected for good (invalid_grant); only a new OAuth connection helps."""
+
+
+def _oauth_error(response) -> Optional[str]:
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    return body.get("error") if isinstance(body, dict) else None
+
+
+class TokenRefresher:
+    """Refreshes Alpaca OAuth tokens ahead of expiry, one refresh per account at a time.
+
+    A background loop refreshes every connected account whose token expires
+    within lead_seconds, so request handlers normally find a valid token. When a
+    request does hit an expired token, refresh() shares the per-account lock:
+    concurrent callers wait for the refresh already running and reuse its token
+    instead of each rotating the refresh token and invalidating the others.
+    An account whose refresh token is rejected with invalid_grant is marked
+    disconnected, which takes it out of the refresh loop until the user reconnects.
+    """
+
+    def __init__(self, lead_seconds: float = 300.0, interval_seconds: float = 60.0, failure_backoff_seconds: float = 600.0):
+        self.lead_seconds = lead_seconds
+        self.interval_seconds = interval_seconds
+        self.failure_backoff_seconds = failure_backoff_seconds
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # account_id -> (access_token, expires_at epoch seconds) from the last refresh here
+        self._refreshed: Dict[str, Tuple[str, float]] = {}
+        self._failed_at: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.revoked = 0
+
+    async def _request(self, refresh_token: str) -> Optional[Dict[str, Any]]:
+        client_id = os.getenv("ALPACA_CLIENT_ID")
+        client_secret = os.getenv("ALPACA_CLIENT_SECRET")
+
+        if not client_id or not client_secret:
+            logger.error("Alpaca OAuth configuration missing for token refresh")
+            return None
+
+        token_data = {
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+            "client_id": client_id,
+            "client_secret": client_secret
+        }
+
+        response = await get_http_client().post(
+            ALPACA_OAUTH_TOKEN_URL,
+            data=token_data,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+
+        if response.status_code in (400, 401) and _oauth_error(response) == "invalid_grant":
+            raise RefreshTokenRevoked(response.text)
+        if response.status_code != 200:
+            logger.error(f"Token refresh failed: {response.status_code} {response.text}")
+            return None
+        return response.json()
+
+    async def refresh(self, account_id: str, refresh_token: str, accounts: BrokerageAccountRepository) -> Optional[str]:
+        """Refresh one account's token and persist it; returns the new access token or None."""
+        lock = self._locks.setdefault(account_id, asyncio.Lock())
+        async with lock:
+            done = self._refreshed.get(account_id)
+            if done and done[1] - time.time() > self.lead_seconds:
+                # someone refreshed while we waited for the lock
+                return done[0]
+
+            try:
+                token_data = await self._request(refresh_token)
+                if not token_data or not token_data.get("access_token"):
+                    raise ValueError("no access token in refresh response")
+
+                new_access_token = token_data["access_token"]
+                new_refresh_token = token_data.get("refresh_token", refresh_token)
+                expires_at = datetime.now(timezone.utc) + timedelta(seconds=token_data.get("expires_in", 3600))
+
+                # Update database
+                await accounts.update(account_id, {
+                    "access_token": new_access_token,
+                    "refresh_token": new_refresh_token,
+                    "expires_at": expires_at.isoformat()
+                })
+            except RefreshTokenRevoked as e:
+                await self._mark_disconnected(account_id, accounts, str(e))
+                return None
+            except Exception as e:
+                self.failures += 1
+                self._failed_at[account_id] = time.time()
+                logger.error(f"Error refreshing token for account {account_id}: {e}")
+                return None
+
+            self.refreshes += 1
+            self._failed_at.pop(account_id, None)
+            self._refreshed[account_id] = (new_access_token, expires_at.timestamp())
+            trading_client_cache.invalidate(account_id=account_id)
+            return new_access_token
+
+    async def _mark_disconnected(self, account_id: str, accounts: BrokerageAccountRepository, reason: str) -> None:
+        """Retrying a revoked refresh token cannot succeed; the user has to connect the account again."""
+        self.revoked += 1
+        trading_client_cache.invalidate(account_id=account_id)
+        try:
+            await accounts.update(account_id, {"is_connected": False, "refresh_token": None})
+        except Exception as e:
+            self.failures += 1
+            self._failed_at[account_id] = time.time()
+            logger.error(f"Could not mark account {account_id} as needing reconnect: {e}")
+            return
+        self._failed_at.pop(account_id, None)
+        logger.warning(f"Refresh token for account {account_id} was revoked ({reason}); account needs reconnecting")
+
+    async def refresh_due(self, accounts: BrokerageAccountRepository) -> int:
+        """Refresh every connected account expiring before the next pass; returns how many were attempted."""
+        now = time.time()
+        cutoff = datetime.now(timezone.utc) + timedelta(seconds=self.lead_seconds + self.interval_seconds)
+        due = [
+            a for a in await accounts.due_for_refresh(cutoff.isoformat())
+            if now - self._failed_at.get(a["id"], 0) >= self.failure_backoff_seconds
+        ]
+        await asyncio.gather(*(self.refresh(a["id"], a["refresh_token"], accounts) for a in due))
+        return len(due)
+
+    async def _run(self, accounts_factory: Callable[[], BrokerageAccountRepository]) -> None:
+        while True:
+            try:
+                count = await self.refresh_due(accounts_factory())
+                if count:
+                    logger.info(f"Refreshed OAuth tokens for {count} brokerage accounts")
+            except Exception as e:
+                logger.error(f"Token refresh pass failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self, accounts_factory: Callable[[], BrokerageAccountRepository]) -> None:
+        """Schedule background refreshes; accounts_factory returns a repository on the shared Supabase client."""
+        if os.getenv("TOKEN_REFRESH_ENABLED", "true").lower() in ("0", "false", "no"):
+            return
+        if not os.getenv("ALPACA_CLIENT_ID") or not os.getenv("ALPACA_CLIENT_SECRET"):
+            logger.warning("Alpaca OAuth configuration missing; background token refresh disabled")
+            return
+        self._task = asyncio.create_task(self._run(accounts_factory))
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"refreshes": self.refreshes, "failures": self.failures, "revoked": self.revoked, "accounts": len(self._locks)}
+
+
+token_refresher = TokenRefresher(
+    lead_seconds=float(os.getenv("TOKEN_REFRESH_LEAD_SECONDS", "300")),
+    interval_seconds=float(os.getenv("TOKEN_REFRESH_INTERVAL_SECONDS", "60")),
+)
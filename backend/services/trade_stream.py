@@ -0,0 +1,350 @@
+# backend/services/trade_stream.py
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+from services.executor import run_blocking
+from services.market_stream import market_stream
+from services.order_ledger import OrderLedger, order_ledgers, order_row
+from services.repositories import BrokerageAccountRepository, OrderLedgerRepository
+
+logger = logging.getLogger(__name__)
+
+# trading is on paper accounts throughout (see dependencies.get_alpaca_trading_client)
+ALPACA_TRADE_STREAM_URL = os.getenv("ALPACA_TRADE_STREAM_URL", "wss://paper-api.alpaca.markets/stream")
+_FILL_EVENTS = {"fill", "partial_fill"}
+# fractional share quantities are not exact in float
+_QTY_EPSILON = 1e-9
+
+
+class AccountTradeStream:
+    """Alpaca trade_updates for one OAuth-connected account, applied as events arrive.
+
+    Order events are merged into the account's order ledger and written through
+    to Supabase. Fills move the in-memory positions and cash at once; the
+    account snapshot (buying power, equity, ...) is then re-read in the
+    background. After every (re)connect the ledger is synced once over REST to
+    cover events missed while disconnected, and it stops polling while the
+    stream is up.
+    """
+
+    def __init__(
+        self,
+        user_id: str,
+        account_id: str,
+        accounts: BrokerageAccountRepository,
+        ledger_repo: OrderLedgerRepository,
+        snapshot_delay: float = 1.0,
+    ):
+        self.user_id = user_id
+        self.account_id = account_id
+        self.accounts = accounts
+        self.ledger_repo = ledger_repo
+        self.snapshot_delay = snapshot_delay
+        self.account: Optional[Dict[str, Any]] = None
+        self.positions: Dict[str, Dict[str, float]] = {}
+        self.connected = False
+        self.events = 0
+        self.last_event_at: Optional[float] = None
+        self._client = None
+        self._token: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._snapshot_task: Optional[asyncio.Task] = None
+
+    @property
+    def live(self) -> bool:
+        return self.connected and self.account is not None
+
+    @property
+    def ledger(self) -> OrderLedger:
+        """The account's current ledger, looked up on every use.
+
+        Invalidation (reconnecting the account) or LRU eviction replaces the cached
+        ledger, and events must land in the one /api/trades reads from.
+        """
+        ledger = order_ledgers.get(self.user_id, self.account_id)
+        ledger.live = self.connected
+        return ledger
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._set_connected(False)
+        for task in (self._task, self._snapshot_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+    def _set_connected(self, connected: bool) -> None:
+        self.connected = connected
+        self.ledger.live = connected
+
+    async def _trading_client(self):
+        """REST client on the account's current OAuth token (re-read, since the refresher rotates it)."""
+        from alpaca.trading.client import TradingClient
+
+        account = await self.accounts.get(self.user_id, self.account_id)
+        token = account.get("access_token") if account else None
+        if not token:
+            raise RuntimeError("account has no access token")
+        if token != self._token:
+            self._token = token
+            self._client = TradingClient(api_key=token, secret_key="", paper=True, oauth_token=token)
+        return self._client
+
+    async def _run(self) -> None:
+        import websockets
+
+        backoff = 1.0
+        while True:
+            try:
+                client = await self._trading_client()
+                async with websockets.connect(ALPACA_TRADE_STREAM_URL, ping_interval=20, ping_timeout=20) as ws:
+                    await ws.send(json.dumps({"action": "authenticate", "data": {"oauth_token": self._token}}))
+                    await ws.send(json.dumps({"action": "listen", "data": {"streams": ["trade_updates"]}}))
+                    # catch up on anything missed before listening started, then trust the stream
+                    await self._refresh_snapshot(client)
+                    await self.ledger.sync(client, self.ledger_repo, force=True)
+                    async for message in ws:
+                        msg = self._decode(message)
+                        self._handle_control(msg)
+                        if self.connected:
+                            backoff = 1.0
+                        await self._handle(msg)
+                raise ConnectionError("trade stream closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._set_connected(False)
+                logger.warning(f"Trade stream for account {self.account_id} dropped: {e}; retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    @staticmethod
+    def _decode(message: Any) -> Dict[str, Any]:
+        if isinstance(message, bytes):
+            message = message.decode("utf-8")
+        return json.loads(message)
+
+    def _handle_control(self, msg: Dict[str, Any]) -> None:
+        stream = msg.get("stream")
+        data = msg.get("data") or {}
+        if stream == "authorization" and data.get("status") != "authorized":
+            raise PermissionError(f"trade stream authorization failed: {data}")
+        if stream == "listening" and "trade_updates" in (data.get("streams") or []):
+            self._set_connected(True)
+
+    async def _handle(self, msg: Dict[str, Any]) -> None:
+        if msg.get("stream") != "trade_updates":
+            return
+        data = msg.get("data") or {}
+        order = data.get("order")
+        if not order:
+            return
+        self.events += 1
+        self.last_event_at = time.time()
+
+        if data.get("event") in _FILL_EVENTS and data.get("qty") and data.get("price"):
+            self._apply_fill(order, data)
+
+        ledger = self.ledger
+        try:
+            # a replaced ledger starts empty; load it so older stored rows cannot overwrite this event later
+            await ledger.ensure_loaded(self.ledger_repo)
+            changed = ledger.apply([order_row(order)])
+            await ledger.persist(changed, self.ledger_repo)
+        except Exception as e:
+            # the next REST sync after a reconnect rewrites whatever did not land
+            logger.error(f"Could not record trade update for account {self.account_id}: {e}")
+
+    def _apply_fill(self, order: Dict[str, Any], data: Dict[str, Any]) -> None:
+        """Move positions and cash by one fill, unless the snapshot already counts it.
+
+        The event's position_qty is the position after this fill. A snapshot read
+        after the fill already shows that quantity, so applying the fill again would
+        count it twice; in that case (or if the two disagree in any other way)
+        only the scheduled snapshot refresh updates the state.
+        """
+        self._schedule_snapshot()
+        if data.get("position_qty") is None:
+            return
+        symbol = order["symbol"]
+        qty = float(data["qty"])
+        price = float(data["price"])
+        signed = qty if order.get("side") == "buy" else -qty
+
+        position = self.positions.get(symbol) or {"qty": 0.0, "avg_entry_price": price, "last_price": price}
+        before = position["qty"]
+        after = float(data["position_qty"])
+        if abs(before + signed - after) > _QTY_EPSILON:
+            return
+        if before == 0 or (before > 0) != (after > 0):
+            # opened or flipped: the remainder was all bought/sold at this price
+            avg = price
+        elif abs(after) > abs(before):
+            avg = (position["avg_entry_price"] * abs(before) + price * qty) / abs(after)
+        else:
+            avg = position["avg_entry_price"]
+        if after == 0:
+            self.positions.pop(symbol, None)
+        else:
+            self.positions[symbol] = {"qty": after, "avg_entry_price": avg, "last_price": price}
+
+        if self.account is not None:
+            self.account["cash"] -= signed * price
+
+    def _schedule_snapshot(self) -> None:
+        """Re-read account and positions shortly after fills; a burst of fills shares one refresh."""
+        if self._snapshot_task and not self._snapshot_task.done():
+            return
+
+        async def later():
+            await asyncio.sleep(self.snapshot_delay)
+            try:
+                await self._refresh_snapshot(await self._trading_client())
+            except Exception as e:
+                logger.warning(f"Could not refresh account snapshot for {self.account_id}: {e}")
+
+        self._snapshot_task = asyncio.create_task(later())
+
+    async def _refresh_snapshot(self, client) -> None:
+        account, positions = await asyncio.gather(
+            run_blocking(client.get_account),
+            run_blocking(client.get_all_positions),
+        )
+        self.account = {
+            "cash": float(account.cash or 0),
+            "buying_power": float(account.buying_power or 0),
+            "portfolio_value": float(account.portfolio_value or 0),
+            "status": str(account.status),
+        }
+        self.positions = {
+            p.symbol: {
+                "qty": float(p.qty or 0),
+                "avg_entry_price": float(p.avg_entry_price or 0),
+                "last_price": float(p.current_price or 0),
+            }
+            for p in positions or []
+        }
+
+    def portfolio(self) -> Dict[str, Any]:
+        """/api/portfolio from stream state; prices come from the market data stream when it has them."""
+        formatted_positions = []
+        positions_value = 0.0
+        unrealized_total = 0.0
+        for symbol, p in self.positions.items():
+            trade = market_stream.trade(symbol)
+            price = trade["price"] if trade else p["last_price"]
+            market_value = p["qty"] * price
+            cost_basis = p["qty"] * p["avg_entry_price"]
+            unrealized = market_value - cost_basis
+            positions_value += market_value
+            unrealized_total += unrealized
+            formatted_positions.append({
+                "symbol": symbol,
+                "quantity": p["qty"],
+                "market_value": market_value,
+                "cost_basis": cost_basis,
+                "unrealized_pl": unrealized,
+                "unrealized_plpc": unrealized / abs(cost_basis) if cost_basis else 0.0,
+                "side": "long" if p["qty"] > 0 else "short",
+            })
+
+        total_value = self.account["cash"] + positions_value
+        return {
+            "total_value": total_value,
+            "day_change": unrealized_total,
+            "day_change_percent": (unrealized_total / total_value * 100) if total_value > 0 else 0,
+            "buying_power": self.account["buying_power"],
+            "cash": self.account["cash"],
+            "positions": formatted_positions,
+            "account_status": self.account["status"],
+            "source": "stream",
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "events": self.events,
+            "last_event_at": self.last_event_at,
+            "positions": len(self.positions),
+        }
+
+
+class TradeStreamManager:
+    """One AccountTradeStream per connected Alpaca account, reconciled with the database periodically."""
+
+    def __init__(self, max_accounts: int = 500, poll_seconds: float = 60.0):
+        self.max_accounts = max_accounts
+        self.poll_seconds = poll_seconds
+        self._streams: Dict[str, AccountTradeStream] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def live(self, account_id: Optional[str]) -> Optional[AccountTradeStream]:
+        """The account's stream if it is connected and has a snapshot to answer from."""
+        stream = self._streams.get(account_id) if account_id else None
+        return stream if stream is not None and stream.live else None
+
+    async def drop(self, account_id: str) -> None:
+        stream = self._streams.pop(account_id, None)
+        if stream:
+            await stream.stop()
+
+    async def reconcile(self, supabase) -> None:
+        accounts = BrokerageAccountRepository(supabase)
+        rows = await accounts.connected_alpaca_accounts(self.max_accounts)
+        wanted = {row["id"]: row["user_id"] for row in rows}
+        for account_id in [a for a in self._streams if a not in wanted]:
+            await self.drop(account_id)
+        for account_id, user_id in wanted.items():
+            if account_id not in self._streams:
+                stream = AccountTradeStream(user_id, account_id, accounts, OrderLedgerRepository(supabase))
+                self._streams[account_id] = stream
+                stream.start()
+
+    async def _run(self, supabase_factory: Callable[[], Any]) -> None:
+        while True:
+            try:
+                await self.reconcile(supabase_factory())
+            except Exception as e:
+                logger.error(f"Trade stream reconcile failed: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    def start(self, supabase_factory: Callable[[], Any]) -> None:
+        """Keep a stream open for every connected account; supabase_factory returns the shared client."""
+        if os.getenv("TRADE_STREAM_ENABLED", "true").lower() in ("0", "false", "no"):
+            logger.info("Trade updates stream disabled by TRADE_STREAM_ENABLED")
+            return
+        self._task = asyncio.create_task(self._run(supabase_factory))
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await asyncio.gather(*(self.drop(a) for a in list(self._streams)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals across accounts; nothing here identifies an account, since /health is unauthenticated."""
+        streams = [stream.stats() for stream in self._streams.values()]
+        return {
+            "streams": len(streams),
+            "connected": sum(1 for s in streams if s["connected"]),
+            "events": sum(s["events"] for s in streams),
+            "last_event_at": max((s["last_event_at"] for s in streams if s["last_event_at"]), default=None),
+        }
+
+
+trade_streams = TradeStreamManager(
+    max_accounts=int(os.getenv("TRADE_STREAM_MAX_ACCOUNTS", "500")),
+    poll_seconds=float(os.getenv("TRADE_STREAM_POLL_SECONDS", "60")),
+)
@@ -0,0 +1,66 @@
+# backend/services/trading_clients.py
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class TradingClientCache:
+    """Bounded per-user cache of ready-to-use Alpaca TradingClients.
+
+    Entries are keyed by user and remember the brokerage account they were built
+    for. An entry lives until its OAuth token expires (less a safety margin) and
+    never longer than max_age_seconds, and is dropped whenever that user's or
+    account's brokerage row is written (OAuth callback, disconnect, refresh).
+    """
+
+    def __init__(self, max_entries: int = 1000, max_age_seconds: float = 900.0, expiry_margin_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.expiry_margin_seconds = expiry_margin_seconds
+        # user_id -> (account_id, client, valid_until)
+        self._entries: "OrderedDict[str, Tuple[Optional[str], Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> Optional[Any]:
+        entry = self._entries.get(user_id)
+        if entry is None or time.time() >= entry[2]:
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(user_id)
+        return entry[1]
+
+    def set(self, user_id: str, account_id: Optional[str], client: Any, token_expires_at: Optional[float] = None) -> None:
+        valid_until = time.time() + self.max_age_seconds
+        if token_expires_at is not None:
+            valid_until = min(valid_until, token_expires_at - self.expiry_margin_seconds)
+        self._entries[user_id] = (account_id, client, valid_until)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def account_id(self, user_id: str) -> Optional[str]:
+        """Brokerage account the user's cached client was built for (None for the platform keys)."""
+        entry = self._entries.get(user_id)
+        return entry[0] if entry else None
+
+    def invalidate(self, user_id: Optional[str] = None, account_id: Optional[str] = None) -> None:
+        """Drop the cached client for a user and/or any user holding a client for account_id."""
+        if user_id is not None:
+            self._entries.pop(user_id, None)
+        if account_id is not None:
+            for uid in [uid for uid, entry in self._entries.items() if entry[0] == account_id]:
+                del self._entries[uid]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+trading_client_cache = TradingClientCache(
+    max_entries=int(os.getenv("TRADING_CLIENT_CACHE_MAX_ENTRIES", "1000")),
+    max_age_seconds=float(os.getenv("TRADING_CLIENT_CACHE_TTL_SECONDS", "900")),
+)
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+# services and routers import each other as top-level packages, as under `python run.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeClock:
+    """Stands in for a module's `time` import, so TTLs and backoffs can be stepped through."""
+
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """clock(*modules) replaces each module's `time` with one shared FakeClock and returns it."""
+
+    def install(*modules) -> FakeClock:
+        fake = FakeClock()
+        for module in modules:
+            monkeypatch.setattr(module, "time", fake)
+        return fake
+
+    return install
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from routers import market_data
+from services.assets import CRYPTO, STOCK, AssetRegistry, _build_lookup
+
+EQUITIES = ["AAPL", "BTC", "ETH", "LINK", "MSFT", "SOL"]
+CRYPTO_PAIRS = ["BTC/USD", "ETH/USD", "LINK/USD", "SOL/USD"]
+
+
+@pytest.fixture
+def registry(tmp_path):
+    path = tmp_path / "assets.json"
+    path.write_text(json.dumps({"fetched_at": 0, "equities": EQUITIES, "crypto": CRYPTO_PAIRS}))
+    reg = AssetRegistry(str(path), refresh_seconds=3600)
+    assert reg.load_local()
+    return reg
+
+
+@pytest.mark.parametrize("symbol", ["BTC", "ETH", "SOL"])
+def test_bare_crypto_bases_resolve_to_crypto(registry, symbol):
+    assert registry.resolve(symbol) == (CRYPTO, f"{symbol}/USD")
+    assert registry.resolve(symbol.lower()) == (CRYPTO, f"{symbol}/USD")
+
+
+@pytest.mark.parametrize("symbol", ["BTC", "ETH", "SOL"])
+def test_stock_prefix_selects_the_equity(registry, symbol):
+    assert registry.resolve(f"STOCK:{symbol}") == (STOCK, symbol)
+
+
+@pytest.mark.parametrize("symbol", ["BTCUSD", "BTC/USD", "BTCUSDT"])
+def test_pair_spellings_resolve_to_the_pair(registry, symbol):
+    assert registry.resolve(symbol) == (CRYPTO, "BTC/USD")
+
+
+def test_other_equity_tickers_win_over_crypto_bases(registry):
+    assert registry.resolve("LINK") == (STOCK, "LINK")
+    assert registry.resolve("LINK/USD") == (CRYPTO, "LINK/USD")
+    assert registry.resolve("AAPL") == (STOCK, "AAPL")
+
+
+def test_unknown_symbol_is_left_to_the_fallback(registry):
+    assert registry.resolve("NOPE") is None
+
+
+def test_missing_registry_file(tmp_path):
+    assert not AssetRegistry(str(tmp_path / "missing.json"), refresh_seconds=3600).load_local()
+
+
+@pytest.mark.parametrize("symbol", ["BTC", "ETH", "SOL", "STOCK:ETH", "AAPL", "ETHUSD", "BTC/USD"])
+def test_cold_and_warm_processes_agree(monkeypatch, registry, symbol):
+    monkeypatch.setattr(market_data, "asset_registry", AssetRegistry("/nonexistent", refresh_seconds=3600))
+    cold = market_data.resolve_symbol(symbol)
+    monkeypatch.setattr(market_data, "asset_registry", registry)
+    assert market_data.resolve_symbol(symbol) == cold
+
+
+def test_build_lookup_keeps_crypto_bases_without_a_pair():
+    # an equity named like a crypto base never takes the bare ticker, even without a listed pair
+    lookup = _build_lookup(["ADA"], [])
+    assert "ADA" not in lookup
+    assert lookup["STOCK:ADA"] == (STOCK, "ADA")
@@ -0,0 +1,58 @@
+import json
+
+import msgpack
+import numpy as np
+import pyarrow as pa
+
+from services.bar_encoding import encode_bars
+
+
+def _series(volume, int_volume, source):
+    n = len(volume)
+    return {
+        "columns": {
+            "timestamp": np.arange(n, dtype=np.int64) * 60,
+            "open": np.ones(n), "high": np.ones(n), "low": np.ones(n), "close": np.ones(n),
+            "volume": np.asarray(volume, dtype=np.float64),
+        },
+        "source": source,
+        "int_volume": int_volume,
+    }
+
+
+def _arrow(bars):
+    return pa.ipc.open_stream(encode_bars(bars, "arrow").body).read_all()
+
+
+def test_arrow_volume_is_int64_for_stocks():
+    table = _arrow({"AAPL": _series([100, 200], True, "alpaca:iex")})
+    assert table.schema.field("volume").type == pa.int64()
+    assert table.column("volume").to_pylist() == [100, 200]
+
+
+def test_arrow_volume_stays_float_when_any_series_is_fractional():
+    table = _arrow({
+        "AAPL": _series([100], True, "alpaca:iex"),
+        "BTC/USD": _series([0.25], False, "alpaca:crypto"),
+    })
+    assert table.schema.field("volume").type == pa.float64()
+    assert table.column("volume").to_pylist() == [100.0, 0.25]
+    assert table.column("symbol").to_pylist() == ["AAPL", "BTC/USD"]
+
+
+def test_msgpack_buffers_round_trip():
+    resp = encode_bars({"AAPL": _series([100, 200], True, "alpaca:iex")}, "msgpack", symbol="AAPL")
+    payload = msgpack.unpackb(resp.body)
+    volume = np.frombuffer(payload["volume"], dtype=payload["dtypes"]["volume"])
+    assert volume.dtype == np.int64
+    assert volume.tolist() == [100, 200]
+
+
+def test_arrow_schema_carries_stale_markers():
+    fresh = _arrow({"AAPL": _series([100], True, "alpaca:iex")})
+    assert fresh.schema.metadata[b"stale"] == b"false"
+
+    stale = dict(_series([0.25], False, "alpaca:crypto"), age_seconds=42.5)
+    table = _arrow({"AAPL": _series([100], True, "alpaca:iex"), "BTC/USD": stale})
+    assert table.schema.metadata[b"stale"] == b"true"
+    assert json.loads(table.schema.metadata[b"age_seconds"]) == {"BTC/USD": 42.5}
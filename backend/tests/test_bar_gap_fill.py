@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from routers import market_data
+from services.bar_store import BarStore
+
+
+@pytest.fixture
+def upstream(monkeypatch, tmp_path):
+    """Bar store in tmp_path and a fake upstream returning one bar per minute; returns the calls it saw."""
+    calls = []
+
+    async def fetch(client, crypto, symbols, timeframe, start_time, end_time, limit):
+        calls.append((start_time, end_time, limit))
+        start = int(start_time.timestamp())
+        end = int(end_time.timestamp()) + 1 if end_time else int(datetime.now(timezone.utc).timestamp())
+        ts = np.arange(start - start % 60 + (60 if start % 60 else 0), end, 60, dtype=np.int64)
+        if limit:
+            ts = ts[:limit]
+        ones = np.ones(len(ts))
+        cols = {"timestamp": ts, "open": ones, "high": ones, "low": ones, "close": ones, "volume": ones}
+        return {sym: cols for sym in symbols}
+
+    monkeypatch.setattr(market_data, "bar_store", BarStore(str(tmp_path)))
+    monkeypatch.setattr(market_data, "_fetch_bar_columns", fetch)
+    monkeypatch.setattr(market_data, "BAR_STORE_ENABLED", True)
+    return calls
+
+
+def _load(start, limit, timeframe="1Min"):
+    return asyncio.run(market_data._load_bar_columns(None, True, ["BTC/USD"], timeframe, start, None, limit))
+
+
+def test_limited_request_only_fills_what_limit_can_reach(upstream):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    bars = _load(start, limit=100)["BTC/USD"]
+    assert len(bars["timestamp"]) == 100
+    (fill_start, fill_end, fill_limit), = upstream
+    assert fill_start == start
+    assert fill_end - fill_start <= timedelta(seconds=market_data._calendar_span(100, 60))
+    assert fill_limit is None
+
+
+def test_repeat_request_is_served_from_the_store(upstream):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    _load(start, limit=100)
+    upstream.clear()
+    assert len(_load(start, limit=100)["BTC/USD"]["timestamp"]) == 100
+    assert upstream == []
+
+
+def test_upstream_errors_are_not_treated_as_store_errors(monkeypatch, upstream):
+    async def down(*args):
+        raise ConnectionError("connection refused")  # an OSError, like requests.ConnectionError
+
+    monkeypatch.setattr(market_data, "_fetch_bar_columns", down)
+    with pytest.raises(ConnectionError):
+        _load(datetime(2024, 1, 1, tzinfo=timezone.utc), limit=100)
+
+
+def test_store_errors_fall_back_to_one_limited_upstream_call(monkeypatch, upstream):
+    def broken(*args):
+        raise PermissionError("read-only file system")
+
+    monkeypatch.setattr(market_data.bar_store, "missing_ranges", broken)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert len(_load(start, limit=100)["BTC/USD"]["timestamp"]) == 100
+    assert upstream == [(start, None, 100)]
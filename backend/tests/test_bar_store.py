@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pytest
+
+from services.bar_store import BarStore, concat_columns, empty_columns, merge_ranges, slice_columns, subtract_ranges
+
+
+def _bars(timestamps, close=None):
+    ts = np.asarray(timestamps, dtype=np.int64)
+    close = np.asarray(close if close is not None else ts, dtype=np.float64)
+    ones = np.ones(len(ts))
+    return {"timestamp": ts, "open": ones, "high": ones, "low": ones, "close": close, "volume": ones}
+
+
+def test_merge_ranges_joins_overlapping_and_touching():
+    assert merge_ranges([(10, 20), (0, 5), (5, 8), (15, 30), (40, 40)]) == [(0, 8), (10, 30)]
+
+
+@pytest.mark.parametrize(
+    "start, end, covered, gaps",
+    [
+        (0, 100, [], [(0, 100)]),
+        (0, 100, [(0, 100)], []),
+        (0, 100, [(10, 20), (50, 60)], [(0, 10), (20, 50), (60, 100)]),
+        (30, 55, [(10, 40), (50, 60)], [(40, 50)]),
+        (0, 10, [(20, 30)], [(0, 10)]),
+    ],
+)
+def test_subtract_ranges(start, end, covered, gaps):
+    assert subtract_ranges(start, end, covered) == gaps
+
+
+def test_concat_sorts_and_later_parts_win():
+    merged = concat_columns([_bars([3, 1, 2]), _bars([2, 4], close=[20, 40]), empty_columns()])
+    assert merged["timestamp"].tolist() == [1, 2, 3, 4]
+    assert merged["close"].tolist() == [1, 20, 3, 40]
+
+
+def test_slice_is_half_open():
+    assert slice_columns(_bars([1, 2, 3, 4]), 2, 4)["timestamp"].tolist() == [2, 3]
+    assert slice_columns(_bars([1, 2, 3, 4]), None, None)["timestamp"].tolist() == [1, 2, 3, 4]
+
+
+def test_store_tracks_coverage_and_serves_merged_bars(tmp_path):
+    store = BarStore(str(tmp_path))
+    assert store.missing_ranges("BTC/USD", "1Min", 0, 600) == [(0, 600)]
+
+    store.write("BTC/USD", "1Min", _bars([0, 60, 120]), (0, 180))
+    store.write("BTC/USD", "1Min", _bars([120, 420], close=[99, 420]), (120, 480))
+    assert store.covered_ranges("BTC/USD", "1Min") == [(0, 480)]
+    assert store.missing_ranges("BTC/USD", "1Min", 0, 600) == [(480, 600)]
+
+    bars = store.read("BTC/USD", "1Min", 60, 480)
+    assert bars["timestamp"].tolist() == [60, 120, 420]
+    assert bars["close"].tolist() == [60, 99, 420]
+
+
+def test_empty_gap_is_still_recorded(tmp_path):
+    store = BarStore(str(tmp_path))
+    store.write("AAPL", "1Day", empty_columns(), (0, 86400))
+    assert store.missing_ranges("AAPL", "1Day", 0, 86400) == []
+    assert len(store.read("AAPL", "1Day")["timestamp"]) == 0
+
+
+def test_old_versions_are_pruned(tmp_path):
+    store = BarStore(str(tmp_path))
+    for i in range(4):
+        store.write("AAPL", "1Min", _bars([i * 60]), (i * 60, (i + 1) * 60))
+    versions = [e for e in os.listdir(tmp_path / "1Min" / "AAPL") if e.startswith("v")]
+    # the current version plus the one a concurrent reader may still hold
+    assert len(versions) == 2
+    assert store.read("AAPL", "1Min")["timestamp"].tolist() == [0, 60, 120, 180]
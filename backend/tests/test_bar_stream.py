@@ -0,0 +1,96 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+from services import bar_stream
+from services.batcher import TokenBucket
+
+
+def _bar(minute, volume):
+    return {"t": f"2024-03-01T14:{minute:02d}:00Z", "o": 1, "h": 2, "l": 0.5, "c": 1.5, "v": volume}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Fake Alpaca data API; pages[(path, page_token)] is the JSON page served. Returns the requests made."""
+    requests = []
+    pages = {}
+
+    def handler(request):
+        requests.append(request)
+        key = (request.url.path, request.url.params.get("page_token"))
+        if key not in pages:
+            return httpx.Response(500, json={"message": "boom"})
+        return httpx.Response(200, json=pages[key])
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(bar_stream, "get_http_client", lambda: client)
+    monkeypatch.setattr(bar_stream, "upstream_limiter", TokenBucket(rate_per_minute=60000))
+    return requests, pages
+
+
+def _stream(stocks, crypto):
+    async def collect():
+        return [
+            chunk async for chunk in bar_stream.stream_bars_ndjson(
+                {"APCA-API-KEY-ID": "k"}, stocks, crypto, "1Min",
+                datetime(2024, 3, 1, tzinfo=timezone.utc), None,
+            )
+        ]
+
+    return asyncio.run(collect())
+
+
+def _lines(chunks):
+    return [json.loads(line) for chunk in chunks for line in chunk.decode().splitlines()]
+
+
+def test_pages_are_followed_until_the_token_runs_out(upstream):
+    requests, pages = upstream
+    stocks = bar_stream.STOCK_BARS_PATH
+    pages[(stocks, None)] = {"bars": {"AAPL": [_bar(0, 10), _bar(1, 11)]}, "next_page_token": "p2"}
+    pages[(stocks, "p2")] = {"bars": {"AAPL": [_bar(2, 12)], "MSFT": [_bar(2, 5)]}, "next_page_token": "p3"}
+    pages[(stocks, "p3")] = {"bars": {}, "next_page_token": None}
+
+    chunks = _stream(["AAPL", "MSFT"], [])
+    # one chunk per non-empty page
+    assert len(chunks) == 2
+    lines = _lines(chunks)
+    assert [(l["symbol"], l["volume"]) for l in lines] == [("AAPL", 10), ("AAPL", 11), ("AAPL", 12), ("MSFT", 5)]
+    assert lines[0] == {
+        "symbol": "AAPL", "timestamp": "2024-03-01T14:00:00+00:00", "open": 1.0, "high": 2.0, "low": 0.5,
+        "close": 1.5, "volume": 10, "source": "alpaca:iex",
+    }
+
+    assert [r.url.params.get("page_token") for r in requests] == [None, "p2", "p3"]
+    for r in requests:
+        # every page repeats the original query
+        assert r.url.params["symbols"] == "AAPL,MSFT"
+        assert r.url.params["feed"] == "iex"
+        assert r.url.params["limit"] == str(bar_stream.PAGE_SIZE)
+        assert r.url.params["start"] == "2024-03-01T00:00:00+00:00"
+        assert "end" not in r.url.params
+        assert r.headers["APCA-API-KEY-ID"] == "k"
+
+
+def test_stocks_then_crypto_with_fractional_crypto_volume(upstream):
+    _, pages = upstream
+    pages[(bar_stream.STOCK_BARS_PATH, None)] = {"bars": {"AAPL": [_bar(0, 10)]}}
+    pages[(bar_stream.CRYPTO_BARS_PATH, None)] = {"bars": {"BTC/USD": [_bar(0, 0.25)]}}
+    lines = _lines(_stream(["AAPL"], ["BTC/USD"]))
+    assert [(l["symbol"], l["volume"], l["source"]) for l in lines] == [
+        ("AAPL", 10, "alpaca:iex"), ("BTC/USD", 0.25, "alpaca:crypto"),
+    ]
+
+
+def test_upstream_error_is_reported_in_band_and_the_next_query_still_runs(upstream):
+    _, pages = upstream
+    pages[(bar_stream.STOCK_BARS_PATH, None)] = {"bars": {"AAPL": [_bar(0, 10)]}, "next_page_token": "gone"}
+    pages[(bar_stream.CRYPTO_BARS_PATH, None)] = {"bars": {"BTC/USD": [_bar(0, 1)]}}
+    lines = _lines(_stream(["AAPL"], ["BTC/USD"]))
+    assert lines[0]["symbol"] == "AAPL"
+    assert lines[1]["source"] == "alpaca:iex" and "error" in lines[1]
+    assert lines[2]["symbol"] == "BTC/USD"
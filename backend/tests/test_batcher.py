@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from services import batcher
+from services.batcher import MicroBatcher, TokenBucket
+
+
+@pytest.fixture
+def sleeps(clock, monkeypatch):
+    """The limiter's waits, taken on a fake clock instead of real time."""
+    fake = clock(batcher)
+    waits = []
+
+    async def sleep(seconds):
+        waits.append(seconds)
+        fake.advance(seconds)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    return waits
+
+
+def test_token_bucket_allows_burst_then_waits_one_interval(sleeps):
+    bucket = TokenBucket(rate_per_minute=60, burst=3)
+
+    async def take(n):
+        for _ in range(n):
+            await bucket.acquire()
+
+    asyncio.run(take(3))
+    assert sleeps == []
+    asyncio.run(take(1))
+    assert sleeps == [pytest.approx(1.0)]
+
+
+def test_token_bucket_refills_up_to_capacity(sleeps):
+    bucket = TokenBucket(rate_per_minute=60, burst=2)
+    asyncio.run(bucket.acquire(2))
+    batcher.time.advance(60)
+    asyncio.run(bucket.acquire(2))
+    assert sleeps == []
+    asyncio.run(bucket.acquire())
+    assert sleeps == [pytest.approx(1.0)]
+
+
+def test_default_burst_is_a_tenth_of_the_minute_budget():
+    assert TokenBucket(rate_per_minute=200).capacity == 20
+    assert TokenBucket(rate_per_minute=5).capacity == 1
+
+
+def _batcher(max_batch=200):
+    return MicroBatcher(window_seconds=0.001, limiter=TokenBucket(rate_per_minute=6000), max_batch=max_batch)
+
+
+def test_concurrent_submits_share_one_upstream_call():
+    calls = []
+
+    async def fetch(symbols):
+        calls.append(symbols)
+        return {s: s.lower() for s in symbols}
+
+    async def run():
+        mb = _batcher()
+        results = await asyncio.gather(
+            mb.submit("quotes", ["AAPL", "MSFT"], fetch),
+            mb.submit("quotes", ["MSFT", "TSLA"], fetch),
+        )
+        return mb, results
+
+    mb, results = asyncio.run(run())
+    assert calls == [["AAPL", "MSFT", "TSLA"]]
+    assert results == [{"AAPL": "aapl", "MSFT": "msft"}, {"MSFT": "msft", "TSLA": "tsla"}]
+    assert mb.stats() == {"requests": 2, "upstream_calls": 1, "open_batches": 0}
+
+
+def test_batches_split_at_max_batch():
+    calls = []
+
+    async def fetch(symbols):
+        calls.append(symbols)
+        return {s: 1 for s in symbols}
+
+    async def run():
+        mb = _batcher(max_batch=2)
+        return await mb.submit("quotes", ["A", "B", "C", "D", "E"], fetch)
+
+    assert asyncio.run(run()) == {s: 1 for s in "ABCDE"}
+    assert calls == [["A", "B"], ["C", "D"], ["E"]]
+
+
+def test_upstream_error_reaches_every_caller():
+    async def fetch(symbols):
+        raise ConnectionError("upstream down")
+
+    async def run():
+        mb = _batcher()
+        return await asyncio.gather(
+            mb.submit("quotes", ["AAPL"], fetch), mb.submit("quotes", ["MSFT"], fetch), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert [type(r) for r in results] == [ConnectionError, ConnectionError]
@@ -0,0 +1,174 @@
+import asyncio
+
+import pytest
+
+from services import circuit_breaker as cb
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def fake_clock(clock):
+    return clock(cb)
+
+
+async def _ok():
+    return "ok"
+
+
+async def _fail():
+    raise ConnectionError("upstream down")
+
+
+def _call(breaker, fn):
+    return asyncio.run(breaker.call(fn))
+
+
+def _trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            _call(breaker, _fail)
+
+
+def test_opens_after_threshold_consecutive_failures(fake_clock):
+    breaker = CircuitBreaker("bars", failure_threshold=3)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            _call(breaker, _fail)
+    assert breaker.state == CLOSED
+    with pytest.raises(ConnectionError):
+        _call(breaker, _fail)
+    assert breaker.state == OPEN
+
+
+def test_success_resets_the_failure_count(fake_clock):
+    breaker = CircuitBreaker("bars", failure_threshold=2)
+    with pytest.raises(ConnectionError):
+        _call(breaker, _fail)
+    assert _call(breaker, _ok) == "ok"
+    with pytest.raises(ConnectionError):
+        _call(breaker, _fail)
+    assert breaker.state == CLOSED
+
+
+def test_open_breaker_fails_fast(fake_clock):
+    breaker = CircuitBreaker("bars", failure_threshold=1, base_backoff=2.0)
+    _trip(breaker)
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+
+    with pytest.raises(CircuitOpenError) as exc:
+        _call(breaker, upstream)
+    assert exc.value.retry_after == pytest.approx(2.0)
+    assert calls == []
+    assert breaker.rejected == 1
+    assert breaker.rejecting()
+
+
+def test_one_half_open_probe_after_backoff_and_success_closes(fake_clock):
+    breaker = CircuitBreaker("bars", failure_threshold=1, base_backoff=2.0)
+    _trip(breaker)
+    fake_clock.advance(2.0)
+    assert not breaker.rejecting()
+
+    async def probe():
+        assert breaker.state == HALF_OPEN
+        # everyone else is refused while the probe is in flight
+        with pytest.raises(CircuitOpenError):
+            await breaker.call(_ok)
+        return "probed"
+
+    assert _call(breaker, probe) == "probed"
+    assert breaker.state == CLOSED
+    assert breaker.trips == 0
+
+
+def test_failed_probe_doubles_backoff_up_to_cap(fake_clock):
+    breaker = CircuitBreaker("bars", failure_threshold=1, base_backoff=2.0, max_backoff=5.0)
+    _trip(breaker)
+    backoffs = []
+    for _ in range(3):
+        backoffs.append(breaker.opened_until - fake_clock.now)
+        fake_clock.advance(backoffs[-1])
+        with pytest.raises(ConnectionError):
+            _call(breaker, _fail)
+    assert backoffs == [2.0, 4.0, 5.0]
+    assert breaker.state == OPEN
+
+
+def test_cancelled_probe_returns_to_open(fake_clock):
+    breaker = CircuitBreaker("bars", failure_threshold=1, base_backoff=2.0)
+    _trip(breaker)
+    fake_clock.advance(2.0)
+
+    async def cancelled():
+        raise asyncio.CancelledError()
+
+    with pytest.raises(asyncio.CancelledError):
+        _call(breaker, cancelled)
+    assert breaker.state == OPEN
+    assert breaker.trips == 1
+    # the backoff has already elapsed, so the next caller probes again
+    assert _call(breaker, _ok) == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_stats_report_retry_after_only_while_open(fake_clock):
+    breaker = CircuitBreaker("bars", failure_threshold=1, base_backoff=2.0)
+    assert breaker.stats()["retry_after"] == 0.0
+    _trip(breaker)
+    fake_clock.advance(0.5)
+    assert breaker.stats() == {"state": OPEN, "failures": 0, "trips": 1, "rejected": 0, "retry_after": 1.5}
+
+
+def test_concurrent_failures_trip_once(fake_clock):
+    breaker = CircuitBreaker("bars", failure_threshold=3, base_backoff=2.0)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def slow_fail():
+            await release.wait()
+            raise ConnectionError("upstream down")
+
+        calls = [asyncio.ensure_future(breaker.call(slow_fail)) for _ in range(10)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ConnectionError) for r in results)
+    # the seven failures after the third belong to the same outage
+    assert breaker.trips == 1
+    assert breaker.opened_until - fake_clock.now == 2.0
+
+
+def test_calls_started_before_a_trip_do_not_fail_the_probe(fake_clock):
+    breaker = CircuitBreaker("bars", failure_threshold=1, base_backoff=2.0)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def slow_fail():
+            await release.wait()
+            raise ConnectionError("upstream down")
+
+        straggler = asyncio.ensure_future(breaker.call(slow_fail))
+        await asyncio.sleep(0)
+        with pytest.raises(ConnectionError):
+            await breaker.call(_fail)
+        fake_clock.advance(2.0)
+
+        async def probe():
+            # the straggler fails while the probe is in flight
+            release.set()
+            with pytest.raises(ConnectionError):
+                await straggler
+            assert breaker.state == HALF_OPEN
+            return "probed"
+
+        return await breaker.call(probe)
+
+    assert asyncio.run(run()) == "probed"
+    assert breaker.state == CLOSED
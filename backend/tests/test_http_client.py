@@ -0,0 +1,56 @@
+import asyncio
+from collections import Counter
+
+import httpx
+import pytest
+
+from services import http_client
+
+
+@pytest.fixture
+def fresh(monkeypatch):
+    """Empty counters and no shared client; closes whatever client the test created."""
+    monkeypatch.setattr(http_client, "_metrics", Counter())
+    monkeypatch.setattr(http_client, "_latency_total", 0.0)
+    monkeypatch.setattr(http_client, "_client", None)
+    yield
+    asyncio.run(http_client.close_http_client())
+
+
+def test_one_shared_client_until_closed(fresh):
+    async def run():
+        first = http_client.get_http_client()
+        assert http_client.get_http_client() is first
+        await http_client.close_http_client()
+        assert first.is_closed
+        second = http_client.get_http_client()
+        assert second is not first
+        return second
+
+    client = asyncio.run(run())
+    assert client.timeout == http_client.HTTP_TIMEOUT
+
+
+def test_hooks_count_requests_statuses_and_latency(fresh):
+    statuses = iter([200, 204, 404, 503])
+
+    async def run():
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(next(statuses))),
+            event_hooks={"request": [http_client._on_request], "response": [http_client._on_response]},
+        )
+        async with client:
+            for _ in range(4):
+                await client.get("https://example.test/")
+
+    asyncio.run(run())
+    stats = http_client.http_pool_stats()
+    assert stats["requests"] == 4
+    assert (stats["status_2xx"], stats["status_4xx"], stats["status_5xx"]) == (2, 1, 1)
+    assert stats["HTTP/1.1"] == 4
+    assert stats["mean_latency_ms"] is not None and stats["mean_latency_ms"] >= 0
+
+
+def test_stats_before_any_request(fresh):
+    stats = http_client.http_pool_stats()
+    assert stats == {"mean_latency_ms": None, "connections": 0, "idle_connections": 0}
@@ -0,0 +1,192 @@
+import math
+
+import numpy as np
+import pytest
+
+from services.indicators import IndicatorEngine, compute, indicator_key, parse_indicator, warmup_bars
+
+SPECS = ["sma:10", "ema:10", "rsi:14", "bbands:20:2", "atr:14"]
+
+
+def _cols(n, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    spread = rng.uniform(0.1, 2.0, n)
+    return {
+        "timestamp": np.arange(n, dtype=np.int64) * 60,
+        "open": close,
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": np.ones(n),
+    }
+
+
+# --------- naive references: one bar at a time, straight from the textbook definitions ---------
+def _naive(spec, cols):
+    name, params = parse_indicator(spec)
+    period = params[0]
+    high, low, close = (list(map(float, cols[c])) for c in ("high", "low", "close"))
+    n = len(close)
+    nan = [math.nan] * n
+    if name == "sma":
+        return {"value": [sum(close[i - period + 1:i + 1]) / period if i >= period - 1 else math.nan for i in range(n)]}
+    if name == "ema":
+        out, alpha = list(nan), 2.0 / (period + 1)
+        if n >= period:
+            out[period - 1] = sum(close[:period]) / period
+            for i in range(period, n):
+                out[i] = alpha * close[i] + (1 - alpha) * out[i - 1]
+        return {"value": out}
+    if name == "rsi":
+        out = list(nan)
+        if n > period:
+            deltas = [close[i] - close[i - 1] for i in range(1, n)]
+            gain = sum(max(d, 0.0) for d in deltas[:period]) / period
+            loss = sum(max(-d, 0.0) for d in deltas[:period]) / period
+            for i in range(period, n):
+                if i > period:
+                    d = deltas[i - 1]
+                    gain = (gain * (period - 1) + max(d, 0.0)) / period
+                    loss = (loss * (period - 1) + max(-d, 0.0)) / period
+                out[i] = 100.0 if loss == 0 else 100.0 - 100.0 / (1.0 + gain / loss)
+        return {"value": out}
+    if name == "bbands":
+        middle, upper, lower = list(nan), list(nan), list(nan)
+        for i in range(period - 1, n):
+            window = close[i - period + 1:i + 1]
+            mean = sum(window) / period
+            std = math.sqrt(sum((c - mean) ** 2 for c in window) / period)
+            middle[i], upper[i], lower[i] = mean, mean + params[1] * std, mean - params[1] * std
+        return {"middle": middle, "upper": upper, "lower": lower}
+    tr = [high[0] - low[0]] + [
+        max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1])) for i in range(1, n)
+    ]
+    out = list(nan)
+    if n > period:
+        out[period] = sum(tr[1:period + 1]) / period
+        for i in range(period + 1, n):
+            out[i] = (out[i - 1] * (period - 1) + tr[i]) / period
+    return {"value": out}
+
+
+def _assert_close(actual, expected):
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        if e is None or math.isnan(e):
+            assert a is None or math.isnan(a)
+        else:
+            assert a == pytest.approx(e, rel=1e-9, abs=1e-9)
+
+
+def _tail(values, n):
+    return {f: v[-n:] for f, v in values.items()}
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_vectorized_compute_matches_naive(spec):
+    # longer than one _ewm block, so the block carry is exercised
+    cols = _cols(600)
+    values, state = compute(parse_indicator(spec), cols)
+    assert state is not None
+    for field, expected in _naive(spec, cols).items():
+        _assert_close(values[field].tolist(), expected)
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_too_little_history_keeps_no_state(spec):
+    parsed = parse_indicator(spec)
+    cols = _cols(warmup_bars(parsed) - 1)
+    values, state = compute(parsed, cols)
+    assert state is None
+    # values are still right where defined (EMA's warmup runs past its first value)
+    for field, expected in _naive(spec, cols).items():
+        _assert_close(values[field].tolist(), expected)
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_incremental_updates_match_full_recompute(spec):
+    cols = _cols(400)
+    engine = IndicatorEngine(history=500)
+    parsed = parse_indicator(spec)
+
+    def window(n):
+        return {name: arr[:n] for name, arr in cols.items()}
+
+    # 200 bars, the last one still forming; then one bar at a time up to 400
+    for n in range(200, 401):
+        out = engine.series("SPY", "1Min", parsed, window(n), closed=n - 1, limit=50)
+        expected = _tail(_naive(spec, window(n)), 50)
+        assert out["timestamp"] == cols["timestamp"][:n][-50:].tolist()
+        for field, values in expected.items():
+            _assert_close(out[field], values)
+
+    assert engine.stats()["full_computes"] == 1
+    assert engine.stats()["incremental_updates"] == 200
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_forming_bar_revisions_are_not_committed(spec):
+    cols = _cols(300)
+    engine = IndicatorEngine()
+    parsed = parse_indicator(spec)
+    closes = cols["close"].copy()
+
+    # the last bar is revised three times before it closes
+    for revision in (1.0, -3.0, 0.5):
+        cols["close"] = closes.copy()
+        cols["close"][-1] = closes[-1] + revision
+        cols["high"][-1] = max(cols["high"][-1], cols["close"][-1])
+        cols["low"][-1] = min(cols["low"][-1], cols["close"][-1])
+        out = engine.series("SPY", "1Min", parsed, cols, closed=299, limit=20)
+        for field, values in _tail(_naive(spec, cols), 20).items():
+            _assert_close(out[field], values)
+
+    # once the final revision closes, the committed state agrees with a full recompute
+    out = engine.series("SPY", "1Min", parsed, cols, closed=300, limit=20)
+    for field, values in _tail(_naive(spec, cols), 20).items():
+        _assert_close(out[field], values)
+    assert engine.stats()["full_computes"] == 1
+
+
+def test_bbands_sliding_variance_does_not_drift():
+    cols = _cols(5000, seed=3)
+    # a large level makes cancellation in the add/remove update visible if it drifts
+    for name in ("open", "high", "low", "close"):
+        cols[name] = cols[name] + 1e5
+    engine = IndicatorEngine(history=5000)
+    parsed = parse_indicator("bbands:20:2")
+    engine.series("SPY", "1Min", parsed, {k: v[:100] for k, v in cols.items()}, closed=100, limit=20)
+    out = engine.series("SPY", "1Min", parsed, cols, closed=5000, limit=20)
+    assert engine.stats()["incremental_updates"] == 4900
+    for field, values in _tail(_naive("bbands:20:2", cols), 20).items():
+        for a, e in zip(out[field], values):
+            assert a == pytest.approx(e, abs=1e-6)
+
+
+def test_window_without_the_last_committed_bar_recomputes():
+    cols = _cols(200)
+    engine = IndicatorEngine()
+    parsed = parse_indicator("sma:10")
+    engine.series("SPY", "1Min", parsed, cols, closed=200, limit=20)
+    # a window that no longer contains the last committed bar cannot resume
+    engine.series("SPY", "1Min", parsed, {k: v[:150] for k, v in cols.items()}, closed=150, limit=20)
+    assert engine.stats()["full_computes"] == 2
+
+
+@pytest.mark.parametrize(
+    "spec, parsed",
+    [("rsi", ("rsi", (14,))), ("BBANDS:10", ("bbands", (10, 2))), ("bbands:20:2.5", ("bbands", (20, 2.5)))],
+)
+def test_parse_indicator(spec, parsed):
+    assert parse_indicator(spec) == parsed
+
+
+@pytest.mark.parametrize("spec", ["macd", "sma:1", "sma:2.5", "sma:10:2", "rsi:5000"])
+def test_parse_indicator_rejects(spec):
+    with pytest.raises(ValueError):
+        parse_indicator(spec)
+
+
+def test_indicator_key_round_trips():
+    assert indicator_key(parse_indicator("bbands:20:2")) == "bbands:20:2"
@@ -0,0 +1,125 @@
+import asyncio
+import time as real_time
+
+import pytest
+from jose import jwt
+from jose.exceptions import JWTError
+
+from services import jwt_auth
+from services.jwt_auth import TokenVerifier, token_expiry
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def fake_clock(clock):
+    fake = clock(jwt_auth)
+    # jose checks exp against the real clock, so start there
+    fake.now = real_time.time()
+    return fake
+
+
+def _token(exp_in=3600, sub="user-1", aud="authenticated", secret=SECRET, **claims):
+    claims = dict(sub=sub, aud=aud, exp=int(real_time.time()) + exp_in, **claims)
+    return jwt.encode(claims, secret, algorithm="HS256")
+
+
+def _verifier(**kwargs):
+    return TokenVerifier(secret=SECRET, jwks_url=None, **kwargs)
+
+
+class RemoteCheck:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    async def __call__(self, token):
+        self.calls += 1
+        if self.fail:
+            raise JWTError("revoked")
+
+
+def _verify(verifier, token, remote=None):
+    return asyncio.run(verifier.verify(token, remote or RemoteCheck()))
+
+
+def test_hs256_token_is_verified_and_cached(fake_clock):
+    verifier = _verifier()
+    token = _token(email="a@example.com", role="authenticated")
+    user = _verify(verifier, token)
+    assert (user.id, user.email, user.role) == ("user-1", "a@example.com", "authenticated")
+    assert _verify(verifier, token) is user
+    assert verifier.stats() == {"entries": 1, "hits": 1, "misses": 1, "jwks_keys": 0}
+
+
+def test_expired_token_is_rejected(fake_clock):
+    with pytest.raises(JWTError):
+        _verify(_verifier(), _token(exp_in=-120))
+
+
+@pytest.mark.parametrize("token", [_token(secret="other-secret"), _token(aud="anon")])
+def test_bad_signature_or_audience_is_rejected(fake_clock, token):
+    with pytest.raises(JWTError):
+        _verify(_verifier(), token)
+
+
+def test_cache_entry_expires_after_exp_plus_leeway(fake_clock):
+    verifier = _verifier(leeway_seconds=30)
+    token = _token(exp_in=60)
+    _verify(verifier, token)
+    fake_clock.advance(89)
+    _verify(verifier, token)
+    assert verifier.misses == 1
+    fake_clock.advance(1)
+    # dropped from the cache and decoded again (jose still sees it as live on the real clock)
+    _verify(verifier, token)
+    assert verifier.misses == 2
+
+
+def test_without_local_key_remote_check_decides(fake_clock):
+    verifier = TokenVerifier(secret=None, jwks_url=None)
+    remote = RemoteCheck()
+    token = _token(secret="unknown-to-us")
+    assert _verify(verifier, token, remote).id == "user-1"
+    assert remote.calls == 1
+    with pytest.raises(JWTError):
+        _verify(TokenVerifier(secret=None, jwks_url=None), token, RemoteCheck(fail=True))
+
+
+def test_revocation_check_forgets_token_on_failure(fake_clock):
+    verifier = _verifier(revocation_check_seconds=60)
+    token = _token()
+    remote = RemoteCheck()
+    _verify(verifier, token, remote)
+    fake_clock.advance(30)
+    _verify(verifier, token, remote)
+    assert remote.calls == 0
+    fake_clock.advance(30)
+    _verify(verifier, token, remote)
+    assert remote.calls == 1
+
+    fake_clock.advance(60)
+    with pytest.raises(JWTError):
+        _verify(verifier, token, RemoteCheck(fail=True))
+    assert verifier.stats()["entries"] == 0
+
+
+def test_cache_is_bounded_lru(fake_clock):
+    verifier = _verifier(max_entries=2)
+    a, b, c = (_token(sub=s) for s in ("a", "b", "c"))
+    _verify(verifier, a)
+    _verify(verifier, b)
+    _verify(verifier, a)
+    _verify(verifier, c)
+    assert list(verifier._users) == [a, c]
+
+
+def test_missing_sub_is_rejected(fake_clock):
+    with pytest.raises(JWTError):
+        _verify(_verifier(), _token(sub=""))
+
+
+def test_token_expiry():
+    token = _token(exp_in=100)
+    assert token_expiry(token) == pytest.approx(real_time.time() + 100, abs=2)
+    assert token_expiry("not-a-jwt") is None
@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+import pytest
+
+from routers import market_data
+from services.assets import CRYPTO, STOCK
+
+
+def _inputs(n=250):
+    """(resolved, keys, quotes, snapshots) covering every branch of the live-prices combine."""
+    resolved, quotes, snaps = {}, {}, {}
+    for i in range(n):
+        if i % 5 == 4:
+            sym, key = f"C{i:03d}USD", f"C{i:03d}/USD"
+            resolved[sym] = (CRYPTO, key)
+        else:
+            sym = key = f"S{i:03d}"
+            resolved[sym] = (STOCK, key)
+            if i % 7 != 0:
+                bar = {"open": 100.0 + i, "high": 110.0 + i, "low": 90.0 + i, "volume": 1000 * i, "timestamp": "2024-03-01T21:00:00Z"}
+                if i % 11 == 0:
+                    bar["open"] = 0.0
+                snaps[key] = {"daily_bar": bar}
+            elif i % 14 == 0:
+                snaps[key] = {"daily_bar": None}
+        if i % 13 == 0:
+            continue  # no quote at all
+        bid = 0.0 if i % 3 == 0 else 101.25 + i
+        ask = 0.0 if i % 4 == 0 else 101.75 + i
+        quote = {"bid_price": bid, "ask_price": ask, "timestamp": f"2024-03-01T20:59:{i % 60:02d}Z"}
+        if i % 6 == 0:
+            quote.update(stale=True, age_seconds=12.5)
+        # quotes are keyed by canonical symbol, except a few by the request spelling
+        quotes[sym if i % 9 == 0 else key] = quote
+    keys = {sym: key for sym, (_, key) in resolved.items()}
+    return resolved, keys, quotes, snaps
+
+
+@pytest.fixture
+def inputs(monkeypatch):
+    data = _inputs()
+
+    async def live_inputs(symbols, credentials):
+        return data
+
+    monkeypatch.setattr(market_data, "_live_inputs", live_inputs)
+    return data
+
+
+def test_vectorized_combine_matches_scalar_path(inputs):
+    resolved, keys, quotes, _ = inputs
+    symbols = list(keys)
+    assert len(symbols) >= market_data.LIVE_PRICES_VECTORIZE_MIN_SYMBOLS
+
+    scalar = asyncio.run(market_data.get_live_prices_data(symbols, None))
+    vectorized = json.loads(asyncio.run(market_data.get_live_prices_json(symbols, None)))
+
+    assert list(vectorized) == list(scalar)
+    for sym, expected in scalar.items():
+        actual = vectorized[sym]
+        if not (quotes.get(sym) or quotes.get(keys[sym])):
+            # both stamp a missing quote with the current time
+            expected, actual = dict(expected, timestamp=None), dict(actual, timestamp=None)
+        assert actual.keys() == expected.keys(), sym
+        for field, value in expected.items():
+            assert actual[field] == (pytest.approx(value) if isinstance(value, float) else value), (sym, field)
+
+
+def test_vectorized_combine_marks_stale_quotes(inputs):
+    vectorized = json.loads(asyncio.run(market_data.get_live_prices_json(list(inputs[1]), None)))
+    assert vectorized["S006"]["stale"] is True
+    assert vectorized["S006"]["age_seconds"] == 12.5
+    assert "stale" not in vectorized["S001"]
+
+
+def test_duplicate_symbols_are_written_once(inputs):
+    _, keys, quotes, snaps = inputs
+    from services.live_prices import encode_live_prices
+
+    body = json.loads(encode_live_prices(["S001", "S001"], keys, {"S001"}, quotes, snaps))
+    assert list(body) == ["S001"]
+    assert body["S001"]["price"] == pytest.approx((102.25 + 102.75) / 2)
+    assert body["S001"]["change"] == pytest.approx(body["S001"]["price"] - 101.0)
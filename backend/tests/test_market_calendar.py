@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import pytest
+
+from services import market_calendar as mc
+from services import quote_cache as qc
+from services.market_calendar import CLOSED, OPEN, POST_MARKET, PRE_MARKET, MarketCalendar
+from services.quote_cache import QuoteCache, session_ttl
+from services.resample import EQUITY_TZ
+
+# Thu 2024-11-28 is Thanksgiving and Fri 2024-11-29 closes early at 13:00
+SESSIONS = [
+    {"date": "2024-11-26", "open": "09:30", "close": "16:00"},
+    {"date": "2024-11-27", "open": "09:30", "close": "16:00"},
+    {"date": "2024-11-29", "open": "09:30", "close": "13:00"},
+    {"date": "2024-12-02", "open": "09:30", "close": "16:00"},
+]
+
+
+def _et(month, day, hour, minute=0):
+    return datetime(2024, month, day, hour, minute, tzinfo=EQUITY_TZ).timestamp()
+
+
+@pytest.fixture
+def calendar(tmp_path):
+    cal = MarketCalendar(str(tmp_path / "calendar.json"), refresh_seconds=86400)
+    cal._apply({"sessions": SESSIONS})
+    return cal
+
+
+@pytest.mark.parametrize(
+    "month, day, hour, minute, phase",
+    [
+        (11, 26, 3, 59, CLOSED),
+        (11, 26, 4, 0, PRE_MARKET),
+        (11, 26, 9, 30, OPEN),
+        (11, 26, 15, 59, OPEN),
+        (11, 26, 16, 0, POST_MARKET),
+        (11, 26, 20, 0, CLOSED),
+        (11, 28, 12, 0, CLOSED),  # holiday
+        (11, 29, 12, 59, OPEN),
+        (11, 29, 13, 0, POST_MARKET),  # early close
+        (11, 30, 12, 0, CLOSED),  # weekend
+    ],
+)
+def test_phase(calendar, month, day, hour, minute, phase):
+    assert calendar.phase(_et(month, day, hour, minute))[0] == phase
+
+
+def test_outside_the_fetched_range_is_treated_as_open(calendar):
+    assert calendar.phase(_et(12, 2, 21)) == (OPEN, None)
+    assert calendar.phase(_et(11, 1, 12)) == (OPEN, None)
+    assert MarketCalendar("/nonexistent", 86400).phase(_et(11, 26, 2)) == (OPEN, None)
+
+
+def test_equity_ttl_by_phase(calendar, monkeypatch):
+    monkeypatch.setattr(mc, "EXTENDED_HOURS_TTL_SECONDS", 30.0)
+    assert calendar.equity_ttl(5, _et(11, 26, 10)) == 5
+    assert calendar.equity_ttl(5, _et(11, 26, 17)) == 30
+    assert calendar.equity_ttl(5, _et(11, 26, 5)) == 30
+    # after the post-market the values are final until the next pre-market
+    assert calendar.equity_ttl(5, _et(11, 26, 21)) == _et(11, 27, 4) - _et(11, 26, 21)
+    # across the holiday to Friday's pre-market
+    assert calendar.equity_ttl(5, _et(11, 27, 20, 30)) == _et(11, 29, 4) - _et(11, 27, 20, 30)
+
+
+def test_quote_cache_holds_equities_off_hours_but_not_crypto(calendar, clock, monkeypatch):
+    fake = clock(qc)
+    fake.now = _et(11, 29, 20, 30)
+    monkeypatch.setattr(qc, "market_calendar", calendar)
+    monkeypatch.setattr(mc, "time", fake)
+    cache = QuoteCache(ttl_seconds=5, ttl_for=session_ttl(5))
+    cache.set("AAPL", {"bid_price": 1.0})
+    cache.set("BTC/USD", {"bid_price": 2.0})
+    fake.advance(3600)
+    # nothing trades over the weekend, so the Friday quote is still served without a fetch
+    assert cache.get("AAPL") == {"bid_price": 1.0}
+    assert cache.get("BTC/USD") is None
+    fake.now = _et(12, 2, 4) + 1
+    assert cache.get("AAPL") is None
+
+
+def test_calendar_loads_from_its_file(tmp_path):
+    import json
+
+    path = tmp_path / "calendar.json"
+    path.write_text(json.dumps({"fetched_at": 10.0, "sessions": SESSIONS}))
+    cal = MarketCalendar(str(path), refresh_seconds=86400)
+    assert cal.load_local()
+    assert cal.loaded_at == 10.0
+    assert cal.is_open(_et(11, 27, 12))
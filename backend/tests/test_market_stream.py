@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from services import market_stream as ms
+
+
+class FakeStream:
+    """Records subscription changes; run() blocks like the SDK stream until stopped."""
+
+    def __init__(self):
+        self._running = True
+        self.subscribed = set()
+        self._stopped = threading.Event()
+
+    def subscribe_quotes(self, handler, *symbols):
+        self.subscribed.update(symbols)
+
+    def unsubscribe_quotes(self, *symbols):
+        self.subscribed.difference_update(symbols)
+
+    subscribe_trades = subscribe_daily_bars = lambda self, handler, *symbols: None
+    unsubscribe_trades = unsubscribe_daily_bars = lambda self, *symbols: None
+
+    def run(self):
+        self._stopped.wait(5)
+
+    def stop(self):
+        self._stopped.set()
+
+
+@pytest.fixture
+def ingester():
+    ing = ms.MarketStreamIngester(max_symbols=2, max_age_seconds=15, idle_seconds=60)
+    ing._stock.factory = FakeStream
+    ing.enabled = True
+    yield ing
+    ing._stock.stop()
+
+
+def _quote(ing, symbol, age=0.0):
+    ing.last_quotes[symbol] = time.monotonic() - age, {"bid_price": 1.0, "ask_price": 2.0}
+
+
+def test_fresh_quotes_are_served(ingester):
+    ingester.watch(["AAPL"])
+    _quote(ingester, "AAPL")
+    assert ingester.quote("AAPL") == {"bid_price": 1.0, "ask_price": 2.0}
+
+
+def test_stale_quotes_fall_back(ingester):
+    ingester.watch(["AAPL"])
+    _quote(ingester, "AAPL", age=16)
+    assert ingester.quote("AAPL") is None
+
+
+def test_nothing_is_served_while_reconnecting(ingester):
+    ingester.watch(["AAPL"])
+    _quote(ingester, "AAPL")
+    ingester._stock.stream._running = False
+    assert ingester.quote("AAPL") is None
+
+
+def test_unwatched_symbols_are_not_served(ingester):
+    _quote(ingester, "AAPL")
+    assert ingester.quote("AAPL") is None
+
+
+def test_full_feed_keeps_recently_watched_symbols(ingester):
+    ingester.watch(["AAPL", "MSFT"])
+    ingester.watch(["TSLA"])
+    assert list(ingester._stock.symbols) == ["AAPL", "MSFT"]
+    assert ingester._stock.stream.subscribed == {"AAPL", "MSFT"}
+
+
+def test_full_feed_evicts_idle_symbols_least_recently_watched_first(ingester):
+    ingester.watch(["AAPL", "MSFT"])
+    feed = ingester._stock
+    for s in feed.symbols:
+        feed.symbols[s] -= 120
+
+    ingester.watch(["TSLA"])
+    assert list(feed.symbols) == ["MSFT", "TSLA"]
+    assert feed.stream.subscribed == {"MSFT", "TSLA"}
+
+
+def test_watching_again_refreshes_the_symbol(ingester):
+    ingester.watch(["AAPL", "MSFT"])
+    feed = ingester._stock
+    for s in feed.symbols:
+        feed.symbols[s] -= 120
+    ingester.watch(["AAPL"])
+    ingester.watch(["TSLA"])
+    assert set(feed.symbols) == {"AAPL", "TSLA"}
@@ -0,0 +1,101 @@
+from datetime import datetime
+
+import pytest
+
+from services.order_ledger import OrderLedger, normalize_row, order_row
+from services.pnl import PnLBook
+
+
+def _order(order_id, status, filled_qty, filled_avg_price, side="buy", qty=100, submitted="2025-01-02T15:00:00Z"):
+    return order_row({
+        "id": order_id,
+        "symbol": "AAPL",
+        "side": side,
+        "type": "limit",
+        "time_in_force": "day",
+        "status": status,
+        "qty": str(qty),
+        "filled_qty": str(filled_qty),
+        "filled_avg_price": str(filled_avg_price) if filled_avg_price else None,
+        "submitted_at": submitted,
+        "updated_at": submitted,
+    })
+
+
+def test_partial_fills_of_working_orders_are_recorded():
+    ledger = OrderLedger("user-1", None)
+    ledger.apply([_order("o1", "partially_filled", 40, 100.0)])
+    assert [(f.qty, f.price) for f in ledger.fills] == [(40.0, 100.0)]
+
+    # the rest fills at 110, moving the average to 106
+    ledger.apply([_order("o1", "filled", 100, 106.0)])
+    assert [(f.qty, pytest.approx(f.price)) for f in ledger.fills] == [(40.0, 100.0), (60.0, 110.0)]
+    assert {f.order_id for f in ledger.fills} == {"o1"}
+
+
+def test_partially_filled_then_canceled_keeps_the_filled_part():
+    ledger = OrderLedger("user-1", None)
+    ledger.apply([_order("o1", "partially_filled", 40, 100.0)])
+    ledger.apply([_order("o1", "canceled", 40, 100.0)])
+    assert sum(f.qty for f in ledger.fills) == 40.0
+
+
+def test_rereads_and_stale_reads_add_nothing():
+    ledger = OrderLedger("user-1", None)
+    ledger.apply([_order("o1", "filled", 100, 100.0)])
+    assert ledger.apply([_order("o1", "filled", 100, 100.0)]) == []
+    assert ledger.apply([_order("o1", "partially_filled", 40, 100.0)]) == []
+    assert ledger.orders["o1"]["status"] == "filled"
+    assert len(ledger.fills) == 1
+
+
+def test_unfilled_orders_have_no_fills():
+    ledger = OrderLedger("user-1", None)
+    ledger.apply([_order("o1", "new", 0, None), _order("o2", "canceled", 0, None)])
+    assert ledger.fills == []
+
+
+def test_history_is_newest_first_within_bounds():
+    ledger = OrderLedger("user-1", None)
+    ledger.apply([
+        _order("o1", "filled", 1, 10.0, submitted="2025-01-02T15:00:00Z"),
+        _order("o2", "filled", 1, 10.0, submitted="2025-01-03T15:00:00Z"),
+        _order("o3", "filled", 1, 10.0, submitted="2025-01-04T15:00:00Z"),
+    ])
+    assert [r["order_id"] for r in ledger.history()] == ["o3", "o2", "o1"]
+    ts = datetime.fromisoformat("2025-01-03T15:00:00+00:00").timestamp()
+    assert [r["order_id"] for r in ledger.history(start=ts)] == ["o3", "o2"]
+    assert [r["order_id"] for r in ledger.history(end=ts, limit=1)] == ["o2"]
+
+
+def test_stored_rows_normalize_to_the_same_shape():
+    row = _order("o1", "filled", 100, 100.0)
+    stored = dict(row, filled_qty=100, submitted_at="2025-01-02T15:00:00+00:00", user_id="user-1", synced_at="x")
+    assert normalize_row(stored) == row
+
+
+def test_pnl_follows_partial_fills_per_order():
+    ledger = OrderLedger("user-1", None)
+    book = PnLBook()
+    ledger.apply([_order("buy", "filled", 100, 100.0)])
+    ledger.apply([_order("sell", "partially_filled", 40, 110.0, side="sell", submitted="2025-01-03T15:00:00Z")])
+    book.follow(ledger, ledger.fills)
+    assert book.realized("sell") == pytest.approx(400.0)
+
+    ledger.apply([_order("sell", "filled", 100, 112.0, side="sell", submitted="2025-01-03T15:00:00Z")])
+    book.follow(ledger, ledger.fills)
+    assert book.realized("sell") == pytest.approx(1200.0)
+    assert book.open_positions() == {}
+
+
+def test_following_another_ledger_rebuilds_the_book():
+    book = PnLBook()
+    first = OrderLedger("user-1", "account-1")
+    first.apply([_order("buy", "partially_filled", 40, 100.0)])
+    book.follow(first, first.fills)
+
+    # a reloaded ledger sees the order finished in one read
+    second = OrderLedger("user-1", "account-1")
+    second.apply([_order("buy", "filled", 100, 100.0)])
+    book.follow(second, second.fills)
+    assert book.open_positions()["AAPL"]["quantity"] == pytest.approx(100.0)
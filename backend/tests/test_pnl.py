@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from services.pnl import SECONDS_PER_DAY, Fill, PnLBook, match_fills
+
+DAY = SECONDS_PER_DAY
+
+
+def _fills(*rows, symbol="AAPL"):
+    return [Fill(id=f"{symbol}-{i}", symbol=symbol, ts=ts, qty=qty, price=price) for i, (ts, qty, price) in enumerate(rows)]
+
+
+def _match(rows, method):
+    ts, qty, price = (np.array(col, dtype=float) for col in zip(*rows))
+    return match_fills(ts, qty, price, method)
+
+
+SCALE_OUT = [(0, 10, 100.0), (1, 10, 110.0), (2, -15, 120.0)]
+
+
+@pytest.mark.parametrize(
+    "method, pnl, lot_price",
+    [("fifo", 250.0, 110.0), ("lifo", 200.0, 100.0), ("average", 225.0, 105.0)],
+)
+def test_cost_basis_methods(method, pnl, lot_price):
+    m = _match(SCALE_OUT, method)
+    assert m.pnl.tolist() == pytest.approx([0.0, 0.0, pnl])
+    assert m.closed.tolist() == pytest.approx([0.0, 0.0, 15.0])
+    assert m.lots.qty.sum() == pytest.approx(5.0)
+    assert np.average(m.lots.price, weights=np.abs(m.lots.qty)) == pytest.approx(lot_price)
+
+
+@pytest.mark.parametrize("method", ["fifo", "lifo", "average"])
+def test_flip_closes_then_opens_a_short(method):
+    m = _match([(0, 5, 100.0), (1, -8, 90.0), (2, 3, 80.0)], method)
+    assert m.pnl.tolist() == pytest.approx([0.0, -50.0, 30.0])
+    assert m.closed.tolist() == pytest.approx([0.0, 5.0, 3.0])
+    assert len(m.lots.qty) == 0
+
+
+@pytest.mark.parametrize("method", ["fifo", "lifo", "average"])
+def test_incremental_and_out_of_order_adds_match_one_batch(method):
+    rng = np.random.default_rng(7)
+    qty = rng.integers(-20, 21, size=300).astype(float)
+    fills = [
+        Fill(id=str(i), symbol="AB"[i % 2], ts=float(i), qty=q, price=float(p))
+        for i, (q, p) in enumerate(zip(qty, rng.uniform(50, 150, size=300)))
+    ]
+    batch = PnLBook(method)
+    batch.add(fills)
+
+    incremental = PnLBook(method)
+    for chunk in range(0, 300, 37):
+        incremental.add(fills[chunk:chunk + 37])
+
+    shuffled = PnLBook(method)
+    shuffled.add(fills[150:])
+    shuffled.add(fills[:150])
+
+    expected = batch.stats()
+    for book in (incremental, shuffled):
+        assert book.stats() == pytest.approx(expected)
+        assert [book.realized(f.id) for f in fills] == pytest.approx([batch.realized(f.id) for f in fills])
+
+
+def test_duplicate_fills_are_ignored():
+    book = PnLBook()
+    fills = _fills(*SCALE_OUT)
+    assert book.add(fills) == 3
+    assert book.add(fills) == 0
+    assert book.stats()["realized_pnl"] == pytest.approx(250.0)
+
+
+def test_avg_holding_days_is_weighted_by_quantity():
+    book = PnLBook()
+    book.add(_fills(
+        (0 * DAY, 1, 100.0),
+        (10 * DAY, -1, 101.0),  # 1 share held 10 days
+        (10 * DAY, 10_000, 100.0),
+        (11 * DAY, -10_000, 99.0),  # 10,000 shares held 1 day
+    ))
+    stats = book.stats()
+    assert stats["closed_trades"] == 2
+    assert stats["avg_holding_days"] == pytest.approx((1 * 10 + 10_000 * 1) / 10_001)
+    assert [t["holding_days"] for t in book.trades()] == pytest.approx([10.0, 1.0])
+
+
+def test_stats_window_and_open_positions():
+    book = PnLBook()
+    book.add(_fills(*SCALE_OUT))
+    assert book.stats(start=3)["closed_trades"] == 0
+    assert book.stats(end=2)["realized_pnl"] == pytest.approx(250.0)
+    assert book.open_positions() == {"AAPL": {"quantity": pytest.approx(5.0), "cost_basis": pytest.approx(110.0)}}
+
+
+def test_follow_applies_only_the_unapplied_tail():
+    log = _fills(*SCALE_OUT[:2])
+    book = PnLBook()
+    assert book.follow(log, log) == 2
+    log.extend(_fills(*SCALE_OUT)[2:])
+    assert book.follow(log, log) == 1
+    assert book.stats()["realized_pnl"] == pytest.approx(250.0)
+
+
+def test_unknown_cost_basis():
+    with pytest.raises(ValueError):
+        PnLBook("hifo")
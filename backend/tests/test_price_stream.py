@@ -0,0 +1,59 @@
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+from starlette.websockets import WebSocketDisconnect
+
+from dependencies import get_supabase_client
+from routers import market_data
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def user_from_token(token, supabase):
+        return object()
+
+    async def live_prices(symbols, credentials):
+        return {s: {"price": 1.0, "change": 0.0, "change_percent": 0.0} for s in symbols}
+
+    monkeypatch.setattr(market_data, "get_user_from_token", user_from_token)
+    monkeypatch.setattr(market_data, "get_live_prices_data", live_prices)
+    app = FastAPI()
+    app.include_router(market_data.router)
+    app.dependency_overrides[get_supabase_client] = lambda: None
+    return TestClient(app)
+
+
+def _token(expires_in: float) -> str:
+    return jwt.encode({"sub": "user-1", "exp": int(time.time() + expires_in)}, "secret", algorithm="HS256")
+
+
+def test_symbols_must_be_a_list(client):
+    with client.websocket_connect(f"/api/market-data/stream?token={_token(3600)}") as ws:
+        ws.send_json({"action": "subscribe", "symbols": "AAPL"})
+        assert ws.receive_json() == {"type": "error", "detail": "symbols must be a list"}
+        ws.send_json({"action": "subscribe", "symbols": ["AAPL"]})
+        msg = ws.receive_json()
+        assert msg["type"] == "snapshot"
+        assert list(msg["data"]) == ["AAPL"]
+
+
+def test_socket_closes_when_the_token_expires(client):
+    with client.websocket_connect(f"/api/market-data/stream?token={_token(1)}") as ws:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+        assert closed.value.code == 1008
+
+
+def test_unknown_actions_and_bad_json_keep_the_socket_open(client):
+    with client.websocket_connect(f"/api/market-data/stream?token={_token(3600)}") as ws:
+        ws.send_json({"action": "ping"})
+        assert ws.receive_json() == {"type": "error", "detail": "Unknown action"}
+        ws.send_text("not json")
+        assert ws.receive_json() == {"type": "error", "detail": "Messages must be JSON"}
+        ws.send_json(["AAPL"])
+        assert ws.receive_json() == {"type": "error", "detail": "Unknown action"}
+        ws.send_json({"action": "subscribe", "symbols": ["AAPL"]})
+        assert ws.receive_json()["type"] == "snapshot"
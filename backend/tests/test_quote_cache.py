@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from services import quote_cache as qc
+from services.quote_cache import QuoteCache
+
+
+@pytest.fixture
+def fake_clock(clock):
+    return clock(qc)
+
+
+def test_values_expire_after_ttl(fake_clock):
+    cache = QuoteCache(ttl_seconds=5)
+    cache.set("AAPL", 1)
+    fake_clock.advance(4.9)
+    assert cache.get("AAPL") == 1
+    fake_clock.advance(0.1)
+    assert cache.get("AAPL") is None
+
+
+def test_last_known_outlives_ttl(fake_clock):
+    cache = QuoteCache(ttl_seconds=5)
+    cache.set("AAPL", 1)
+    fake_clock.advance(30)
+    assert cache.last_known(["AAPL", "MSFT"]) == {"AAPL": (30, 1)}
+
+
+def test_per_key_ttl_policy(fake_clock):
+    cache = QuoteCache(ttl_seconds=5, ttl_for=lambda key: 60 if "/" in key else 5)
+    cache.set("AAPL", 1)
+    cache.set("BTC/USD", 2)
+    fake_clock.advance(10)
+    assert cache.get("AAPL") is None
+    assert cache.get("BTC/USD") == 2
+
+
+def test_oldest_entries_are_evicted(fake_clock):
+    cache = QuoteCache(ttl_seconds=5, max_entries=2)
+    cache.set("A", 1)
+    cache.set("B", 2)
+    cache.set("A", 3)  # re-storing makes A the newest
+    cache.set("C", 4)
+    assert cache.get("B") is None
+    assert (cache.get("A"), cache.get("C")) == (3, 4)
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = QuoteCache(ttl_seconds=5)
+    calls = []
+
+    async def fetch(keys):
+        calls.append(list(keys))
+        await asyncio.sleep(0.01)
+        return {k: k.lower() for k in keys}
+
+    async def main():
+        return await asyncio.gather(
+            cache.get_many(["AAPL", "MSFT"], fetch),
+            cache.get_many(["MSFT", "TSLA"], fetch),
+        )
+
+    first, second = asyncio.run(main())
+    assert first == {"AAPL": "aapl", "MSFT": "msft"}
+    assert second == {"MSFT": "msft", "TSLA": "tsla"}
+    # the second caller joined MSFT in flight and fetched only TSLA
+    assert calls == [["AAPL", "MSFT"], ["TSLA"]]
+    assert cache.upstream_calls == 2
+
+
+def test_cached_keys_skip_the_fetcher():
+    cache = QuoteCache(ttl_seconds=5)
+    cache.set("AAPL", "cached")
+
+    async def fetch(keys):
+        assert keys == ["MSFT"]
+        return {"MSFT": "fetched"}
+
+    assert asyncio.run(cache.get_many(["AAPL", "MSFT"], fetch)) == {"AAPL": "cached", "MSFT": "fetched"}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_fetch_errors_reach_every_waiter_and_are_not_cached():
+    cache = QuoteCache(ttl_seconds=5)
+
+    async def fetch(keys):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        return await asyncio.gather(
+            cache.get_many(["AAPL"], fetch), cache.get_many(["AAPL"], fetch), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+    assert cache.upstream_calls == 1
+    assert cache.get("AAPL") is None
+    assert cache.stats()["inflight"] == 0
+
+
+def test_missing_keys_are_left_out():
+    cache = QuoteCache(ttl_seconds=5)
+
+    async def fetch(keys):
+        return {"AAPL": 1}
+
+    assert asyncio.run(cache.get_many(["AAPL", "NOPE"], fetch)) == {"AAPL": 1}
+    assert cache.get("NOPE") is None
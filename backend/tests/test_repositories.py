@@ -0,0 +1,146 @@
+import asyncio
+from types import SimpleNamespace
+
+from services.repositories import BrokerageAccountRepository, OrderLedgerRepository, StrategyRepository
+
+
+class _Query:
+    def __init__(self, client, table):
+        self.client = client
+        self.calls = [("table", table)]
+
+    def __getattr__(self, name):
+        if name == "not_":
+            self.calls.append(("not_",))
+            return self
+
+        def call(*args, **kwargs):
+            self.calls.append((name, *args, *(sorted(kwargs.items()) if kwargs else ())))
+            return self
+
+        return call
+
+    def execute(self):
+        self.client.queries.append(self.calls)
+        return SimpleNamespace(data=self.client.respond(self.calls))
+
+
+class RecordingClient:
+    """Stands in for the supabase client: records each query's builder chain and answers with respond(chain)."""
+
+    def __init__(self, respond=lambda calls: []):
+        self.queries = []
+        self.respond = respond
+
+    def table(self, name):
+        return _Query(self, name)
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_strategy_list_is_scoped_to_the_user_and_filtered():
+    client = RecordingClient()
+    repo = StrategyRepository(client)
+    assert _run(repo.list_for_user("u1")) == []
+    _run(repo.list_for_user("u1", is_active=False, strategy_type="grid", risk_level="low", limit=10, offset=20))
+    assert client.queries == [
+        [("table", "trading_strategies"), ("select", "*"), ("eq", "user_id", "u1")],
+        [
+            ("table", "trading_strategies"), ("select", "*"), ("eq", "user_id", "u1"),
+            ("eq", "is_active", False), ("eq", "type", "grid"), ("eq", "risk_level", "low"),
+            ("order", "updated_at", ("desc", True)), ("limit", 10), ("offset", 20),
+        ],
+    ]
+
+
+def test_strategy_reads_and_writes_match_id_and_owner():
+    client = RecordingClient(lambda calls: {"id": "s1"})
+    repo = StrategyRepository(client)
+    assert _run(repo.get("u1", "s1")) == {"id": "s1"}
+    _run(repo.update("u1", "s1", {"name": "x"}))
+    _run(repo.delete("u1", "s1"))
+    get, update, delete = client.queries
+    for query in (get, update, delete):
+        assert ("eq", "id", "s1") in query and ("eq", "user_id", "u1") in query
+    assert ("update", {"name": "x"}) in update
+    assert ("delete",) in delete
+
+
+def test_connected_account_is_the_first_row_or_none():
+    rows = [{"id": "a1"}, {"id": "a2"}]
+    client = RecordingClient(lambda calls: rows)
+    repo = BrokerageAccountRepository(client)
+    assert _run(repo.connected_alpaca_account("u1")) == {"id": "a1"}
+    assert client.queries[0] == [
+        ("table", "brokerage_accounts"), ("select", "*"), ("eq", "user_id", "u1"),
+        ("eq", "brokerage_name", "alpaca"), ("eq", "is_connected", True),
+    ]
+    rows.clear()
+    assert _run(repo.connected_alpaca_account("u1")) is None
+    assert _run(repo.get("u1", "a1")) is None
+
+
+def test_cross_user_account_queries_select_only_what_they_need():
+    client = RecordingClient()
+    repo = BrokerageAccountRepository(client)
+    _run(repo.connected_alpaca_accounts(500))
+    _run(repo.due_for_refresh("2024-03-01T00:00:00+00:00"))
+    streams, refresh = client.queries
+    assert streams == [
+        ("table", "brokerage_accounts"), ("select", "id, user_id, access_token"),
+        ("eq", "brokerage_name", "alpaca"), ("eq", "is_connected", True),
+        ("not_",), ("is_", "access_token", "null"), ("limit", 500),
+    ]
+    assert refresh == [
+        ("table", "brokerage_accounts"), ("select", "id, refresh_token, expires_at"),
+        ("eq", "brokerage_name", "alpaca"), ("eq", "is_connected", True),
+        ("not_",), ("is_", "refresh_token", "null"), ("lt", "expires_at", "2024-03-01T00:00:00+00:00"),
+    ]
+
+
+def test_account_update_and_delete():
+    client = RecordingClient()
+    repo = BrokerageAccountRepository(client)
+    _run(repo.update("a1", {"is_connected": False}))
+    _run(repo.delete("u1", "a1"))
+    assert client.queries == [
+        [("table", "brokerage_accounts"), ("update", {"is_connected": False}), ("eq", "id", "a1")],
+        [("table", "brokerage_accounts"), ("delete",), ("eq", "id", "a1"), ("eq", "user_id", "u1")],
+    ]
+
+
+def test_order_ledger_pages_until_a_short_page(monkeypatch):
+    monkeypatch.setattr(OrderLedgerRepository, "PAGE_SIZE", 2)
+
+    def respond(calls):
+        start = next(c[1] for c in calls if c[0] == "range")
+        return [{"order_id": str(i)} for i in range(start, min(start + 2, 5))]
+
+    client = RecordingClient(respond)
+    rows = _run(OrderLedgerRepository(client).list_for_account("u1", "a1"))
+    assert [r["order_id"] for r in rows] == ["0", "1", "2", "3", "4"]
+    assert [q[-1] for q in client.queries] == [("range", 0, 1), ("range", 2, 3), ("range", 4, 5)]
+    assert client.queries[0] == [
+        ("table", "order_ledger"), ("select", "*"), ("eq", "user_id", "u1"), ("eq", "account_id", "a1"),
+        ("order", "submitted_at"), ("range", 0, 1),
+    ]
+
+
+def test_order_ledger_without_account_matches_null_account():
+    client = RecordingClient()
+    _run(OrderLedgerRepository(client).list_for_account("u1", None))
+    assert ("is_", "account_id", "null") in client.queries[0]
+
+
+def test_order_ledger_upserts_in_chunks(monkeypatch):
+    monkeypatch.setattr(OrderLedgerRepository, "PAGE_SIZE", 2)
+    client = RecordingClient()
+    rows = [{"order_id": str(i)} for i in range(5)]
+    _run(OrderLedgerRepository(client).upsert(rows))
+    assert [q[1] for q in client.queries] == [
+        ("upsert", rows[0:2], ("on_conflict", "user_id,order_id")),
+        ("upsert", rows[2:4], ("on_conflict", "user_id,order_id")),
+        ("upsert", rows[4:5], ("on_conflict", "user_id,order_id")),
+    ]
@@ -0,0 +1,187 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from services.resample import EQUITY_TZ, bucket_starts, parse_timeframe, resample_bars, timeframe_seconds
+
+
+def _et(*args) -> int:
+    return int(datetime(*args, tzinfo=EQUITY_TZ).timestamp())
+
+
+def _utc(*args) -> int:
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+@pytest.mark.parametrize(
+    "timeframe, parsed",
+    [
+        ("1Min", (1, "Min")),
+        ("15Min", (15, "Min")),
+        ("59Min", (59, "Min")),
+        ("4Hour", (4, "Hour")),
+        ("1Day", (1, "Day")),
+        ("90Min", None),
+        ("2Day", None),
+        ("0Hour", None),
+        ("1Week", None),
+        ("", None),
+    ],
+)
+def test_parse_timeframe(timeframe, parsed):
+    assert parse_timeframe(timeframe) == parsed
+
+
+def test_timeframe_seconds():
+    assert timeframe_seconds("15Min") == 900
+    assert timeframe_seconds("4Hour") == 14400
+    assert timeframe_seconds("1Day") == 86400
+
+
+def test_crypto_buckets_are_utc_aligned():
+    ts = np.array([_utc(2024, 3, 1, 0, 59), _utc(2024, 3, 1, 1, 0), _utc(2024, 3, 1, 5, 7)])
+    assert bucket_starts(ts, 3600, crypto=True).tolist() == [
+        _utc(2024, 3, 1, 0), _utc(2024, 3, 1, 1), _utc(2024, 3, 1, 5),
+    ]
+
+
+def test_equity_minute_buckets_start_at_the_open():
+    ts = np.array([_et(2024, 3, 1, 9, 30), _et(2024, 3, 1, 9, 34), _et(2024, 3, 1, 9, 35), _et(2024, 3, 1, 9, 44)])
+    assert bucket_starts(ts, 300, crypto=False).tolist() == [
+        _et(2024, 3, 1, 9, 30), _et(2024, 3, 1, 9, 30), _et(2024, 3, 1, 9, 35), _et(2024, 3, 1, 9, 40),
+    ]
+
+
+def test_equity_four_hour_buckets_are_clock_aligned():
+    ts = np.array([_et(2024, 3, 1, 9, 30), _et(2024, 3, 1, 12, 0), _et(2024, 3, 1, 15, 59), _et(2024, 3, 1, 16, 30)])
+    assert bucket_starts(ts, 14400, crypto=False).tolist() == [
+        _et(2024, 3, 1, 8), _et(2024, 3, 1, 12), _et(2024, 3, 1, 12), _et(2024, 3, 1, 16),
+    ]
+
+
+def test_equity_daily_buckets_follow_the_trading_date_across_dst():
+    # US DST started on 2024-03-10: the ET midnight before is 05:00 UTC, the one after 04:00 UTC
+    ts = np.array([_et(2024, 3, 8, 15, 59), _et(2024, 3, 11, 9, 30), _et(2024, 3, 11, 15, 59)])
+    assert bucket_starts(ts, 86400, crypto=False).tolist() == [
+        _et(2024, 3, 8), _et(2024, 3, 11), _et(2024, 3, 11),
+    ]
+    assert _et(2024, 3, 8) % 86400 == 5 * 3600
+    assert _et(2024, 3, 11) % 86400 == 4 * 3600
+
+
+def test_resample_aggregates_ohlcv():
+    start = _utc(2024, 3, 1)
+    cols = {
+        "timestamp": np.array([start, start + 60, start + 120, start + 300, start + 360], dtype=np.int64),
+        "open": np.array([10.0, 11.0, 12.0, 20.0, 21.0]),
+        "high": np.array([11.0, 15.0, 13.0, 22.0, 25.0]),
+        "low": np.array([9.0, 10.0, 8.0, 19.0, 20.0]),
+        "close": np.array([11.0, 12.0, 12.5, 21.0, 24.0]),
+        "volume": np.array([1.0, 2.0, 3.0, 4.0, 5.0]),
+    }
+    out = resample_bars(cols, 300, crypto=True)
+    assert out["timestamp"].tolist() == [start, start + 300]
+    assert out["open"].tolist() == [10.0, 20.0]
+    assert out["high"].tolist() == [15.0, 25.0]
+    assert out["low"].tolist() == [8.0, 19.0]
+    assert out["close"].tolist() == [12.5, 24.0]
+    assert out["volume"].tolist() == [6.0, 9.0]
+
+
+def test_resample_empty():
+    cols = {name: np.empty(0) for name in ("timestamp", "open", "high", "low", "close", "volume")}
+    assert len(resample_bars(cols, 300, crypto=False)["timestamp"]) == 0
+
+
+@pytest.fixture
+def route(monkeypatch, tmp_path):
+    """The bars route against an empty bar store in tmp_path and an upstream that returns no bars."""
+    import asyncio
+    from types import SimpleNamespace
+
+    from routers import market_data
+    from services.bar_store import BarStore
+
+    calls = []
+
+    async def fetch(client, crypto, symbols, timeframe, start_time, end_time, limit):
+        calls.append((timeframe, start_time, end_time))
+        return {sym: {name: np.empty(0) for name in ("timestamp", "open", "high", "low", "close", "volume")} for sym in symbols}
+
+    store = BarStore(str(tmp_path))
+    monkeypatch.setattr(market_data, "bar_store", store)
+    monkeypatch.setattr(market_data, "_fetch_bar_columns", fetch)
+    monkeypatch.setattr(market_data, "BAR_STORE_ENABLED", True)
+
+    def load(timeframe, start, end=None, limit=None):
+        return asyncio.run(market_data._bar_columns(None, True, ["BTC/USD"], timeframe, start, end, limit))["BTC/USD"]
+
+    return SimpleNamespace(calls=calls, store=store, load=load)
+
+
+def _store_minutes(store, start, end):
+    ts = np.arange(start, end, 60, dtype=np.int64)
+    cols = {
+        "timestamp": ts,
+        "open": ts.astype(np.float64),
+        "high": ts.astype(np.float64) + 1,
+        "low": ts.astype(np.float64) - 1,
+        "close": ts.astype(np.float64) + 0.5,
+        "volume": np.ones(len(ts)),
+    }
+    store.write("BTC/USD", "1Min", cols, (start, end))
+
+
+def test_native_timeframes_are_fetched_when_minutes_are_not_stored(route):
+    route.load("1Hour", datetime(2024, 1, 1, tzinfo=timezone.utc), limit=10)
+    assert route.calls and {timeframe for timeframe, _, _ in route.calls} == {"1Hour"}
+
+
+def test_native_timeframes_are_resampled_from_stored_minutes(route):
+    start = _utc(2024, 1, 1)
+    _store_minutes(route.store, start, start + 6 * 3600)
+    bars = route.load("1Hour", datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2024, 1, 1, 5, 59, 59, tzinfo=timezone.utc))
+    assert route.calls == []
+    assert bars["timestamp"].tolist() == [start + h * 3600 for h in range(6)]
+    assert bars["open"][0] == start
+    assert bars["close"][0] == start + 3540 + 0.5
+    assert bars["volume"].tolist() == [60.0] * 6
+
+
+def test_forming_bucket_comes_from_upstream_at_the_native_timeframe(route):
+    import time
+
+    from routers.market_data import BAR_STORE_SETTLE_SECONDS
+
+    settled = int(time.time()) - BAR_STORE_SETTLE_SECONDS
+    settled -= settled % 60
+    start = settled - settled % 3600 - 3 * 3600
+    _store_minutes(route.store, start, settled)
+    bars = route.load("1Hour", datetime.fromtimestamp(start, timezone.utc))
+    forming = settled - settled % 3600
+    assert bars["timestamp"].tolist() == [start, start + 3600, start + 7200]
+    assert route.calls == [("1Hour", datetime.fromtimestamp(forming, timezone.utc), None)]
+
+
+def test_gap_in_stored_minutes_falls_back_to_upstream(route):
+    start = _utc(2024, 1, 1)
+    _store_minutes(route.store, start, start + 2 * 3600)
+    _store_minutes(route.store, start + 3 * 3600, start + 6 * 3600)
+    route.load("1Hour", datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2024, 1, 1, 5, 59, 59, tzinfo=timezone.utc))
+    assert [tf for tf, _, _ in route.calls] == ["1Hour"]
+
+
+def test_partial_bucket_at_the_end_is_fetched_natively(route):
+    start = _utc(2024, 1, 1)
+    _store_minutes(route.store, start, start + 6 * 3600)
+    bars = route.load("1Hour", datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2024, 1, 1, 5, 30, tzinfo=timezone.utc))
+    assert len(bars["timestamp"]) == 5
+    assert [(tf, begin) for tf, begin, _ in route.calls] == [("1Hour", datetime(2024, 1, 1, 5, tzinfo=timezone.utc))]
+
+
+def test_resampled_minute_window_is_sized_from_limit(route):
+    route.load("4Hour", datetime(2024, 1, 1, tzinfo=timezone.utc), limit=10)
+    assert {timeframe for timeframe, _, _ in route.calls} == {"1Min"}
+    # ten 4Hour bars need days of minutes, not everything up to now
+    assert all(end is not None and end < datetime(2024, 1, 12, tzinfo=timezone.utc) for _, _, end in route.calls)
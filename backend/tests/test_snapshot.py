@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+from services.snapshot import PersistedSnapshot
+
+
+class Numbers(PersistedSnapshot):
+    name = "numbers"
+
+    def __init__(self, path, fetched):
+        super().__init__(path, refresh_seconds=3600)
+        self.fetched = fetched
+        self.values = []
+
+    def _fetch(self):
+        return self.fetched
+
+    def _apply(self, data):
+        self.values = data.get("values", [])
+
+    def _summary(self, data):
+        return f"{len(data.get('values', []))} values"
+
+
+def test_refresh_applies_and_persists(tmp_path):
+    path = tmp_path / "data" / "numbers.json"
+    snap = Numbers(str(path), {"fetched_at": 123.0, "values": [1, 2]})
+    asyncio.run(snap.refresh())
+    assert snap.values == [1, 2]
+    assert snap.loaded_at == 123.0
+    assert json.loads(path.read_text()) == {"fetched_at": 123.0, "values": [1, 2]}
+
+    reloaded = Numbers(str(path), None)
+    assert reloaded.load_local()
+    assert (reloaded.values, reloaded.loaded_at) == ([1, 2], 123.0)
+
+
+def test_unreadable_file_is_not_loaded(tmp_path):
+    path = tmp_path / "numbers.json"
+    assert not Numbers(str(path), None).load_local()
+    path.write_text("{not json")
+    assert not Numbers(str(path), None).load_local()
+
+
+def test_persist_failure_keeps_the_fetched_data(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    # the parent "directory" is a file, so persisting raises OSError
+    snap = Numbers(str(blocker / "numbers.json"), {"fetched_at": 1.0, "values": [3]})
+    asyncio.run(snap.refresh())
+    assert snap.values == [3]
+
+
+def test_start_without_credentials_only_loads(tmp_path, monkeypatch):
+    monkeypatch.delenv("ALPACA_API_KEY", raising=False)
+    path = tmp_path / "numbers.json"
+    path.write_text(json.dumps({"fetched_at": 5.0, "values": [4]}))
+    snap = Numbers(str(path), None)
+    snap.start()
+    assert snap.values == [4]
+    assert snap._task is None
@@ -0,0 +1,85 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services import token_refresh
+from services.token_refresh import TokenRefresher
+
+
+class FakeAccounts:
+    def __init__(self, rows):
+        self.rows = {row["id"]: dict(row) for row in rows}
+        self.updates = []
+
+    async def update(self, account_id, data):
+        self.updates.append((account_id, data))
+        self.rows[account_id].update(data)
+
+    async def due_for_refresh(self, expires_before):
+        return [dict(r) for r in self.rows.values() if r.get("is_connected") and r.get("refresh_token")]
+
+
+@pytest.fixture
+def oauth(monkeypatch):
+    """Point the refresher at a fake token endpoint; returns the list of requests it served."""
+    monkeypatch.setenv("ALPACA_CLIENT_ID", "client")
+    monkeypatch.setenv("ALPACA_CLIENT_SECRET", "secret")
+    requests = []
+    responses = {}
+
+    def handler(request):
+        requests.append(request)
+        token = dict(httpx.QueryParams(request.content.decode()))["refresh_token"]
+        return responses[token]
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(token_refresh, "get_http_client", lambda: client)
+    return requests, responses
+
+
+def test_successful_refresh_rotates_the_tokens(oauth):
+    requests, responses = oauth
+    responses["good"] = httpx.Response(200, json={"access_token": "new", "refresh_token": "good2", "expires_in": 3600})
+    accounts = FakeAccounts([{"id": "a1", "refresh_token": "good", "is_connected": True}])
+
+    token = asyncio.run(TokenRefresher().refresh("a1", "good", accounts))
+    assert token == "new"
+    assert accounts.rows["a1"]["refresh_token"] == "good2"
+
+
+def test_revoked_refresh_token_marks_the_account_and_stops_retrying(oauth):
+    requests, responses = oauth
+    responses["dead"] = httpx.Response(400, json={"error": "invalid_grant", "error_description": "revoked"})
+    accounts = FakeAccounts([{"id": "a1", "refresh_token": "dead", "is_connected": True}])
+    refresher = TokenRefresher(failure_backoff_seconds=0)
+
+    async def two_passes():
+        return [await refresher.refresh_due(accounts) for _ in range(2)]
+
+    assert asyncio.run(two_passes()) == [1, 0]
+    assert len(requests) == 1
+    assert accounts.rows["a1"]["is_connected"] is False
+    assert accounts.rows["a1"]["refresh_token"] is None
+    assert refresher.stats()["revoked"] == 1
+
+
+def test_transient_failures_back_off_and_retry(oauth, monkeypatch):
+    requests, responses = oauth
+    responses["flaky"] = httpx.Response(503, text="unavailable")
+    accounts = FakeAccounts([{"id": "a1", "refresh_token": "flaky", "is_connected": True}])
+    refresher = TokenRefresher(failure_backoff_seconds=600)
+
+    now = [1_000_000.0]
+    monkeypatch.setattr(token_refresh.time, "time", lambda: now[0])
+
+    async def passes():
+        results = [await refresher.refresh_due(accounts)]
+        results.append(await refresher.refresh_due(accounts))  # still backing off
+        now[0] += 601
+        results.append(await refresher.refresh_due(accounts))
+        return results
+
+    assert asyncio.run(passes()) == [1, 0, 1]
+    assert accounts.rows["a1"]["is_connected"] is True
+    assert refresher.failures == 2
@@ -0,0 +1,67 @@
+import asyncio
+
+from services.order_ledger import order_ledgers
+from services.trade_stream import AccountTradeStream, TradeStreamManager
+
+
+def _stream() -> AccountTradeStream:
+    stream = AccountTradeStream("user-1", "account-1", accounts=None, ledger_repo=None, snapshot_delay=3600)
+    stream.account = {"cash": 10_000.0, "buying_power": 10_000.0, "portfolio_value": 11_000.0, "status": "ACTIVE"}
+    stream.positions = {"AAPL": {"qty": 10.0, "avg_entry_price": 100.0, "last_price": 100.0}}
+    return stream
+
+
+def _fill(qty, price, position_qty, side="buy"):
+    return {"symbol": "AAPL", "side": side}, {"event": "fill", "qty": str(qty), "price": str(price), "position_qty": str(position_qty)}
+
+
+def _run(stream: AccountTradeStream, *fills) -> None:
+    async def main():
+        for order, data in fills:
+            stream._apply_fill(order, data)
+        stream._snapshot_task.cancel()
+
+    asyncio.run(main())
+
+
+def test_fill_after_snapshot_moves_position_and_cash():
+    stream = _stream()
+    _run(stream, _fill(10, 110.0, 20))
+    assert stream.positions["AAPL"]["qty"] == 20
+    assert stream.positions["AAPL"]["avg_entry_price"] == 105.0
+    assert stream.account["cash"] == 10_000.0 - 1_100.0
+
+
+def test_fill_already_in_snapshot_is_not_counted_twice():
+    stream = _stream()
+    # the snapshot was read after this fill: the position already is 10
+    _run(stream, _fill(10, 100.0, 10))
+    assert stream.positions["AAPL"]["qty"] == 10
+    assert stream.account["cash"] == 10_000.0
+
+
+def test_closing_fill_removes_the_position():
+    stream = _stream()
+    _run(stream, _fill(10, 120.0, 0, side="sell"))
+    assert "AAPL" not in stream.positions
+    assert stream.account["cash"] == 10_000.0 + 1_200.0
+
+
+def test_ledger_follows_invalidation():
+    stream = _stream()
+    stream.connected = True
+    first = stream.ledger
+    order_ledgers.invalidate("user-1")
+    second = stream.ledger
+    assert second is not first
+    assert second is order_ledgers.get("user-1", "account-1")
+    assert second.live
+
+
+def test_manager_stats_are_aggregate_only():
+    manager = TradeStreamManager()
+    for account_id, connected, events in (("account-1", True, 3), ("account-2", False, 2)):
+        stream = AccountTradeStream("user-1", account_id, accounts=None, ledger_repo=None)
+        stream.connected, stream.events, stream.last_event_at = connected, events, float(events)
+        manager._streams[account_id] = stream
+    assert manager.stats() == {"streams": 2, "connected": 1, "events": 5, "last_event_at": 3.0}
@@ -41,21 +41,35 @@ export function PortfolioOverview() {
     return data;
   };
 
-  // Fetch real-time market data for portfolio symbols
+  // Stream real-time market data for portfolio symbols
   React.useEffect(() => {
+    if (!user) return;
+
+    // Get symbols from portfolio accounts (simplified example)
+    const symbols = ['AAPL', 'MSFT', 'BTC', 'ETH'];
+    let socket: WebSocket | null = null;
+    let fallbackInterval: ReturnType<typeof setInterval> | null = null;
+    let closed = false;
+
+    const applyPrices = (data: any) => {
+      // Generate historical data for charts
+      const newHistoricalData: any = {};
+      Object.entries(data).forEach(([symbol, quote]: [string, any]) => {
+        if (!historicalData[symbol] && quote.price !== undefined) {
+          newHistoricalData[symbol] = generateMockHistoricalData(quote.price, symbol);
+        }
+      });
+      setHistoricalData(prev => ({ ...newHistoricalData, ...prev }));
+    };
+
     const fetchMarketData = async () => {
-      if (!user) return;
-      
       setLoading(true);
       try {
         const { data: { session } } = await supabase.auth.getSession();
         
         if (!session?.access_token) return;
 
-        // Get symbols from portfolio accounts (simplified example)
-        const symbols = ['AAPL', 'MSFT', 'BTC', 'ETH'].join(',');
-        
-        const response = await fetch(`${import.meta.env.VITE_API_BASE_URL}/api/market-data/live-prices?symbols=${symbols}`, {
+        const response = await fetch(`${import.meta.env.VITE_API_BASE_URL}/api/market-data/live-prices?symbols=${symbols.join(',')}`, {
           headers: {
             'Authorization': `Bearer ${session.access_token}`,
           },
@@ -64,15 +78,7 @@ export function PortfolioOverview() {
         if (response.ok) {
           const data = await response.json();
           setMarketData(data);
-          
-          // Generate historical data for charts
-          const newHistoricalData: any = {};
-          Object.entries(data).forEach(([symbol, quote]: [string, any]) => {
-            if (!historicalData[symbol]) {
-              newHistoricalData[symbol] = generateMockHistoricalData(quote.price, symbol);
-            }
-          });
-          setHistoricalData(prev => ({ ...prev, ...newHistoricalData }));
+          applyPrices(data);
         }
       } catch (error) {
         console.error('Error fetching market data:', error);
@@ -81,11 +87,54 @@ export function PortfolioOverview() {
       }
     };
 
-    fetchMarketData();
-    
-    // Refresh market data every 30 seconds
-    const interval = setInterval(fetchMarketData, 30000);
-    return () => clearInterval(interval);
+    // Fall back to polling every 30 seconds if the stream is unavailable
+    const startPolling = () => {
+      if (closed || fallbackInterval) return;
+      fetchMarketData();
+      fallbackInterval = setInterval(fetchMarketData, 30000);
+    };
+
+    const connect = async () => {
+      const { data: { session } } = await supabase.auth.getSession();
+      if (!session?.access_token || closed) return;
+
+      const wsBase = String(import.meta.env.VITE_API_BASE_URL).replace(/^http/, 'ws');
+      socket = new WebSocket(`${wsBase}/api/market-data/stream?token=${encodeURIComponent(session.access_token)}`);
+
+      socket.onopen = () => {
+        socket?.send(JSON.stringify({ action: 'subscribe', symbols }));
+      };
+
+      socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.type === 'snapshot') {
+          setMarketData((prev: any) => ({ ...(prev || {}), ...message.data }));
+          applyPrices(message.data);
+        } else if (message.type === 'delta') {
+          setMarketData((prev: any) => {
+            const next = { ...(prev || {}) };
+            Object.entries(message.data).forEach(([symbol, changes]: [string, any]) => {
+              next[symbol] = { ...(next[symbol] || {}), ...changes };
+            });
+            return next;
+          });
+        }
+      };
+
+      socket.onclose = () => {
+        socket = null;
+        startPolling();
+      };
+    };
+
+    setLoading(true);
+    connect().finally(() => setLoading(false));
+
+    return () => {
+      closed = true;
+      socket?.close();
+      if (fallbackInterval) clearInterval(fallbackInterval);
+    };
   }, [user]);
 
   // Update historical data with new prices
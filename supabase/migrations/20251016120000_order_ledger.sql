@@ -0,0 +1,69 @@
+/*
+  # Create order_ledger table
+
+  1. New Tables
+    - `order_ledger`
+      - `id` (uuid, primary key)
+      - `user_id` (uuid, foreign key to auth.users)
+      - `account_id` (uuid, foreign key to brokerage_accounts; null for the platform API keys)
+      - `order_id` (text, brokerage order id)
+      - `client_order_id` (text)
+      - `symbol`, `side`, `order_type`, `time_in_force`, `status` (text)
+      - `qty`, `notional`, `filled_qty`, `filled_avg_price`, `limit_price`, `stop_price` (numeric)
+      - `created_at`, `submitted_at`, `updated_at`, `filled_at`, `canceled_at`, `expired_at`
+        (timestamp, as reported by the brokerage)
+      - `synced_at` (timestamp, when the row was last written)
+
+  2. Security
+    - Enable RLS on `order_ledger` table
+    - Authenticated users can read their own orders; rows are written by the API's service role
+
+  3. Indexes
+    - Unique (user_id, order_id) for upserts
+    - (user_id, account_id, submitted_at) for loading an account's history in order
+    - Partial index on orders that can still change
+*/
+
+CREATE TABLE IF NOT EXISTS public.order_ledger (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id uuid NOT NULL,
+    account_id uuid,
+    order_id text NOT NULL,
+    client_order_id text,
+    symbol text NOT NULL,
+    side text NOT NULL,
+    order_type text,
+    time_in_force text,
+    status text NOT NULL,
+    qty numeric,
+    notional numeric,
+    filled_qty numeric NOT NULL DEFAULT 0,
+    filled_avg_price numeric,
+    limit_price numeric,
+    stop_price numeric,
+    created_at timestamp with time zone,
+    submitted_at timestamp with time zone,
+    updated_at timestamp with time zone,
+    filled_at timestamp with time zone,
+    canceled_at timestamp with time zone,
+    expired_at timestamp with time zone,
+    synced_at timestamp with time zone NOT NULL DEFAULT now(),
+    CONSTRAINT order_ledger_user_id_fkey FOREIGN KEY (user_id) REFERENCES auth.users(id) ON DELETE CASCADE,
+    CONSTRAINT order_ledger_account_id_fkey FOREIGN KEY (account_id) REFERENCES public.brokerage_accounts(id) ON DELETE CASCADE,
+    CONSTRAINT order_ledger_user_order_key UNIQUE (user_id, order_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_order_ledger_account_submitted
+    ON public.order_ledger USING btree (user_id, account_id, submitted_at);
+CREATE INDEX IF NOT EXISTS idx_order_ledger_working
+    ON public.order_ledger USING btree (user_id)
+    WHERE status NOT IN ('filled', 'canceled', 'expired', 'replaced', 'rejected');
+
+-- Enable Row Level Security
+ALTER TABLE public.order_ledger ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own orders"
+  ON public.order_ledger
+  FOR SELECT
+  TO authenticated
+  USING (auth.uid() = user_id);